@@ -0,0 +1,170 @@
+import json
+import logging
+import multiprocessing
+import numpy as np
+
+try:
+    from configparser import RawConfigParser
+except ImportError:
+    from ConfigParser import RawConfigParser
+
+from infrastructure.roi import ROI
+from infrastructure.encoder import Encoder
+from infrastructure.hardware import HardwareConfiguration
+from infrastructure.image_2_points import Image2Points
+from infrastructure.intersection_cache import IntersectionCache
+from infrastructure.laser_detector import FusedLaserDetector2
+from infrastructure.frame_source import VideoFileSource
+from infrastructure.recording import MAGIC, RecordingSource, RecordedEncoder
+from infrastructure.point_buffer import PointBuffer
+from infrastructure.point_thinning import VoxelThinner
+from infrastructure.gl_point_converter import GLConverter
+from infrastructure.writer import PLYWriter
+
+logger = logging.getLogger('peachy')
+
+
+def load_settings(config_path):
+    parser = RawConfigParser()
+    parser.read(config_path)
+
+    def getdefault(section, option, default):
+        if parser.has_option(section, option):
+            return parser.get(section, option)
+        return default
+
+    return {
+        'hardware': HardwareConfiguration.from_config(getdefault),
+        'roi': json.loads(getdefault('peachyscanner.posisition', 'roi', '[0.0, 0.0, 1.0, 1.0]')),
+        'encoder_point': json.loads(getdefault('peachyscanner.posisition', 'encoder_point', '[0.5, 0.5]')),
+        'encoder_threshold': int(getdefault('peachyscanner.posisition', 'encoder_threshold', 200)),
+        'encoder_null_zone': int(getdefault('peachyscanner.posisition', 'encoder_null_zone', 50)),
+        'laser_threshold': int(getdefault('laserdetection', 'threshold', 225)),
+        'laser_color': getdefault('laserdetection', 'laser_color', 'red'),
+    }
+
+
+def is_recording(path):
+    with open(path, 'rb') as afile:
+        return afile.read(len(MAGIC)) == MAGIC
+
+
+_worker = {}
+
+
+def _init_worker(hardware, frame_shape, roi_points, laser_theta, laser_threshold, laser_color, subpixel, sections, cache_path):
+    cache = IntersectionCache(cache_path) if cache_path else None
+    _worker['img2points'] = Image2Points(hardware, frame_shape, cache)
+    _worker['roi'] = ROI(*roi_points)
+    _worker['img2points'].compile_roi(_worker['roi'])
+    _worker['laser_detector'] = FusedLaserDetector2(laser_threshold, laser_color)
+    _worker['laser_theta'] = laser_theta
+    _worker['subpixel'] = subpixel
+    _worker['sections'] = sections
+
+
+def _process_task(task):
+    img2points, roi, laser_theta = _worker['img2points'], _worker['roi'], _worker['laser_theta']
+    results = []
+    for (section, crop) in task:
+        detected = _worker['laser_detector'].detect(crop)
+        if _worker['subpixel']:
+            points = img2points.get_masked_line_points(detected, roi, laser_theta)
+        else:
+            points = img2points.get_masked_points(detected, roi, laser_theta)
+        points_section = np.repeat(section, len(points))
+        results.append((section, img2points.rotate_sections(points, points_section, _worker['sections'])))
+    return results
+
+
+class BatchProcessor(object):
+    '''Turns a recorded scan into points without a camera or GUI, laser detection is spread over a process pool'''
+
+    def __init__(self, settings, laser_index=0, sections=None, subpixel=False, workers=None, frames_per_task=8, cache_path=None):
+        self.settings = settings
+        self.laser_theta = settings['hardware'].intersections_rad_mm[laser_index][0]
+        self.sections = sections
+        self.subpixel = subpixel
+        self.workers = workers if workers else multiprocessing.cpu_count()
+        self.frames_per_task = frames_per_task
+        self.cache_path = cache_path
+
+    def _open(self, path):
+        if is_recording(path):
+            source = RecordingSource(path)
+            source.start()
+            encoder = RecordedEncoder.from_source(source)
+            config = source.configuration
+            roi = ROI(*config['roi'])
+            laser_threshold = config['laser_detector'].get('threshold', self.settings['laser_threshold'])
+            laser_color = config['laser_detector'].get('color', self.settings['laser_color'])
+            if self.sections:
+                encoder.sections = self.sections
+        else:
+            source = VideoFileSource(path, loop=False)
+            source.start()
+            encoder = Encoder(
+                tuple(self.settings['encoder_point']),
+                self.settings['encoder_threshold'],
+                self.settings['encoder_null_zone'],
+                20,
+                self.sections if self.sections else 200)
+            roi = ROI(*self.settings['roi'])
+            laser_threshold, laser_color = self.settings['laser_threshold'], self.settings['laser_color']
+        return (source, encoder, roi, laser_threshold, laser_color)
+
+    def _tasks(self, source, encoder, roi):
+        ticks = 0
+        timestamp = 0.0
+        task = []
+        while ticks < encoder.sections:
+            frame = source.read()
+            if frame is None:
+                break
+            frame_timestamp = getattr(source, 'frame_timestamp', None)
+            (tick, section) = encoder.should_capture_frame_for_section(frame, frame_timestamp if frame_timestamp is not None else timestamp)
+            if tick:
+                task.append((section, roi.get_left_of_center(frame).copy()))
+                ticks += 1
+                if len(task) >= self.frames_per_task:
+                    yield task
+                    task = []
+            source.release(frame)
+            timestamp += 1.0
+        if ticks < encoder.sections:
+            logger.warning("Scan ended after {} of {} sections".format(ticks, encoder.sections))
+        if task:
+            yield task
+
+    def process(self, path):
+        (source, encoder, roi, laser_threshold, laser_color) = self._open(path)
+        worker_args = (self.settings['hardware'], source.shape, roi.get_points(), self.laser_theta, laser_threshold, laser_color, self.subpixel, encoder.sections, self.cache_path)
+        tasks = self._tasks(source, encoder, roi)
+        sections = []
+        points = []
+        if self.workers == 1:
+            _init_worker(*worker_args)
+            results = [_process_task(task) for task in tasks]
+        else:
+            if self.cache_path:
+                Image2Points(self.settings['hardware'], source.shape, IntersectionCache(self.cache_path))
+            pool = multiprocessing.Pool(self.workers, _init_worker, worker_args)
+            try:
+                results = list(pool.imap(_process_task, tasks))
+            finally:
+                pool.close()
+                pool.join()
+        source.stop()
+        for task_results in results:
+            for (section, section_points) in task_results:
+                sections.append(section)
+                points.append(section_points)
+        buffer = PointBuffer()
+        for idx in sorted(range(len(sections)), key=lambda idx: sections[idx]):
+            buffer.append(points[idx])
+        logger.info("Processed {} sections of {} into {} points".format(len(sections), path, len(buffer)))
+        return buffer.points if buffer.points is not None else np.empty((0, 3))
+
+    def write_ply(self, points_xyz, path, voxel_size_mm=0.5):
+        with open(path, 'wb') as afile:
+            PLYWriter(GLConverter(), VoxelThinner(voxel_size_mm), PLYWriter.binary_format).write_cartisien_points(afile, points_xyz)
@@ -1,12 +1,17 @@
 import logging
+import os
+
+import config
 from infrastructure.roi import ROI
 from infrastructure.encoder import Encoder
 
 from infrastructure.camera import Camera
 from infrastructure.video_processor import VideoProcessor
 from infrastructure.data_capture import ImageCapture, PointCaptureXYZ
-from infrastructure.laser_detector import LaserDetector, LaserDetector2
+from infrastructure.laser_detector import LaserDetector, FusedLaserDetector2
 from infrastructure.image_2_points import Image2Points
+from infrastructure.intersection_cache import IntersectionCache
+from infrastructure.metrics import metrics
 
 
 logger = logging.getLogger('peachy')
@@ -14,41 +19,82 @@ logger = logging.getLogger('peachy')
 
 class ScannerAPI(object):
 
-    def __init__(self):
-        self.camera = Camera()
+    def __init__(self, frame_source=None):
+        self.camera = frame_source if frame_source is not None else Camera()
         self.camera.start()
         self._default_roi = ROI(0.0, 0.0, 1.0, 1.0)
         self._default_encoder = Encoder((0.2, 0.2), 382, 100, 20, 200)
-        self._default_laser_detector = LaserDetector2(225, 'red')
+        self._default_laser_detector = FusedLaserDetector2(225, 'red')
 
         self.encoder = self._default_encoder
         self.roi = self._default_roi
         self.laser_detector = self._default_laser_detector
-        self.video_processor = VideoProcessor(self.camera, self.encoder, self.roi, self.laser_detector)
+        self.video_processor = VideoProcessor(self.camera, self.encoder, self.roi, self.laser_detector, pipelined=True, roi_detection=True)
+        if hasattr(self.camera, 'frame_pool'):
+            self.camera.frame_pool.ensure_size(self.video_processor.frames_in_flight)
+        self.intersection_cache = IntersectionCache(os.path.join(config.PEACHY_PATH, 'cache'))
+        self.metrics = metrics
 
     def set_region_of_interest_from_abs_points(self, point1, point2, frame_shape_xy):
         self.roi = ROI.set_from_abs_points(point1, point2, [frame_shape_xy[1], frame_shape_xy[0], 3])
+        self._compile_roi()
         self.video_processor.roi = self.roi
 
     def set_region_of_interest_from_rel_points(self, x_rel, y_rel, w_rel, h_rel):
         self.roi = ROI(x_rel, y_rel, w_rel, h_rel)
+        self._compile_roi()
         self.video_processor.roi = self.roi
 
+    def _compile_roi(self):
+        if hasattr(self, 'img2points'):
+            self.img2points.compile_roi(self.roi)
+
     def capture_image(self, call_back=None, section_offset=0):
         if call_back:
             self.video_processor.subscribe(ImageCapture(self.encoder.sections, section_offset), call_back)
         else:
             self.video_processor.subscribe(ImageCapture(self.encoder.sections, section_offset))
 
-    def capture_points_xyz(self, laser_theta, points=None, call_back=None):
+    def capture_points_xyz(self, laser_theta, points=None, call_back=None, subpixel=False, batch_size=1, interpolate=False):
         if call_back:
-            self.video_processor.subscribe(PointCaptureXYZ(self.encoder.sections, self.img2points, laser_theta, points), call_back)
+            self.video_processor.subscribe(PointCaptureXYZ(self.encoder.sections, self.img2points, laser_theta, points, subpixel, batch_size, interpolate), call_back)
         else:
-            self.video_processor.subscribe(PointCaptureXYZ(self.encoder.sections, self.img2points, laser_theta, points))
+            self.video_processor.subscribe(PointCaptureXYZ(self.encoder.sections, self.img2points, laser_theta, points, subpixel, batch_size, interpolate))
 
     def get_feed_image(self, size):
         return self.video_processor.get_bounded_image(*size)
 
+    def get_capture_mode(self):
+        return self.camera.get_capture_mode()
+
+    def set_capture_mode(self, width=None, height=None, fps=None, fourcc=None):
+        shape = self.camera.shape
+        mode = self.camera.set_capture_mode(width, height, fps, fourcc)
+        if hasattr(self, '_hardware') and self.camera.shape != shape:
+            self.img2points = Image2Points(self._hardware, self.camera.shape, self.intersection_cache)
+            self._compile_roi()
+        return mode
+
+    def probe_capture_modes(self, modes, frames=30):
+        return self.camera.probe_modes(modes, frames)
+
+    def start_recording(self, path, crop=False):
+        return self.video_processor.start_recording(path, crop)
+
+    def stop_recording(self):
+        self.video_processor.stop_recording()
+
+    def get_queue_depths(self):
+        return self.video_processor.queue_depths
+
+    def get_metrics(self):
+        result = dict(self.video_processor.metrics)
+        result.update(self.metrics.snapshot())
+        return result
+
+    def start_metrics_logging(self, interval_seconds):
+        self.metrics.start_logging(interval_seconds)
+
     def configure_encoder(self, point, threshold, null_zone, sections):
         self.encoder = Encoder(point, threshold, null_zone, 20, sections)
         self.video_processor.encoder = self.encoder
@@ -58,12 +104,13 @@ class ScannerAPI(object):
         self.video_processor.laser_detector = self.laser_detector
 
     def configure_laser_detector2(self, threshold, color):
-        self.laser_detector = LaserDetector2(threshold, color)
+        self.laser_detector = FusedLaserDetector2(threshold, color)
         self.video_processor.laser_detector = self.laser_detector
 
     def configure(self, hardware, callback):
         self._hardware = hardware
-        self.img2points = Image2Points(self._hardware, self.camera.shape)
+        self.img2points = Image2Points(self._hardware, self.camera.shape, self.intersection_cache)
+        self._compile_roi()
         callback()
 
     def get_scanner_posisitions(self):
@@ -75,5 +122,6 @@ class ScannerAPI(object):
         self.video_processor.start()
 
     def stop(self):
+        self.metrics.stop_logging()
         self.video_processor.stop()
         self.camera.stop()
@@ -0,0 +1,54 @@
+import logging
+import os
+import sys
+import time
+import argparse
+
+import config
+from api.batch import BatchProcessor, load_settings
+
+
+def setup_logging(args):
+    logging_level = getattr(logging, args.loglevel.upper(), "INFO")
+    if not isinstance(logging_level, int):
+        raise ValueError('Invalid log level: %s' % args.loglevel)
+    logging.basicConfig(format='%(levelname)s: %(asctime)s %(module)s - %(message)s', level=logging_level)
+
+
+def output_path(args, input_path):
+    name = os.path.splitext(os.path.basename(input_path))[0] + '.ply'
+    if args.output:
+        return os.path.join(args.output, name)
+    return os.path.join(os.path.dirname(os.path.abspath(input_path)), name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Peachy Scanner Batch")
+    parser.add_argument('inputs', nargs='+', help="Recorded scans, video files or recordings made by the scanner")
+    parser.add_argument('-c', '--config',   dest='config',   action='store',      required=False, default=os.path.join(os.path.expanduser('~'), '.kivy', 'config.ini'), help="Scanner settings file default: ~/.kivy/config.ini")
+    parser.add_argument('-o', '--output',   dest='output',   action='store',      required=False, help="Directory to write the PLY files to default: next to each input")
+    parser.add_argument('-p', '--laser',    dest='laser',    action='store',      required=False, type=int, default=0, help="Index of the laser position the scans were made with default: 0")
+    parser.add_argument('-s', '--sections', dest='sections', action='store',      required=False, type=int, default=None, help="Encoder sections per revolution default: from the recording or 200")
+    parser.add_argument('-w', '--workers',  dest='workers',  action='store',      required=False, type=int, default=None, help="Worker processes default: one per cpu")
+    parser.add_argument('-v', '--voxel',    dest='voxel',    action='store',      required=False, type=float, default=0.5, help="Voxel size in mm to thin points to default: 0.5")
+    parser.add_argument('--subpixel',       dest='subpixel', action='store_true', required=False, help="Locate the laser to a fraction of a pixel")
+    parser.add_argument('-l', '--log',      dest='loglevel', action='store',      required=False, default="WARNING", help="Enter the loglevel [DEBUG|INFO|WARNING|ERROR] default: WARNING")
+    args = parser.parse_args()
+
+    setup_logging(args)
+    if args.output and not os.path.exists(args.output):
+        os.makedirs(args.output)
+
+    settings = load_settings(args.config)
+    processor = BatchProcessor(settings, args.laser, args.sections, args.subpixel, args.workers, cache_path=os.path.join(config.PEACHY_PATH, 'cache'))
+    failures = 0
+    for input_path in args.inputs:
+        start = time.time()
+        try:
+            points = processor.process(input_path)
+            processor.write_ply(points, output_path(args, input_path), args.voxel)
+            print("{} -> {} {} points in {:.2f} seconds".format(input_path, output_path(args, input_path), len(points), time.time() - start))
+        except Exception as ex:
+            failures += 1
+            logging.getLogger('peachy').error("Processing {} failed: {}".format(input_path, ex))
+    sys.exit(1 if failures else 0)
@@ -17,7 +17,7 @@ from kivy.clock import Clock
 
 from infrastructure.hardware import HardwareConfiguration
 
-from ui.camera import CameraControls
+from ui.camera import CameraControls, CaptureModeLoader
 from ui.posisition import PositionControl
 from ui.laserdetection import LaserDetection
 from ui.capture_control import PointsCapture
@@ -77,7 +77,16 @@ class LoadingBox(Screen):
 
     def load_hardware(self):
         hardware = HardwareLoader.get_hardware()
-        threading.Thread(target=self.scanner.configure, args=(hardware, self.call_back)).start()
+        capture_mode = CaptureModeLoader.get_capture_mode()
+        threading.Thread(target=self._configure, args=(hardware, capture_mode)).start()
+
+    def _configure(self, hardware, capture_mode):
+        if any([value is not None for value in capture_mode.values()]):
+            try:
+                self.scanner.set_capture_mode(**capture_mode)
+            except Exception as ex:
+                Logger.error("Setting capture mode {} failed: {}".format(capture_mode, ex))
+        self.scanner.configure(hardware, self.call_back)
 
     def call_back(self,):
         self.parent.current = 'scanner_gui_screen'
@@ -2,6 +2,8 @@ import cv2
 from cv2 import VideoCapture
 import logging
 
+from infrastructure.frame_source import FrameSource
+
 logger = logging.getLogger('peachy')
 
 global_camera_properties = [
@@ -14,7 +16,30 @@ global_camera_properties = [
 ]
 
 
-class Camera(object):
+capture_mode_properties = [
+{'name': 'width',   'value': cv2.CAP_PROP_FRAME_WIDTH},
+{'name': 'height',  'value': cv2.CAP_PROP_FRAME_HEIGHT},
+{'name': 'fps',     'value': cv2.CAP_PROP_FPS},
+]
+
+
+def fourcc_to_string(fourcc):
+    fourcc = int(fourcc)
+    if fourcc <= 0:
+        return None
+    return ''.join([chr((fourcc >> (8 * idx)) & 0xFF) for idx in range(4)])
+
+
+def string_to_fourcc(fourcc):
+    if len(fourcc) != 4:
+        raise Exception("FOURCC must be 4 characters was {}".format(fourcc))
+    return cv2.VideoWriter_fourcc(*fourcc)
+
+
+class Camera(FrameSource):
+    def __init__(self, frame_pool_size=8, capture_mode=None):
+        super(Camera, self).__init__(frame_pool_size=frame_pool_size)
+        self.capture_mode = capture_mode
 
     def get_settings(self):
         if not hasattr(self, '_video_capture'):
@@ -36,13 +61,68 @@ class Camera(object):
             raise Exception("Setting {} not available".format(setting))
         self._video_capture.set(setting_id, value)
 
+    def get_capture_mode(self):
+        if not hasattr(self, '_video_capture'):
+            raise Exception("Start video capture before getting the capture mode")
+        with self._lock:
+            mode = dict([(prop['name'], self._video_capture.get(prop['value'])) for prop in capture_mode_properties])
+            mode['fourcc'] = fourcc_to_string(self._video_capture.get(cv2.CAP_PROP_FOURCC))
+        mode['width'] = int(mode['width'])
+        mode['height'] = int(mode['height'])
+        return mode
+
+    def set_capture_mode(self, width=None, height=None, fps=None, fourcc=None):
+        if not hasattr(self, '_video_capture'):
+            raise Exception("Start video capture before setting the capture mode")
+        requested = {'width': width, 'height': height, 'fps': fps}
+        with self._lock:
+            # The format has to be set before the size as drivers choose the available sizes from it
+            if fourcc:
+                self._video_capture.set(cv2.CAP_PROP_FOURCC, string_to_fourcc(fourcc))
+            for prop in capture_mode_properties:
+                if requested[prop['name']]:
+                    self._video_capture.set(prop['value'], requested[prop['name']])
+            image = self._read()
+            if image is None:
+                logger.warning("No frame read after requesting capture mode {}x{} {} fps {}, keeping the previous frame shape".format(width, height, fps, fourcc))
+            else:
+                self.frame_pool.release(image)
+                self.shape = image.shape
+        mode = self.get_capture_mode()
+        logger.info("Requested capture mode {}x{} {} fps {} got {}".format(width, height, fps, fourcc, mode))
+        return mode
+
+    def probe_modes(self, modes, frames=30):
+        original = self.get_capture_mode()
+        results = []
+        try:
+            for mode in modes:
+                actual = self.set_capture_mode(**mode)
+                results.append({'requested': mode, 'actual': actual, 'measured_fps': self.probe_fps(frames)})
+        finally:
+            self.set_capture_mode(**original)
+        return sorted(results, key=lambda result: result['measured_fps'], reverse=True)
+
     def read(self):
-        (retVal, image) = self._video_capture.read()
+        with self._lock:
+            return self._read()
+
+    def _read(self):
+        if not hasattr(self, 'shape'):
+            (retVal, image) = self._video_capture.read()
+            return image
+        frame = self.frame_pool.acquire(self.shape)
+        (retVal, image) = self._video_capture.read(frame)
+        if image is not frame:
+            self.frame_pool.release(frame)
         return image
 
     def start(self):
         self._video_capture = VideoCapture(0)
-        self.shape = self.read().shape
+        if self.capture_mode:
+            self.set_capture_mode(**self.capture_mode)
+        if not hasattr(self, 'shape'):
+            self.shape = self.read().shape
 
     def stop(self):
         self._video_capture.release()
@@ -1,6 +1,8 @@
 import numpy as np
 import logging
 
+from infrastructure.point_buffer import PointBuffer
+
 logger = logging.getLogger('peachy')
 
 
@@ -41,21 +43,59 @@ class ImageCapture(Handler):
 
 
 class PointCaptureXYZ(Handler):
-    def __init__(self, sections, img2points, laser_theta, points_xyz=None, ):
+    def __init__(self, sections, img2points, laser_theta, points_xyz=None, subpixel=False, batch_size=1, interpolate=False):
         super(PointCaptureXYZ, self).__init__(sections)
         self.img2points = img2points
         self.laser_theta = laser_theta
+        self.subpixel = subpixel
+        self.batch_size = batch_size
+        self.interpolated = interpolate
         self.sections = sections
         self._section_count = 0
-        self.points_xyz = points_xyz
+        self._last_section = None
+        self._batch = []
+        self._points = PointBuffer(points_xyz)
         logger.info("Point Capture Created for {: 8.3f} rad {: 8.3f} deg".format(self.laser_theta, np.rad2deg(self.laser_theta)))
 
-    def handle(self, laser_detection=None, section=0, roi=None, **kwargs):
-        rad = (section / float(self.sections)) * 2.0 * np.pi
-        points = self.img2points.get_points(laser_detection, rad, roi, self.laser_theta)
-        if self.points_xyz is None:
-            self.points_xyz = points
+    def handle(self, laser_detection=None, section=0, roi=None, tick=True, **kwargs):
+        if self.batch_size > 1:
+            self._queue_section(laser_detection, section, roi)
         else:
-            self.points_xyz = np.vstack((self.points_xyz, points))
-        self._section_count += 1
+            rad = (section / float(self.sections)) * 2.0 * np.pi
+            if self.subpixel:
+                points = self.img2points.get_line_points(laser_detection, rad, roi, self.laser_theta)
+            else:
+                points = self.img2points.get_points(laser_detection, rad, roi, self.laser_theta)
+            self._add_points(points)
+        if tick:
+            self._section_count += self._sections_advanced(section)
+        if self._batch and (len(self._batch) >= self.batch_size or self.complete):
+            self._flush()
         return self._section_count < self.sections
+
+    def _sections_advanced(self, section):
+        # The encoder skips sections for ticks it missed, which still count towards the revolution
+        last, self._last_section = self._last_section, int(section)
+        if last is None:
+            return 1
+        return max(1, (self._last_section - last) % self.sections)
+
+    def _queue_section(self, laser_detection, section, roi):
+        if self.subpixel:
+            points = self.img2points.get_masked_line_points(laser_detection, roi, self.laser_theta)
+        else:
+            points = self.img2points.get_masked_points(laser_detection, roi, self.laser_theta)
+        self._batch.append((points, section))
+
+    def _flush(self):
+        points = np.vstack([points for (points, section) in self._batch])
+        points_section = np.repeat([section for (points, section) in self._batch], [len(points) for (points, section) in self._batch])
+        self._batch = []
+        self._add_points(self.img2points.rotate_sections(points, points_section, self.sections))
+
+    def _add_points(self, points):
+        self._points.append(points)
+
+    @property
+    def points_xyz(self):
+        return self._points.points
@@ -2,16 +2,24 @@ import logging
 import numpy as np
 import cv2
 
+from infrastructure.overlay import OverlayPatch
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
 logger = logging.getLogger('peachy')
 
 class Encoder(object):
-    _history = []
     def __init__(self,
                  point=(0, 0),
                  threshold=382,
                  null_zone=382,
                  history_length=20,
-                 sections=1
+                 sections=1,
+                 clock=monotonic,
+                 missed_tick_tolerance=0.5
                  ):
         self.threshold = threshold
         self.null_zone = null_zone
@@ -21,31 +29,115 @@ class Encoder(object):
         self.THRESHOLD_MARKER_COLOR = (255, 255, 255)
 
         self.history_length = history_length
+        self._history_buffer = np.zeros(2 * history_length, dtype='int64')
+        self._history_index = 0
+        self._history_count = 0
+        self._encoder_patches = {}
+        self._threshold_lines_cache = None
 
         self._color_bgr = self.ENCODER_COLOR_LOW_BGR
         self._is_high = False
-        # self._history = []
         self.position = 0
+        self.value = None
         self.sections = sections
         self.relitive_point_xy = point
 
+        self.clock = clock
+        self.tick_interval = None
+        self.tick_time = None
+        self._interval_smoothing = 0.3
+        self.missed_tick_tolerance = missed_tick_tolerance
+        self.frame_time = None
+        self._max_frame_gap = 0.0
+        self.frames = 0
+        self.ticks = 0
+        self.missed_ticks = 0
+        self.late_frames = 0
+
+    @property
+    def history(self):
+        end = self._history_index + self.history_length
+        return self._history_buffer[end - self._history_count:end]
+
+    def _append_history(self, value):
+        self._history_buffer[self._history_index] = value
+        self._history_buffer[self._history_index + self.history_length] = value
+        self._history_index = (self._history_index + 1) % self.history_length
+        self._history_count = min(self._history_count + 1, self.history_length)
+
     @property
     def current_sections(self):
         return self._changes
 
-    def should_capture_frame_for_section(self, image):
+    @property
+    def metrics(self):
+        return {
+            'frames': self.frames,
+            'ticks': self.ticks,
+            'missed_ticks': self.missed_ticks,
+            'late_frames': self.late_frames,
+            'tick_interval': self.tick_interval,
+        }
+
+    def should_capture_frame_for_section(self, image, timestamp=None):
+        if timestamp is None:
+            timestamp = self.clock()
+        self._frame(timestamp)
         if self.process(image):
-            self.position = (self.position + 1) % self.sections
+            missed = self._tick(timestamp)
+            self.position = (self.position + 1 + missed) % self.sections
             return (True, self.position)
         else:
             return (False, self.position)
 
+    def _frame(self, timestamp):
+        self.frames += 1
+        if self.frame_time is not None:
+            gap = timestamp - self.frame_time
+            self._max_frame_gap = max(self._max_frame_gap, gap)
+            if self.tick_interval and gap > self.tick_interval:
+                self.late_frames += 1
+        self.frame_time = timestamp
+
+    def _missed_ticks(self, interval):
+        # A whole encoder state can only go unseen if the frames around it were further apart than a tick.
+        # States alternate so transitions are always missed in pairs.
+        if not self.tick_interval or self._max_frame_gap <= self.tick_interval:
+            return 0
+        return 2 * int((interval / self.tick_interval - 1 + self.missed_tick_tolerance) / 2.0)
+
+    def _tick(self, timestamp):
+        self.ticks += 1
+        missed = 0
+        if self.tick_time is not None:
+            interval = timestamp - self.tick_time
+            missed = self._missed_ticks(interval)
+            if missed:
+                logger.warning("Encoder missed {} ticks in {:.3f} seconds".format(missed, interval))
+                self.missed_ticks += missed
+                interval = interval / (missed + 1)
+            if self.tick_interval is None:
+                self.tick_interval = interval
+            else:
+                self.tick_interval += self._interval_smoothing * (interval - self.tick_interval)
+        self.tick_time = timestamp
+        self._max_frame_gap = 0.0
+        return missed
+
+    def section_position(self, timestamp=None):
+        if timestamp is None:
+            timestamp = self.clock()
+        if not self.tick_interval or self.tick_time is None:
+            return float(self.position)
+        fraction = min(max((timestamp - self.tick_time) / self.tick_interval, 0.0), 0.999)
+        return (self.position + fraction) % self.sections
+
     def process(self, image):
         absolute_point_xy = (int(image.shape[1] * self.relitive_point_xy[0]), int(image.shape[0] * self.relitive_point_xy[1]))
         point = image[absolute_point_xy[1], absolute_point_xy[0]]
-        value = np.sum(point)
-        self._history.append(value)
-        self._history = self._history[-self.history_length:]
+        value = int(point[0]) + int(point[1]) + int(point[2])
+        self.value = value
+        self._append_history(value)
         if value > self.threshold + self.null_zone:
             if not self._is_high:
                 self._is_high = True
@@ -61,29 +153,50 @@ class Encoder(object):
         return False
 
     def overlay_encoder(self, image):
-        mask = np.zeros(image.shape, dtype='uint8')
-        ep = (int(self.relitive_point_xy[0] * image.shape[1]), int(self.relitive_point_xy[1] * image.shape[0]))
-        mask = cv2.circle(mask, ep, 3, self._color_bgr, 1)
-        mask = cv2.line(mask, (ep[0] + 3, ep[1]), (ep[0] + 6, ep[1]), self._color_bgr, 1)
-        mask = cv2.line(mask, (ep[0] - 3, ep[1]), (ep[0] - 6, ep[1]), self._color_bgr, 1)
-        mask = cv2.line(mask, (ep[0], ep[1] + 3), (ep[0], ep[1] + 6), self._color_bgr, 1)
-        mask = cv2.line(mask, (ep[0], ep[1] - 3), (ep[0], ep[1] - 6), self._color_bgr, 1)
-        return mask
+        return self.overlay_encoder_patch(image.shape).composite(np.zeros(image.shape, dtype='uint8'))
+
+    def overlay_encoder_patch(self, image_shape):
+        ep = (int(self.relitive_point_xy[0] * image_shape[1]), int(self.relitive_point_xy[1] * image_shape[0]))
+        if self._color_bgr not in self._encoder_patches:
+            patch = np.zeros((13, 13, 3), dtype='uint8')
+            cp = (6, 6)
+            patch = cv2.circle(patch, cp, 3, self._color_bgr, 1)
+            patch = cv2.line(patch, (cp[0] + 3, cp[1]), (cp[0] + 6, cp[1]), self._color_bgr, 1)
+            patch = cv2.line(patch, (cp[0] - 3, cp[1]), (cp[0] - 6, cp[1]), self._color_bgr, 1)
+            patch = cv2.line(patch, (cp[0], cp[1] + 3), (cp[0], cp[1] + 6), self._color_bgr, 1)
+            patch = cv2.line(patch, (cp[0], cp[1] - 3), (cp[0], cp[1] - 6), self._color_bgr, 1)
+            self._encoder_patches[self._color_bgr] = (patch, patch.any(axis=2))
+        patch, drawn = self._encoder_patches[self._color_bgr]
+        return OverlayPatch(patch, ep[0] - 6, ep[1] - 6, drawn)
 
     def overlay_history(self, image):
-        history = list(self._history[-self.history_length:])
-        mask = np.zeros(image.shape, dtype='uint8')
-        for idx in range(len(history)):
-            height = int((history[idx] / (255.0 * 3.0)) * mask.shape[0])
-            if history[idx] > self.threshold + self.null_zone:
-                color = self.ENCODER_COLOR_HIGH_BGR
-            elif history[idx] <= self.threshold - self.null_zone:
-                color = self.ENCODER_COLOR_LOW_BGR
-            else:
-                color = self.ENCODER_COLOR_NULL_BGR
-            mask = cv2.line(mask, (idx, mask.shape[0]), (idx, mask.shape[0] - height), color, 1)
-        theshold_top = mask.shape[0] - int(((self.threshold + self.null_zone) / (255.0 * 3.0)) * mask.shape[0])
-        theshold_bottom = mask.shape[0] - int(((self.threshold - self.null_zone) / (255.0 * 3.0)) * mask.shape[0])
-        mask = cv2.line(mask, (0, theshold_top), (self.history_length, theshold_top), self.THRESHOLD_MARKER_COLOR, 3)
-        mask = cv2.line(mask, (0, theshold_bottom), (self.history_length, theshold_bottom), self.THRESHOLD_MARKER_COLOR, 3)
-        return mask
+        return self.overlay_history_patch(image.shape).composite(np.zeros(image.shape, dtype='uint8'))
+
+    def overlay_history_patch(self, image_shape):
+        height = image_shape[0]
+        lines, lines_drawn = self._threshold_lines(height)
+        patch = np.zeros(lines.shape, dtype='uint8')
+        drawn = lines_drawn.copy()
+        history = self.history
+        if len(history) > 0:
+            colors = np.empty((len(history), 3), dtype='uint8')
+            colors[:] = self.ENCODER_COLOR_NULL_BGR
+            colors[history > self.threshold + self.null_zone] = self.ENCODER_COLOR_HIGH_BGR
+            colors[history <= self.threshold - self.null_zone] = self.ENCODER_COLOR_LOW_BGR
+            bar_heights = ((history / (255.0 * 3.0)) * height).astype('int')
+            bars = np.arange(height)[:, np.newaxis] >= (height - bar_heights)[np.newaxis, :]
+            np.copyto(patch[:, :len(history)], colors[np.newaxis, :, :], where=bars[:, :, np.newaxis])
+            drawn[:, :len(history)] |= bars
+        np.copyto(patch, lines, where=lines_drawn[:, :, np.newaxis])
+        return OverlayPatch(patch, 0, 0, drawn)
+
+    def _threshold_lines(self, height):
+        key = (height, self.threshold, self.null_zone, self.history_length)
+        if self._threshold_lines_cache is None or self._threshold_lines_cache[0] != key:
+            lines = np.zeros((height, self.history_length + 4, 3), dtype='uint8')
+            theshold_top = height - int(((self.threshold + self.null_zone) / (255.0 * 3.0)) * height)
+            theshold_bottom = height - int(((self.threshold - self.null_zone) / (255.0 * 3.0)) * height)
+            lines = cv2.line(lines, (0, theshold_top), (self.history_length, theshold_top), self.THRESHOLD_MARKER_COLOR, 3)
+            lines = cv2.line(lines, (0, theshold_bottom), (self.history_length, theshold_bottom), self.THRESHOLD_MARKER_COLOR, 3)
+            self._threshold_lines_cache = (key, lines, lines.any(axis=2))
+        return self._threshold_lines_cache[1:]
@@ -0,0 +1,103 @@
+import threading
+import logging
+import numpy as np
+
+from infrastructure.metrics import metrics
+
+logger = logging.getLogger('peachy')
+
+
+class FramePool(object):
+    '''Ring of preallocated frame buffers which are filled in place and reused once every holder releases them'''
+
+    def __init__(self, size=8):
+        if size < 1:
+            raise Exception('Frame pool size must be at least 1 was {}'.format(size))
+        self.size = size
+        self.allocations = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+        self._shape = None
+        self._dtype = None
+        self._buffers = []
+        self._references = []
+        self._index = {}
+        self._next = 0
+
+    def __len__(self):
+        return len(self._buffers)
+
+    @property
+    def in_use(self):
+        with self._lock:
+            return len([count for count in self._references if count > 0])
+
+    @property
+    def stats(self):
+        return {
+            'size': self.size,
+            'in_use': self.in_use,
+            'allocations': self.allocations,
+            'exhausted': self.exhausted,
+        }
+
+    def ensure_size(self, size):
+        with self._lock:
+            if size > self.size:
+                logger.info("Growing frame pool from {} to {} frames".format(self.size, size))
+                self.size = size
+
+    def acquire(self, shape, dtype='uint8'):
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        with self._lock:
+            if shape != self._shape or dtype != self._dtype:
+                self._reset(shape, dtype)
+            for offset in range(len(self._buffers)):
+                idx = (self._next + offset) % len(self._buffers)
+                if self._references[idx] == 0:
+                    return self._take(idx)
+            self.allocations += 1
+            if len(self._buffers) < self.size:
+                self._buffers.append(np.empty(shape, dtype=dtype))
+                self._references.append(0)
+                self._index[id(self._buffers[-1])] = len(self._buffers) - 1
+                return self._take(len(self._buffers) - 1)
+            self.exhausted += 1
+            metrics.increment('frame_pool.exhausted')
+            if self.exhausted == 1:
+                logger.warning("Frame pool of {} frames exhausted, allocating untracked frames".format(self.size))
+            else:
+                logger.debug("Frame pool exhausted, allocating untracked frame")
+            return np.empty(shape, dtype=dtype)
+
+    def retain(self, frame):
+        with self._lock:
+            idx = self._find(frame)
+            if idx is not None:
+                self._references[idx] += 1
+
+    def release(self, frame):
+        with self._lock:
+            idx = self._find(frame)
+            if idx is not None and self._references[idx] > 0:
+                self._references[idx] -= 1
+
+    def _take(self, idx):
+        self._references[idx] = 1
+        self._next = (idx + 1) % self.size
+        return self._buffers[idx]
+
+    def _find(self, frame):
+        idx = self._index.get(id(frame))
+        if idx is not None and self._buffers[idx] is frame:
+            return idx
+        return None
+
+    def _reset(self, shape, dtype):
+        self._shape = shape
+        self._dtype = dtype
+        self._buffers = []
+        self._references = []
+        self._index = {}
+        self._next = 0
@@ -0,0 +1,217 @@
+import os
+import time
+import threading
+import logging
+import numpy as np
+import cv2
+
+from infrastructure.frame_pool import FramePool
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+logger = logging.getLogger('peachy')
+
+
+class FrameSource(object):
+    '''Something the video processor can read frames from, frames are filled into a FramePool'''
+
+    def __init__(self, fps=None, loop=True, frame_pool_size=8):
+        self.fps = fps
+        self.loop = loop
+        self.frame_pool = FramePool(frame_pool_size)
+        self._lock = threading.Lock()
+        self._next_time = None
+
+    def start(self):
+        self._open()
+        self.shape = self._frame_shape()
+        self._next_time = None
+
+    def stop(self):
+        pass
+
+    def read(self):
+        if not hasattr(self, 'shape'):
+            raise Exception("Start the frame source before reading")
+        with self._lock:
+            self._wait()
+            frame = self.frame_pool.acquire(self.shape)
+            image = self._read_into(frame)
+            if image is None and self.loop:
+                self._rewind()
+                image = self._read_into(frame)
+            if image is not frame:
+                self.frame_pool.release(frame)
+            return image
+
+    def retain(self, frame):
+        self.frame_pool.retain(frame)
+
+    def release(self, frame):
+        self.frame_pool.release(frame)
+
+    def get_settings(self):
+        return []
+
+    def set_setting(self, setting, value):
+        raise Exception("Setting {} not available".format(setting))
+
+    def get_capture_mode(self):
+        if not hasattr(self, 'shape'):
+            raise Exception("Start the frame source before getting the capture mode")
+        return {'width': self.shape[1], 'height': self.shape[0], 'fps': self.fps, 'fourcc': None}
+
+    def set_capture_mode(self, width=None, height=None, fps=None, fourcc=None):
+        logger.warning("{} does not support capture modes, ignoring".format(self.__class__.__name__))
+        return self.get_capture_mode()
+
+    def probe_fps(self, frames=30):
+        if not hasattr(self, 'shape'):
+            raise Exception("Start the frame source before probing fps")
+        self.release(self.read())
+        start = monotonic()
+        for idx in range(frames):
+            self.release(self.read())
+        return frames / max(monotonic() - start, 1e-9)
+
+    def _wait(self):
+        if not self.fps:
+            return
+        now = monotonic()
+        if self._next_time is None or self._next_time < now:
+            self._next_time = now
+        elif self._next_time > now:
+            time.sleep(self._next_time - now)
+        self._next_time += 1.0 / self.fps
+
+    def _open(self):
+        pass
+
+    def _frame_shape(self):
+        raise NotImplementedError()
+
+    def _read_into(self, frame):
+        raise NotImplementedError()
+
+    def _rewind(self):
+        pass
+
+
+class VideoFileSource(FrameSource):
+    '''Frames from a recorded video file, played back at fps when given otherwise as fast as they decode'''
+
+    def __init__(self, path, fps=None, loop=True, frame_pool_size=8):
+        super(VideoFileSource, self).__init__(fps, loop, frame_pool_size)
+        self.path = path
+
+    def _open(self):
+        if not os.path.isfile(self.path):
+            raise Exception("Video file {} does not exist".format(self.path))
+        self._video_capture = cv2.VideoCapture(self.path)
+        if not self._video_capture.isOpened():
+            raise Exception("Could not open video file {}".format(self.path))
+
+    def _frame_shape(self):
+        (retVal, image) = self._video_capture.read()
+        if not retVal:
+            raise Exception("Video file {} has no frames".format(self.path))
+        self._rewind()
+        return image.shape
+
+    def _read_into(self, frame):
+        (retVal, image) = self._video_capture.read(frame)
+        return image if retVal else None
+
+    def _rewind(self):
+        self._video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def stop(self):
+        if hasattr(self, '_video_capture'):
+            self._video_capture.release()
+
+
+class ImageDirectorySource(FrameSource):
+    '''Frames from the images in a directory in file name order'''
+    extensions = ['.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff']
+
+    def __init__(self, path, fps=None, loop=True, frame_pool_size=8):
+        super(ImageDirectorySource, self).__init__(fps, loop, frame_pool_size)
+        self.path = path
+        self.files = []
+        self._index = 0
+
+    def _open(self):
+        if not os.path.isdir(self.path):
+            raise Exception("Image directory {} does not exist".format(self.path))
+        names = sorted([name for name in os.listdir(self.path) if os.path.splitext(name)[1].lower() in self.extensions])
+        if not names:
+            raise Exception("Image directory {} has no images".format(self.path))
+        self.files = [os.path.join(self.path, name) for name in names]
+        self._index = 0
+
+    def _frame_shape(self):
+        return self._load(self.files[0]).shape
+
+    def _load(self, filename):
+        image = cv2.imread(filename)
+        if image is None:
+            raise Exception("Could not read image {}".format(filename))
+        return image
+
+    def _read_into(self, frame):
+        if self._index >= len(self.files):
+            return None
+        image = self._load(self.files[self._index])
+        self._index += 1
+        if image.shape != frame.shape:
+            logger.warning("Image {} is {} not {}".format(self.files[self._index - 1], image.shape, frame.shape))
+            return image
+        np.copyto(frame, image)
+        return frame
+
+    def _rewind(self):
+        self._index = 0
+
+
+class SyntheticSource(FrameSource):
+    '''Generated frames with an encoder marker that changes every frames_per_tick frames and a red laser line'''
+
+    def __init__(self, shape=(480, 640, 3), fps=30.0, frames_per_tick=2, encoder_point=(0.2, 0.2), frame_pool_size=8):
+        super(SyntheticSource, self).__init__(fps, True, frame_pool_size)
+        self._shape = tuple(shape)
+        self.frames_per_tick = frames_per_tick
+        self.encoder_point = encoder_point
+        self.frames = 0
+        rows = np.arange(self._shape[0])
+        self._rows = rows
+        self._wave = np.sin(rows * (2 * np.pi / self._shape[0]))
+
+    def _frame_shape(self):
+        return self._shape
+
+    def _read_into(self, frame):
+        height, width = frame.shape[:2]
+        tick = self.frames // self.frames_per_tick
+        frame.fill(20)
+        columns = (width // 2 - width // 8 - (width // 16) * self._wave * np.cos(tick * 0.1)).astype('int')
+        for offset in (-1, 0, 1):
+            frame[self._rows, columns + offset] = (0, 0, 255)
+        x, y = int(width * self.encoder_point[0]), int(height * self.encoder_point[1])
+        frame[max(y - 4, 0):y + 5, max(x - 4, 0):x + 5] = 255 if tick % 2 else 0
+        self.frames += 1
+        return frame
+
+
+def open_frame_source(spec, fps=None):
+    '''Frame source for a command line spec: camera, synthetic, a video file or a directory of images'''
+    if spec is None or spec == 'camera':
+        from infrastructure.camera import Camera
+        return Camera()
+    if spec == 'synthetic':
+        return SyntheticSource(fps=fps if fps else 30.0)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, fps)
+    return VideoFileSource(spec, fps)
@@ -14,6 +14,18 @@ class HardwareConfiguration(object):
         self.focal_point_to_center_mm = focal_point_to_center_mm
         self.intersections_rad_mm = intersections_rad_mm
 
+    @classmethod
+    def from_config(cls, getdefault, section='peachyscanner.hardware'):
+        def value(name, default):
+            return float(getdefault(section, name, default))
+        degrees = [value('laser_intersection_degree_{}'.format(idx + 1), default) for (idx, default) in enumerate(['35.0', '40.0', '45.0', '50.0', '55.0'])]
+        distances = [value('laser_intersection_distance_{}'.format(idx + 1), default) for (idx, default) in enumerate(['249.9', '208.9', '175.0', '146.8', '122.5'])]
+        return cls(
+            value('camera_focal_length_mm', '10.0'),
+            (value('sensor_size_x_mm', '10.0'), value('sensor_size_y_mm', '10.0')),
+            value('focal_point_to_center', '100.0'),
+            [(np.deg2rad(degree), distance) for (degree, distance) in zip(degrees, distances)])
+
     @property
     def center_intersection_xyz(self):
         return np.array([0, 0, -self.focal_point_to_center_mm])
@@ -3,26 +3,82 @@ import logging
 
 import math
 
+from infrastructure.laser_line import LaserLine
+from infrastructure.metrics import metrics
+
 logger = logging.getLogger('peachy')
 
+
+class CompiledROI(object):
+    '''Absolute bounds of an ROI and contiguous copies of each laser's intersections inside it'''
+
+    def __init__(self, roi, camera_pixels_shape_yx, posisition_mask_yx):
+        self.roi_points = tuple(roi.get_points())
+        self.camera_pixels_shape_yx = tuple(camera_pixels_shape_yx[:2])
+        self.rows, self.columns = roi.get_slices(camera_pixels_shape_yx)
+        self.tables = {}
+        self._crop_tables = {}
+        for (theta, table) in posisition_mask_yx.items():
+            self.tables[theta] = np.ascontiguousarray(table[self.rows, self.columns])
+            self._crop_tables[(theta, self.tables[theta].shape[:2])] = self.tables[theta]
+
+    def matches(self, roi):
+        return tuple(roi.get_points()) == self.roi_points
+
+    def get(self, image_yx):
+        if image_yx.shape[:2] == self.camera_pixels_shape_yx:
+            return image_yx[self.rows, self.columns]
+        self._check_crop(image_yx.shape)
+        return image_yx
+
+    def get_line(self, laser_line):
+        if laser_line.shape == self.camera_pixels_shape_yx:
+            rows, columns = laser_line.rows, laser_line.columns
+            inside = (rows >= self.rows.start) & (rows < self.rows.stop) & (columns >= self.columns.start) & (columns <= self.columns.stop - 1)
+            shape_yx = (self.rows.stop - self.rows.start, self.columns.stop - self.columns.start)
+            return (rows[inside] - self.rows.start, columns[inside] - self.columns.start, shape_yx)
+        self._check_crop(laser_line.shape)
+        return (laser_line.rows, laser_line.columns, laser_line.shape)
+
+    def _check_crop(self, shape):
+        if shape[0] > self.rows.stop - self.rows.start or shape[1] > self.columns.stop - self.columns.start:
+            raise Exception("Image of shape {} is neither a camera frame nor a crop of the region of interest".format(shape))
+
+    def table(self, laser_theta, shape_yx):
+        key = (laser_theta, tuple(shape_yx[:2]))
+        if key not in self._crop_tables:
+            self._crop_tables[key] = np.ascontiguousarray(self.tables[laser_theta][:shape_yx[0], :shape_yx[1]])
+        return self._crop_tables[key]
+
+
 class Image2Points(object):
     def __init__(
         self,
         hardware,
         camera_pixels_shape_yx,
+        cache=None,
     ):
+        self._camera_pixels_shape_yx = tuple(camera_pixels_shape_yx[:2])
         self._mm_per_pixel_yx = self._calculate_mm_per_pixel_yx(camera_pixels_shape_yx, hardware.sensor_size_xy_mm)
+        self._compiled_roi = None
         self._posisition_mask_yx = {}
+        self._rotation_tables = {}
         self.laser_plane_normals = {}
         for (theta, pos) in hardware.laser_intersections_rad_xyz:
             self.laser_plane_normals[theta] = self._get_laser_plane_normal_xyz(pos, theta)
-            self._posisition_mask_yx[theta] = self._get_laser_intersections_mask_yx(
-                camera_pixels_shape_yx,
-                hardware.focal_length_mm,
-                self._mm_per_pixel_yx,
-                hardware.center_intersection_xyz,
-                pos,
-                self.laser_plane_normals[theta])
+            if cache is not None:
+                key = cache.key(hardware, theta, camera_pixels_shape_yx)
+                self._posisition_mask_yx[theta] = cache.get(key)
+            if self._posisition_mask_yx.get(theta) is None:
+                self._posisition_mask_yx[theta] = self._get_laser_intersections_mask_yx(
+                    camera_pixels_shape_yx,
+                    hardware.focal_length_mm,
+                    self._mm_per_pixel_yx,
+                    hardware.center_intersection_xyz,
+                    pos,
+                    self.laser_plane_normals[theta])
+                if cache is not None:
+                    self._posisition_mask_yx[theta] = cache.put(key, self._posisition_mask_yx[theta])
 
     def get_data(self, 
         camera_pixels_shape_yx,
@@ -58,20 +114,19 @@ class Image2Points(object):
 
         logger.info(self.get_data( camera_pixels_shape_yx, camera_focal_length_mm, mm_per_pixel_yx, center_intersection_xyz, laser_intersection_point, laser_plane_normal, half_camera_yx, half_pixel_yx))
 
-        final = np.zeros((camera_pixels_shape_yx[0], camera_pixels_shape_yx[1], 3), dtype='float16')
+        x_pos = ((np.arange(camera_pixels_shape_yx[1]) - half_camera_yx[1]) * mm_per_pixel_yx[1]) + half_pixel_yx[1]
+        y_pos = (((camera_pixels_shape_yx[0] - np.arange(camera_pixels_shape_yx[0])) - half_camera_yx[0]) * mm_per_pixel_yx[0]) - half_pixel_yx[0]
+        z_pos = -camera_focal_length_mm
+
+        final = np.empty((camera_pixels_shape_yx[0], camera_pixels_shape_yx[1], 3), dtype='float16')
         laser_intersection_point = np.array(laser_intersection_point)
         with np.errstate(divide='ignore', invalid='ignore'):
             p_dot = np.dot(laser_plane_normal, laser_intersection_point)
-            for x_camera in range(camera_pixels_shape_yx[1]):
-                for y_camera in range(camera_pixels_shape_yx[0]):
-                    x_pos = ((x_camera - half_camera_yx[1]) * mm_per_pixel_yx[1]) + half_pixel_yx[1]
-                    y_pos = (((camera_pixels_shape_yx[0] - y_camera) - half_camera_yx[0]) * mm_per_pixel_yx[0]) - half_pixel_yx[0]
-                    z_pos = -camera_focal_length_mm
-
-                    L2 = np.array([x_pos, y_pos, z_pos])
-                    final[y_camera, x_camera] = (p_dot / np.dot(laser_plane_normal, L2)) * L2
-                    # x, y, z = final[y_camera, x_camera]
-                    # logger.debug("({}, {}) => ({: .3f}, {: .3f}, {: .3f}) => {: .3f},{: .3f},{: .3f}".format(x_camera, y_camera, x_pos, y_pos, z_pos, x, y, z))
+            ray_dot = (laser_plane_normal[0] * x_pos[np.newaxis, :]) + (laser_plane_normal[1] * y_pos[:, np.newaxis]) + (laser_plane_normal[2] * z_pos)
+            distance = p_dot / ray_dot
+            final[:, :, 0] = distance * x_pos[np.newaxis, :]
+            final[:, :, 1] = distance * y_pos[:, np.newaxis]
+            final[:, :, 2] = distance * z_pos
         return final - center_intersection_xyz
 
     def _calculate_mm_per_pixel_yx(self, camera_pixels_shape_yx, camera_sensor_size_mm_xy):
@@ -91,8 +146,8 @@ class Image2Points(object):
         return unit_vec
 
     def _rotation_matrix(self, theta):
-        rotation_axis = np.asarray([0, 1, 0], dtype='float16')
-        theta = np.asarray(theta, dtype='float16')
+        rotation_axis = np.asarray([0, 1, 0], dtype='float64')
+        theta = np.asarray(theta, dtype='float64')
         axis = rotation_axis/np.sqrt(np.dot(rotation_axis, rotation_axis))
         a = np.cos(theta / 2)
         b, c, d = -axis*np.sin(theta/2)
@@ -106,9 +161,78 @@ class Image2Points(object):
         rotation_matrix = self._rotation_matrix(rotation_rad)
         return np.dot(rotation_matrix, points_xyz.T).T
 
+    def rotation_table(self, sections):
+        if sections not in self._rotation_tables:
+            rotations_rad = (np.arange(sections) / float(sections)) * 2.0 * np.pi
+            self._rotation_tables[sections] = np.array([self._rotation_matrix(rad) for rad in rotations_rad])
+        return self._rotation_tables[sections]
+
+    def rotate_sections(self, points_xyz, points_section, sections):
+        with metrics.timer('image_2_points.rotate_sections'):
+            return self._rotate_sections(points_xyz, points_section, sections)
+
+    def _rotate_sections(self, points_xyz, points_section, sections):
+        rotation_table = self.rotation_table(sections)
+        points_section = np.mod(points_section, sections)
+        rotated = np.empty(points_xyz.shape, dtype=np.result_type(points_xyz, rotation_table))
+        if len(points_section) == 0:
+            return rotated
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(points_section)) + 1))
+        ends = np.append(starts[1:], len(points_section))
+        fractional = points_section.dtype.kind == 'f'
+        for (start, end) in zip(starts, ends):
+            if fractional:
+                rotation_matrix = self._rotation_matrix((points_section[start] / float(sections)) * 2.0 * np.pi)
+            else:
+                rotation_matrix = rotation_table[points_section[start]]
+            np.dot(points_xyz[start:end], rotation_matrix.T, out=rotated[start:end])
+        return rotated
+
+    def compile_roi(self, roi):
+        self._compiled_roi = CompiledROI(roi, self._camera_pixels_shape_yx, self._posisition_mask_yx)
+        return self._compiled_roi
+
+    def _get_compiled_roi(self, roi):
+        compiled_roi = self._compiled_roi
+        if compiled_roi is None or not compiled_roi.matches(roi):
+            compiled_roi = self.compile_roi(roi)
+        return compiled_roi
+
+    def get_masked_points(self, image_yx, roi, laser_theta):
+        with metrics.timer('image_2_points.get_masked_points'):
+            return self._get_masked_points(image_yx, roi, laser_theta)
+
+    def _get_masked_points(self, image_yx, roi, laser_theta):
+        if isinstance(image_yx, LaserLine):
+            return self.get_laser_line_points(image_yx, roi, laser_theta)
+        compiled_roi = self._get_compiled_roi(roi)
+        image_yx = compiled_roi.get(image_yx)
+        index = np.flatnonzero(image_yx)
+        return compiled_roi.table(laser_theta, image_yx.shape).reshape(-1, 3).take(index, axis=0)
+
+    def get_masked_line_points(self, image_yx, roi, laser_theta):
+        with metrics.timer('image_2_points.get_masked_line_points'):
+            if not isinstance(image_yx, LaserLine):
+                image_yx = LaserLine.from_mask(self._get_compiled_roi(roi).get(image_yx), subpixel=True)
+            return self.get_laser_line_points(image_yx, roi, laser_theta)
+
+    def get_laser_line_points(self, laser_line, roi, laser_theta):
+        compiled_roi = self._get_compiled_roi(roi)
+        rows, columns, shape_yx = compiled_roi.get_line(laser_line)
+        roi_pos = compiled_roi.table(laser_theta, shape_yx)
+        if not laser_line.subpixel:
+            return roi_pos[rows, columns]
+        left = np.floor(columns).astype('int')
+        right = np.minimum(left + 1, shape_yx[1] - 1)
+        fraction = (columns - left)[:, np.newaxis]
+        return (roi_pos[rows, left] * (1.0 - fraction)) + (roi_pos[rows, right] * fraction)
+
     def get_points(self, image_yx, rotation_rad, roi, laser_theta):
         logger.debug("getting points for {: 8.3f} rad {: 8.3f} deg".format(laser_theta, np.rad2deg(laser_theta)))
-        roi_pos = roi.get(self._posisition_mask_yx[laser_theta])
-        roi_image_yx = roi.get(image_yx).astype('bool')
-        masked_result = roi_pos[roi_image_yx]
-        return self._rotate_points(masked_result, rotation_rad)
\ No newline at end of file
+        with metrics.timer('image_2_points.get_points'):
+            return self._rotate_points(self.get_masked_points(image_yx, roi, laser_theta), rotation_rad)
+
+    def get_line_points(self, image_yx, rotation_rad, roi, laser_theta):
+        logger.debug("getting line points for {: 8.3f} rad {: 8.3f} deg".format(laser_theta, np.rad2deg(laser_theta)))
+        with metrics.timer('image_2_points.get_line_points'):
+            return self._rotate_points(self.get_masked_line_points(image_yx, roi, laser_theta), rotation_rad)
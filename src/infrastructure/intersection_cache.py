@@ -0,0 +1,97 @@
+import os
+import time
+import hashlib
+import logging
+import numpy as np
+
+logger = logging.getLogger('peachy')
+
+
+class IntersectionCache(object):
+    '''Keeps Image2Points intersection tables on disk as .npy files which are loaded memory mapped'''
+    version = 1
+
+    def __init__(self, path, max_bytes=1024 * 1024 * 1024, max_age_seconds=30 * 24 * 60 * 60):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+    def key(self, hardware, laser_theta, camera_pixels_shape_yx):
+        fields = [
+            self.version,
+            float(hardware.focal_length_mm),
+            [float(size) for size in hardware.sensor_size_xy_mm],
+            float(hardware.focal_point_to_center_mm),
+            [[float(rad), float(pos)] for (rad, pos) in hardware.intersections_rad_mm],
+            float(laser_theta),
+            [int(size) for size in camera_pixels_shape_yx[:2]],
+        ]
+        return hashlib.sha1(repr(fields).encode('ascii')).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, '{}.npy'.format(key))
+
+    def get(self, key):
+        filename = self._file(key)
+        if not os.path.isfile(filename):
+            return None
+        try:
+            table = np.load(filename, mmap_mode='r')
+            os.utime(filename, None)
+            logger.info("Loaded intersections from cache {}".format(filename))
+            return table
+        except (IOError, OSError, ValueError) as ex:
+            logger.warning("Discarding unreadable cache entry {}: {}".format(filename, ex))
+            self._remove(filename)
+            return None
+
+    def put(self, key, table):
+        filename = self._file(key)
+        temp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+        try:
+            if not os.path.exists(self.path):
+                os.makedirs(self.path)
+            with open(temp_filename, 'wb') as afile:
+                np.save(afile, table)
+            self._remove(filename)
+            os.rename(temp_filename, filename)
+            self.evict(keep=filename)
+            return np.load(filename, mmap_mode='r')
+        except (IOError, OSError) as ex:
+            logger.warning("Could not cache intersections in {}: {}".format(filename, ex))
+            self._remove(temp_filename)
+            return table
+
+    def evict(self, keep=None):
+        if not os.path.exists(self.path):
+            return
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.path):
+            filename = os.path.join(self.path, name)
+            if not name.endswith('.npy') or filename == keep:
+                continue
+            stat = os.stat(filename)
+            if now - stat.st_mtime > self.max_age_seconds:
+                logger.info("Evicting expired cache entry {}".format(filename))
+                self._remove(filename)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, filename))
+        total = sum([size for (mtime, size, filename) in entries])
+        if keep is not None and os.path.isfile(keep):
+            total += os.path.getsize(keep)
+        for (mtime, size, filename) in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            logger.info("Evicting cache entry {} to free {} bytes".format(filename, size))
+            if self._remove(filename):
+                total -= size
+
+    def _remove(self, filename):
+        try:
+            if os.path.exists(filename):
+                os.remove(filename)
+            return True
+        except OSError as ex:
+            logger.warning("Could not remove cache entry {}: {}".format(filename, ex))
+            return False
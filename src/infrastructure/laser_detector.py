@@ -1,3 +1,5 @@
+import threading
+import math
 import cv2
 import numpy as np
 
@@ -71,3 +73,52 @@ class LaserDetector2(object):
         mask = a < b
         sub1[mask] = 0
         return sub1.astype('uint8')
+
+
+class FusedLaserDetector2(LaserDetector2):
+    '''Produces the same mask as LaserDetector2 using in place cv2 operations on per thread scratch buffers'''
+    erode_kernel = np.ones((2, 2), dtype=np.uint8)
+    dilate_kernel = np.ones((3, 10), dtype=np.uint8)
+
+    def __init__(self, threshold=225, color='red'):
+        super(FusedLaserDetector2, self).__init__(threshold, color)
+        self._scratch = threading.local()
+
+    def _buffers(self, shape_yx):
+        buffers = getattr(self._scratch, 'buffers', None)
+        if buffers is None or buffers['shape'] != shape_yx:
+            buffers = {'shape': shape_yx}
+            for name in ['r', 'g', 'erosion', 'dilation']:
+                buffers[name] = np.empty(shape_yx, dtype='uint8')
+            self._scratch.buffers = buffers
+        return buffers
+
+    def _lut(self, maximum):
+        values = np.arange(256, dtype='float64')
+        lut = (values * (255.0 / maximum)).astype('uint8')
+        lut[lut <= self.threshold] = 0
+        return lut
+
+    def detect(self, frame):
+        shape_yx = frame.shape[:2]
+        buffers = self._buffers(shape_yx)
+        r, g = buffers['r'], buffers['g']
+        count = float(shape_yx[0] * shape_yx[1])
+        sums = cv2.sumElems(frame)
+
+        cv2.extractChannel(frame, 2, r)
+        cv2.extractChannel(frame, 1, g)
+        cv2.subtract(r, math.ceil(sums[2] / count), r)
+        cv2.subtract(g, math.ceil(sums[1] / count), g)
+        cv2.subtract(r, g, r)
+
+        maximum = cv2.minMaxLoc(r)[1]
+        if maximum == 0:
+            return np.zeros(shape_yx, dtype='uint8')
+        rel = g
+        cv2.LUT(r, self._lut(maximum), rel)
+
+        erosion = cv2.erode(rel, self.erode_kernel, buffers['erosion'], iterations=1)
+        dilation = cv2.dilate(erosion, self.dilate_kernel, buffers['dilation'], iterations=1)
+        dial = cv2.compare(rel, dilation, cv2.CMP_EQ, buffers['erosion'])
+        return cv2.bitwise_and(dial, rel)
@@ -0,0 +1,46 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger('peachy')
+
+
+class LaserLine(object):
+    '''Compact laser detection holding the column of the laser on each row which saw it'''
+
+    def __init__(self, rows, columns, intensities, shape):
+        self.rows = rows
+        self.columns = columns
+        self.intensities = intensities
+        self.shape = tuple(shape[:2])
+
+    @classmethod
+    def from_mask(cls, mask, subpixel=False):
+        if subpixel:
+            weights = mask.astype('float32')
+            row_weights = weights.sum(axis=1)
+            rows = np.flatnonzero(row_weights)
+            columns = np.dot(weights[rows], np.arange(weights.shape[1], dtype='float32')) / row_weights[rows]
+            intensities = mask[rows].max(axis=1)
+        else:
+            peaks = mask.argmax(axis=1)
+            intensities = mask[np.arange(mask.shape[0]), peaks]
+            rows = np.flatnonzero(intensities)
+            columns = peaks[rows]
+            intensities = intensities[rows]
+        return cls(rows, columns, intensities, mask.shape)
+
+    @property
+    def subpixel(self):
+        return self.columns.dtype.kind == 'f'
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.columns.nbytes + self.intensities.nbytes
+
+    def __len__(self):
+        return len(self.rows)
+
+    def to_mask(self):
+        mask = np.zeros(self.shape, dtype='uint8')
+        mask[self.rows, np.rint(self.columns).astype('int')] = self.intensities
+        return mask
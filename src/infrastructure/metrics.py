@@ -0,0 +1,152 @@
+import bisect
+import threading
+import logging
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+logger = logging.getLogger('peachy')
+
+LATENCY_BUCKETS_SECONDS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+
+
+class Histogram(object):
+    '''Counts of observations in fixed buckets, the last bucket holds everything above the largest bound'''
+
+    def __init__(self, bounds=LATENCY_BUCKETS_SECONDS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        if self.count == 0:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for (idx, count) in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return self.bounds[idx] if idx < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+            'buckets': list(zip(self.bounds + [float('inf')], self.counts)),
+        }
+
+
+class _Timer(object):
+    __slots__ = ['_registry', '_name', '_start']
+
+    def __init__(self, registry, name):
+        self._registry = registry
+        self._name = name
+
+    def __enter__(self):
+        self._start = monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._registry.observe(self._name, monotonic() - self._start)
+        return False
+
+
+class _NullTimer(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class MetricsRegistry(object):
+    '''Named counters and latency histograms shared by the pipeline stages, cheap enough to leave on'''
+
+    def __init__(self, enabled=True, bounds=LATENCY_BUCKETS_SECONDS):
+        self.enabled = enabled
+        self.bounds = bounds
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._null_timer = _NullTimer()
+        self._logging = None
+
+    def increment(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.bounds)
+            histogram.observe(seconds)
+
+    def timer(self, name):
+        if not self.enabled:
+            return self._null_timer
+        return _Timer(self, name)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'latency': dict([(name, histogram.snapshot()) for (name, histogram) in self._histograms.items()]),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def summary(self):
+        snapshot = self.snapshot()
+        lines = ["{}: {}".format(name, value) for (name, value) in sorted(snapshot['counters'].items())]
+        for (name, latency) in sorted(snapshot['latency'].items()):
+            lines.append("{}: {} calls mean {:.3f} ms p90 {:.3f} ms max {:.3f} ms".format(
+                name, latency['count'], latency['mean'] * 1000.0, latency['p90'] * 1000.0, latency['max'] * 1000.0))
+        return '\n'.join(lines)
+
+    def start_logging(self, interval_seconds):
+        self.stop_logging()
+        stop = threading.Event()
+
+        def dump():
+            while not stop.wait(interval_seconds):
+                logger.info("Metrics\n{}".format(self.summary()))
+        thread = threading.Thread(target=dump)
+        thread.daemon = True
+        thread.start()
+        self._logging = (stop, thread)
+
+    def stop_logging(self):
+        if self._logging is not None:
+            stop, thread = self._logging
+            stop.set()
+            thread.join()
+            self._logging = None
+
+
+metrics = MetricsRegistry()
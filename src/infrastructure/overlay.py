@@ -0,0 +1,38 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger('peachy')
+
+
+class OverlayPatch(object):
+    '''Small overlay image and the position of its top left corner in the frame it is drawn on'''
+
+    def __init__(self, image, x, y, drawn=None):
+        self.image = image
+        self.x = int(x)
+        self.y = int(y)
+        if drawn is None:
+            drawn = image.any(axis=2)
+        self.drawn = drawn
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    def region(self, frame_shape):
+        x_start, y_start = max(self.x, 0), max(self.y, 0)
+        x_end = min(self.x + self.image.shape[1], frame_shape[1])
+        y_end = min(self.y + self.image.shape[0], frame_shape[0])
+        if x_end <= x_start or y_end <= y_start:
+            return None
+        frame_region = (slice(y_start, y_end), slice(x_start, x_end))
+        patch_region = (slice(y_start - self.y, y_end - self.y), slice(x_start - self.x, x_end - self.x))
+        return (frame_region, patch_region)
+
+    def composite(self, frame):
+        regions = self.region(frame.shape)
+        if regions is None:
+            return frame
+        frame_region, patch_region = regions
+        np.copyto(frame[frame_region], self.image[patch_region], where=self.drawn[patch_region][:, :, np.newaxis])
+        return frame
@@ -0,0 +1,39 @@
+import numpy as np
+
+
+class PointBuffer(object):
+    '''Growable array of points which doubles its capacity as needed, points is a view of the filled rows'''
+
+    def __init__(self, points=None, capacity=4096):
+        self._initial_capacity = capacity
+        self._data = None
+        self._size = 0
+        if points is not None:
+            self.append(points)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def points(self):
+        if self._data is None:
+            return None
+        return self._data[:self._size]
+
+    def append(self, points):
+        points = np.asarray(points)
+        if self._data is None:
+            width = points.shape[-1] if points.ndim else 1
+            self._data = np.empty((max(self._initial_capacity, 1), width), dtype=points.dtype)
+        points = points.reshape(-1, self._data.shape[1])
+        required = self._size + points.shape[0]
+        if required > self._data.shape[0]:
+            self._grow(required)
+        self._data[self._size:required] = points
+        self._size = required
+
+    def _grow(self, required):
+        capacity = max(self._data.shape[0] * 2, required)
+        data = np.empty((capacity, self._data.shape[1]), dtype=self._data.dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
@@ -25,3 +25,67 @@ class PointThinner(object):
         return points[points_index]
 
 
+class VoxelThinner(object):
+    '''Reduces points to the centroid of the points in each occupied voxel_size_mm cube'''
+
+    def __init__(self, voxel_size_mm=0.5, max_dense_voxels=1 << 22):
+        if voxel_size_mm <= 0:
+            raise Exception('Voxel size must be greater then 0 was {}'.format(voxel_size_mm))
+        self.voxel_size_mm = float(voxel_size_mm)
+        self.max_dense_voxels = max_dense_voxels
+        self.reset()
+
+    def reset(self):
+        self._voxels = np.empty((0, 3), dtype='int64')
+        self._sums = np.empty((0, 3), dtype='float64')
+        self._counts = np.empty(0, dtype='int64')
+
+    def thin(self, points, return_counts=False):
+        voxels, sums, counts = self._group(*self._prepare(points))
+        return self._result(sums, counts, return_counts)
+
+    def add(self, points):
+        voxels, sums, counts = self._prepare(points)
+        self._voxels, self._sums, self._counts = self._group(
+            np.vstack((self._voxels, voxels)),
+            np.vstack((self._sums, sums)),
+            np.concatenate((self._counts, counts)))
+
+    def thinned(self, return_counts=False):
+        return self._result(self._sums, self._counts, return_counts)
+
+    def _prepare(self, points):
+        points = np.asarray(points, dtype='float64').reshape(-1, 3)
+        points = points[np.isfinite(points).all(axis=1)]
+        voxels = np.floor(points / self.voxel_size_mm).astype('int64')
+        return (voxels, points, np.ones(len(points), dtype='int64'))
+
+    def _result(self, sums, counts, return_counts):
+        centroids = sums / counts[:, np.newaxis]
+        if return_counts:
+            return (centroids, counts)
+        return centroids
+
+    def _group(self, voxels, sums, counts):
+        if len(voxels) == 0:
+            return (voxels, sums, counts)
+        low = voxels.min(axis=0)
+        dims = voxels.max(axis=0) - low + 1
+        voxel_index = ((voxels[:, 0] - low[0]) * dims[1] + (voxels[:, 1] - low[1])) * dims[2] + (voxels[:, 2] - low[2])
+        total = int(dims[0]) * int(dims[1]) * int(dims[2])
+        if total <= self.max_dense_voxels:
+            occupied = np.flatnonzero(np.bincount(voxel_index, minlength=total))
+            remap = np.empty(total, dtype='int64')
+            remap[occupied] = np.arange(len(occupied))
+            group = remap[voxel_index]
+        else:
+            occupied, group = np.unique(voxel_index, return_inverse=True)
+        grouped_counts = np.bincount(group, weights=counts, minlength=len(occupied))
+        grouped_sums = np.empty((len(occupied), 3), dtype='float64')
+        for axis in range(3):
+            grouped_sums[:, axis] = np.bincount(group, weights=sums[:, axis], minlength=len(occupied))
+        grouped_voxels = np.empty((len(occupied), 3), dtype='int64')
+        grouped_voxels[:, 2] = (occupied % dims[2]) + low[2]
+        grouped_voxels[:, 1] = ((occupied // dims[2]) % dims[1]) + low[1]
+        grouped_voxels[:, 0] = (occupied // (dims[1] * dims[2])) + low[0]
+        return (grouped_voxels, grouped_sums, grouped_counts.astype('int64'))
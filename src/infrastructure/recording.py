@@ -0,0 +1,257 @@
+import json
+import struct
+import zlib
+import threading
+import logging
+import numpy as np
+
+from infrastructure.encoder import Encoder
+from infrastructure.frame_source import FrameSource
+from infrastructure.tracing import tracer
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+logger = logging.getLogger('peachy')
+
+MAGIC = b'PEACHYREC\x01'
+VERSION = 1
+_length = struct.Struct('<I')
+_chunk_lengths = struct.Struct('<II')
+
+
+def _describe(obj, names):
+    description = {'class': obj.__class__.__name__}
+    for name in names:
+        if hasattr(obj, name):
+            value = getattr(obj, name)
+            description[name] = value.tolist() if hasattr(value, 'tolist') else value
+    return description
+
+
+def describe_configuration(roi, encoder, laser_detector):
+    return {
+        'roi': roi.get_points(),
+        'encoder': _describe(encoder, ['relitive_point_xy', 'threshold', 'null_zone', 'history_length', 'sections']),
+        'laser_detector': _describe(laser_detector, ['threshold', 'color', 'low_bgr', 'high_bgr']),
+    }
+
+
+class FrameRecorder(object):
+    '''Streams frames or ROI crops with their encoder readings into a file of zlib compressed chunks'''
+
+    def __init__(self, path, crop=False, chunk_frames=16, compression=1, max_pending_chunks=4):
+        self.path = path
+        self.crop = crop
+        self.chunk_frames = chunk_frames
+        self.compression = compression
+        self.frames = 0
+        self.chunks = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._header_written = False
+        self._chunk = None
+        self._pending = queue.Queue(max_pending_chunks)
+        self._writer = threading.Thread(target=self._write_chunks)
+        self._writer.daemon = True
+        self._writer.start()
+
+    def record(self, seq, frame, timestamp, encoder_value, tick, section, configuration, roi=None):
+        with self._lock:
+            if self.closed:
+                logger.debug("Recorder for {} is closed, frame {} not recorded".format(self.path, seq))
+                return
+            self._record(seq, frame, timestamp, encoder_value, tick, section, configuration, roi)
+
+    def _record(self, seq, frame, timestamp, encoder_value, tick, section, configuration, roi):
+        if self._chunk is not None and self._chunk['config'] != configuration:
+            self._flush()
+        if self._chunk is None:
+            self._chunk = {'config': configuration, 'frames': [], 'data': [], 'frame_shape': frame.shape}
+        offset = [0, 0]
+        if self.crop and roi is not None:
+            rows, columns = roi.get_slices(frame.shape)
+            offset = [rows.start, columns.start]
+            frame = frame[rows, columns]
+        self._chunk['frames'].append({
+            'seq': seq,
+            'timestamp': timestamp,
+            'encoder_value': encoder_value,
+            'tick': bool(tick),
+            'section': section,
+            'shape': list(frame.shape),
+            'offset': offset,
+        })
+        self._chunk['data'].append(np.ascontiguousarray(frame).tobytes())
+        self.frames += 1
+        if len(self._chunk['frames']) >= self.chunk_frames:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._flush()
+        self._pending.put(None)
+        self._writer.join()
+        self._file.close()
+        logger.info("Recorded {} frames in {} chunks to {}".format(self.frames, self.chunks, self.path))
+
+    def _flush(self):
+        if self._chunk is not None:
+            self._pending.put(self._chunk)
+            self.chunks += 1
+            self._chunk = None
+
+    def _write_chunks(self):
+        while True:
+            chunk = self._pending.get()
+            if chunk is None:
+                break
+            if not self._header_written:
+                self._write_block({'version': VERSION, 'frame_shape': list(chunk['frame_shape']), 'dtype': 'uint8', 'crop': self.crop})
+                self._header_written = True
+            with tracer.span('recording.write_chunk', 'io', frames=len(chunk['frames'])):
+                metadata = json.dumps({'config': chunk['config'], 'frames': chunk['frames']}).encode('utf-8')
+                data = zlib.compress(b''.join(chunk['data']), self.compression)
+                self._file.write(_chunk_lengths.pack(len(metadata), len(data)))
+                self._file.write(metadata)
+                self._file.write(data)
+
+    def _write_block(self, content):
+        block = json.dumps(content).encode('utf-8')
+        self._file.write(_length.pack(len(block)))
+        self._file.write(block)
+
+
+class RecordingReader(object):
+    '''Reads the header of a recording and iterates over its frames and their metadata'''
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as afile:
+            self.header = self._read_header(afile)
+
+    def _read_header(self, afile):
+        if afile.read(len(MAGIC)) != MAGIC:
+            raise Exception("{} is not a recording".format(self.path))
+        length = afile.read(_length.size)
+        if len(length) < _length.size:
+            return None
+        header = json.loads(afile.read(_length.unpack(length)[0]).decode('utf-8'))
+        if header['version'] != VERSION:
+            raise Exception("Recording version {} not supported".format(header['version']))
+        return header
+
+    def __iter__(self):
+        with open(self.path, 'rb') as afile:
+            if self._read_header(afile) is None:
+                return
+            while True:
+                lengths = afile.read(_chunk_lengths.size)
+                if len(lengths) < _chunk_lengths.size:
+                    return
+                metadata_length, data_length = _chunk_lengths.unpack(lengths)
+                metadata = json.loads(afile.read(metadata_length).decode('utf-8'))
+                data = zlib.decompress(afile.read(data_length))
+                start = 0
+                for frame_metadata in metadata['frames']:
+                    size = int(np.prod(frame_metadata['shape']))
+                    frame = np.frombuffer(data, dtype='uint8', count=size, offset=start).reshape(frame_metadata['shape'])
+                    start += size
+                    frame_metadata['config'] = metadata['config']
+                    yield (frame_metadata, frame)
+
+
+class RecordingSource(FrameSource):
+    '''Frames from a recording, full frames are rebuilt around recorded ROI crops'''
+
+    def __init__(self, path, fps=None, loop=False, frame_pool_size=8):
+        super(RecordingSource, self).__init__(fps, loop, frame_pool_size)
+        self.path = path
+        self.configuration = None
+        self.frame_metadata = None
+        self.frame_timestamp = None
+
+    def _open(self):
+        self.reader = RecordingReader(self.path)
+        if self.reader.header is None:
+            raise Exception("Recording {} has no frames".format(self.path))
+        for (metadata, frame) in self.reader:
+            self.configuration = metadata['config']
+            break
+        self._frames = iter(self.reader)
+
+    def _frame_shape(self):
+        return tuple(self.reader.header['frame_shape'])
+
+    def _read_into(self, frame):
+        try:
+            metadata, data = next(self._frames)
+        except StopIteration:
+            return None
+        if data.shape == frame.shape:
+            np.copyto(frame, data)
+        else:
+            y, x = metadata['offset']
+            frame.fill(0)
+            frame[y:y + data.shape[0], x:x + data.shape[1]] = data
+        self.frame_metadata = metadata
+        self.frame_timestamp = metadata['timestamp']
+        return frame
+
+    def _rewind(self):
+        self._frames = iter(self.reader)
+
+
+class RecordedEncoder(Encoder):
+    '''Encoder replaying the ticks and sections of a RecordingSource instead of sampling the frame'''
+
+    def __init__(self, source, **kwargs):
+        super(RecordedEncoder, self).__init__(**kwargs)
+        self.source = source
+
+    @classmethod
+    def from_source(cls, source):
+        config = source.configuration['encoder'] if source.configuration else {}
+        return cls(
+            source,
+            point=tuple(config.get('relitive_point_xy', (0, 0))),
+            threshold=config.get('threshold', 382),
+            null_zone=config.get('null_zone', 382),
+            history_length=config.get('history_length', 20),
+            sections=config.get('sections', 1),
+            )
+
+    def should_capture_frame_for_section(self, image, timestamp=None):
+        metadata = self.source.frame_metadata
+        (tick, section) = super(RecordedEncoder, self).should_capture_frame_for_section(image, metadata['timestamp'])
+        self.position = metadata['section']
+        return (tick, self.position)
+
+    def process(self, image):
+        metadata = self.source.frame_metadata
+        self.value = metadata['encoder_value']
+        self._append_history(self.value)
+        if metadata['tick']:
+            self._is_high = not self._is_high
+            self._color_bgr = self.ENCODER_COLOR_HIGH_BGR if self._is_high else self.ENCODER_COLOR_LOW_BGR
+        return metadata['tick']
+
+
+def replay(source, video_processor):
+    '''Feeds every frame of a started RecordingSource through the video processor as fast as possible'''
+    frames = 0
+    while True:
+        frame = source.read()
+        if frame is None:
+            break
+        video_processor.process_frame(frame, source.frame_timestamp)
+        source.release(frame)
+        frames += 1
+    return frames
@@ -55,15 +55,19 @@ class ROI(object):
         return (x_abs, y_abs, w_abs, h_abs)
 
     def get(self, frame):
-        x_abs, y_abs, w_abs, h_abs = self._get_absolute(frame.shape)
-        return frame[y_abs:y_abs + h_abs, x_abs:x_abs + w_abs]
+        rows, columns = self.get_slices(frame.shape)
+        return frame[rows, columns]
+
+    def get_slices(self, shape):
+        x_abs, y_abs, w_abs, h_abs = self._get_absolute(shape)
+        return (slice(y_abs, min(y_abs + h_abs, shape[0])), slice(x_abs, min(x_abs + w_abs, shape[1])))
 
     def copy(self):
         return ROI(self.x_rel, self.y_rel, self.w_rel, self.h_rel)
 
     def get_left_of_center(self, frame):
         x_abs, y_abs, w_abs, h_abs = self._get_absolute(frame.shape)
-        center = frame.shape[1] / 2
+        center = frame.shape[1] // 2
         return frame[y_abs:y_abs + h_abs, x_abs:center]
 
     def get_points(self):
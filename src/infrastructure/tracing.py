@@ -0,0 +1,126 @@
+import os
+import json
+import threading
+import functools
+import logging
+from collections import deque
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+logger = logging.getLogger('peachy')
+
+
+class _Span(object):
+    __slots__ = ['_tracer', '_name', '_category', '_args', '_start']
+
+    def __init__(self, tracer, name, category, args):
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._args = args
+
+    def __enter__(self):
+        self._start = monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._tracer.record(self._name, self._category, self._start, monotonic(), self._args)
+        return False
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class Tracer(object):
+    '''Keeps the most recent timed spans in a ring buffer and exports them as Chrome trace events, off until enabled'''
+
+    def __init__(self, capacity=100000, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans = deque(maxlen=capacity)
+        self._thread_names = {}
+        self._origin = monotonic()
+        self._null_span = _NullSpan()
+
+    @property
+    def capacity(self):
+        return self._spans.maxlen
+
+    def enable(self, capacity=None):
+        with self._lock:
+            if capacity is not None and capacity != self._spans.maxlen:
+                self._spans = deque(self._spans, maxlen=capacity)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, category='pipeline', **args):
+        if not self.enabled:
+            return self._null_span
+        return _Span(self, name, category, args)
+
+    def traced(self, name, category='pipeline'):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, category):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, category, start, end, args=None):
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        with self._lock:
+            if thread.ident not in self._thread_names:
+                self._thread_names[thread.ident] = thread.name
+            self._spans.append((name, category, start, end, thread.ident, args))
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._thread_names = {}
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def to_chrome_trace(self):
+        with self._lock:
+            spans = list(self._spans)
+            thread_names = dict(self._thread_names)
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}} for (tid, name) in sorted(thread_names.items())]
+        for (name, category, start, end, tid, args) in spans:
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': (start - self._origin) * 1000000.0,
+                'dur': (end - start) * 1000000.0,
+                'pid': pid,
+                'tid': tid,
+            }
+            if args:
+                event['args'] = args
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path):
+        trace = self.to_chrome_trace()
+        with open(path, 'w') as afile:
+            json.dump(trace, afile)
+        logger.info("Wrote {} trace events to {}".format(len(trace['traceEvents']), path))
+
+
+tracer = Tracer()
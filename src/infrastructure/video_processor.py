@@ -1,49 +1,297 @@
 import threading
+import time
 import cv2
 import numpy as np
 
 import logging
 
+from infrastructure.laser_line import LaserLine
+from infrastructure.recording import FrameRecorder, describe_configuration
+from infrastructure.metrics import metrics
+from infrastructure.tracing import tracer
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
 logger = logging.getLogger('peachy')
 
 
+class FramePacket(object):
+    '''A frame travelling through the pipeline tagged with its sequence number, encoder section and the handlers it is for'''
+    def __init__(self, seq, frame, timestamp, tick, section, position, handlers, roi):
+        self.seq = seq
+        self.frame = frame
+        self.timestamp = timestamp
+        self.tick = tick
+        self.section = section
+        self.position = position
+        self.handlers = handlers
+        self.roi = roi
+        self.detected = None
+        self.detection_done = threading.Event()
+
+    @property
+    def needs_detection(self):
+        return len(self.handlers) > 0
+
+
 class VideoProcessor(threading.Thread):
-    def __init__(self, camera, encoder, roi, laser_detector):
+    drop_policies = ['block', 'drop']
+    compact_modes = [None, 'peak', 'centroid']
+
+    def __init__(self, camera, encoder, roi, laser_detector, pipelined=False, detection_workers=2, queue_size=8, drop_policy='block', roi_detection=False, compact=None):
         threading.Thread.__init__(self)
+        if drop_policy not in self.drop_policies:
+            raise Exception("Drop policy {} not supported, use one of {}".format(drop_policy, self.drop_policies))
+        if compact not in self.compact_modes:
+            raise Exception("Compact mode {} not supported, use one of {}".format(compact, self.compact_modes))
         self.camera = camera
         self.running = False
         self.handlers = []
         self.encoder = encoder
         self.roi = roi
         self.laser_detector = laser_detector
-        self.image = {'frame': np.ones((10, 10, 3), dtype='uint8') * 255, 'laser_detection': np.zeros((10, 10, 3), dtype='uint8')}
+        self.pipelined = pipelined
+        self.detection_workers = detection_workers
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.roi_detection = roi_detection
+        self.compact = compact
+        self.dropped_frames = 0
+        self.recorder = None
+        self.metrics_registry = metrics
+        self.tracer = tracer
+        self._detection_queue = queue.Queue(queue_size)
+        self._handler_queue = queue.Queue(queue_size)
+        self._poll_seconds = 0.1
+        self._image_lock = threading.Lock()
+        self.image = {'frame': np.ones((10, 10, 3), dtype='uint8') * 255}
+
+    @property
+    def queue_depths(self):
+        return {
+            'detection': self._detection_queue.qsize(),
+            'handler': self._handler_queue.qsize(),
+            'dropped': self.dropped_frames,
+        }
+
+    @property
+    def frames_in_flight(self):
+        # The handler queue, one per stage, the preview, a preview being scaled and the frame being read
+        if not self.pipelined:
+            return 3
+        return self.queue_size + self.detection_workers + 3
+
+    @property
+    def metrics(self):
+        metrics = dict(self.encoder.metrics)
+        metrics['dropped_frames'] = self.dropped_frames
+        metrics['queue_depths'] = self.queue_depths
+        if hasattr(self.camera, 'frame_pool'):
+            metrics['frame_pool'] = self.camera.frame_pool.stats
+        return metrics
+
+    def _read(self):
+        with self.metrics_registry.timer('camera.read'), self.tracer.span('camera.read'):
+            frame = self.camera.read()
+        if frame is not None:
+            self.metrics_registry.increment('frames')
+        return frame
 
     def run(self):
         logger.info("Starting video capture")
         self.running = True
-        while (self.running):
-            frame = self.camera.read()
-            detected = self.laser_detector.detect(frame)
-            should_capture, section = self.encoder.should_capture_frame_for_section(frame)
-            if should_capture:
-                for handler, callback in self.handlers:
-                    roi = self.roi.get_left_of_center(frame)
-                    roi_center_y = (frame.shape[0] // 2) - (self.roi.y_rel * frame.shape[0])
-                    roi_detected = self.roi.get_left_of_center(detected)
-                    result = handler.handle(
-                        frame=roi,
-                        section=section,
-                        roi_center_y=roi_center_y,
-                        partial_laser_detection=roi_detected,
-                        laser_detection=detected,
-                        roi=self.roi
-                        )
-                    callback(handler)
-                    if not result:
-                        self.unsubscribe((handler, callback))
-            self.image = {'frame': frame, 'laser_detection': detected}
+        if self.pipelined:
+            self._run_pipelined()
+        else:
+            while (self.running):
+                frame = self._read()
+                if frame is None:
+                    logger.info("Frame source has no more frames")
+                    break
+                with self.tracer.span('video_processor.frame'):
+                    self.process_frame(frame, self._frame_timestamp())
+                    self._release(frame)
         logger.info("Shutting down")
 
+    def process_frame(self, frame, timestamp=None):
+        packet = self._capture(0, frame, timestamp)
+        if packet.needs_detection:
+            packet.detected = self._detect(frame, packet.roi)
+            self._handle(packet)
+        self._set_image(frame)
+
+    def start_recording(self, path, crop=False):
+        self.stop_recording()
+        self.recorder = FrameRecorder(path, crop)
+        logger.info("Recording frames to {}".format(path))
+        return self.recorder
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+
+    def _frame_timestamp(self):
+        return getattr(self.camera, 'frame_timestamp', None)
+
+    def _interpolated(self, handler):
+        return getattr(handler, 'interpolated', False) is True
+
+    def _capture(self, seq, frame, timestamp=None):
+        if timestamp is None:
+            timestamp = monotonic()
+        with self.metrics_registry.timer('encoder'):
+            should_capture, section = self.encoder.should_capture_frame_for_section(frame, timestamp)
+        recorder = self.recorder
+        if recorder is not None:
+            configuration = describe_configuration(self.roi, self.encoder, self.laser_detector)
+            recorder.record(seq, frame, timestamp, getattr(self.encoder, 'value', None), should_capture, section, configuration, self.roi)
+        handlers = [(handler, callback) for (handler, callback) in list(self.handlers) if should_capture or self._interpolated(handler)]
+        position = section
+        if any([self._interpolated(handler) for (handler, callback) in handlers]):
+            position = self.encoder.section_position(timestamp)
+        return FramePacket(seq, frame, timestamp, should_capture, section, position, handlers, self.roi)
+
+    def _detect(self, frame, roi):
+        with self.metrics_registry.timer('detection'), self.tracer.span('detection'):
+            return self._detect_laser(frame, roi)
+
+    def _detect_laser(self, frame, roi):
+        if self.roi_detection:
+            detected = self.laser_detector.detect(roi.get_left_of_center(frame))
+        else:
+            detected = self.laser_detector.detect(frame)
+        if self.compact:
+            return LaserLine.from_mask(detected, subpixel=(self.compact == 'centroid'))
+        return detected
+
+    def _handle(self, packet):
+        frame, detected, roi = packet.frame, packet.detected, packet.roi
+        if self.roi_detection or self.compact:
+            roi_detected = detected
+        else:
+            roi_detected = roi.get_left_of_center(detected)
+        roi_frame = roi.get_left_of_center(frame)
+        roi_center_y = (frame.shape[0] // 2) - (roi.y_rel * frame.shape[0])
+        for handler, callback in packet.handlers:
+            if (handler, callback) not in self.handlers:
+                continue
+            name = 'handler.' + handler.__class__.__name__
+            with self.metrics_registry.timer(name), self.tracer.span(name, 'handler', section=packet.section):
+                result = handler.handle(
+                    frame=roi_frame,
+                    section=packet.position if self._interpolated(handler) else packet.section,
+                    roi_center_y=roi_center_y,
+                    partial_laser_detection=roi_detected,
+                    laser_detection=detected,
+                    roi=roi,
+                    tick=packet.tick
+                    )
+            with self.tracer.span('callback.' + handler.__class__.__name__, 'handler'):
+                callback(handler)
+            if not result:
+                self.unsubscribe((handler, callback))
+
+    def _set_image(self, frame):
+        self._retain(frame)
+        with self.tracer.span('video_processor.set_image', 'lock'), self._image_lock:
+            previous = self.image['frame']
+            self.image = {'frame': frame}
+        self._release(previous)
+
+    def _retain(self, frame):
+        if hasattr(self.camera, 'retain'):
+            self.camera.retain(frame)
+
+    def _release(self, frame):
+        if hasattr(self.camera, 'release'):
+            self.camera.release(frame)
+
+    def _run_pipelined(self):
+        stages = [threading.Thread(target=self._detection_stage) for idx in range(self.detection_workers)]
+        stages.append(threading.Thread(target=self._handler_stage))
+        for stage in stages:
+            stage.daemon = True
+            stage.start()
+        seq = 0
+        while (self.running):
+            frame = self._read()
+            if frame is None:
+                logger.info("Frame source has no more frames")
+                self._drain(stages)
+                break
+            with self.tracer.span('video_processor.frame'):
+                packet = self._capture(seq, frame, self._frame_timestamp())
+                seq += 1
+                if not packet.needs_detection:
+                    packet.detection_done.set()
+                    if self.drop_policy == 'drop' and self._handler_queue.full():
+                        self.dropped_frames += 1
+                        self.metrics_registry.increment('dropped_frames')
+                        self._release(frame)
+                        continue
+                with self.tracer.span('video_processor.enqueue', 'lock'):
+                    if self._put(self._handler_queue, packet) and packet.needs_detection:
+                        self._put(self._detection_queue, packet)
+        for stage in stages:
+            stage.join()
+
+    def _drain(self, stages):
+        while self.running and (self._detection_queue.unfinished_tasks or self._handler_queue.unfinished_tasks):
+            time.sleep(self._poll_seconds / 10.0)
+        self.running = False
+
+    def _put(self, stage_queue, packet):
+        while self.running:
+            try:
+                stage_queue.put(packet, timeout=self._poll_seconds)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, stage_queue):
+        while self.running:
+            try:
+                return stage_queue.get(timeout=self._poll_seconds)
+            except queue.Empty:
+                pass
+        return None
+
+    def _detection_stage(self):
+        while self.running:
+            packet = self._get(self._detection_queue)
+            if packet is None:
+                break
+            try:
+                packet.detected = self._detect(packet.frame, packet.roi)
+            except Exception as ex:
+                logger.error("Laser detection failed for frame {}: {}".format(packet.seq, ex))
+            packet.detection_done.set()
+            self._detection_queue.task_done()
+
+    def _handler_stage(self):
+        while self.running:
+            packet = self._get(self._handler_queue)
+            if packet is None:
+                break
+            with self.tracer.span('handler_stage.wait_for_detection', 'lock'):
+                while self.running and not packet.detection_done.wait(self._poll_seconds):
+                    pass
+            if packet.detected is not None:
+                self._handle(packet)
+            self._set_image(packet.frame)
+            self._release(packet.frame)
+            self._handler_queue.task_done()
+
     def _get_new_size(self, dest_x, dest_y, source_x, source_y):
         source_ratio = source_x / float(source_y)
         dest_ratio = dest_x / float(dest_y)
@@ -53,17 +301,25 @@ class VideoProcessor(threading.Thread):
             return (int(dest_x), int(source_y * dest_x / source_x))
 
     def get_bounded_image(self, requested_x, requested_y):
-        image = self.image['frame']
-        detected = self.image['laser_detection']
+        with self.tracer.span('video_processor.get_image', 'lock'), self._image_lock:
+            image = self.image['frame']
+            self._retain(image)
+        try:
+            with self.metrics_registry.timer('preview'), self.tracer.span('preview'):
+                return self._get_bounded_image(image, requested_x, requested_y)
+        finally:
+            self._release(image)
+
+    def _get_bounded_image(self, image, requested_x, requested_y):
         ratio = self._get_new_size(requested_x, requested_y, image.shape[1], image.shape[0])
         if ratio == (0, 0):
             ratio = (1, 1)
 
         scaled_image = cv2.resize(image, ratio)
-        scaled_detected = cv2.resize(detected, ratio)
+        scaled_detected = self.laser_detector.detect(scaled_image)
         roi_frame = self.roi.overlay(scaled_image)
-        encoder_overlay = self.encoder.overlay_encoder(scaled_image)
-        encoder_history = self.encoder.overlay_history(scaled_image)
+        encoder_overlay = self.encoder.overlay_encoder_patch(scaled_image.shape)
+        encoder_history = self.encoder.overlay_history_patch(scaled_image.shape)
         rotation = ((self.encoder.position % self.encoder.sections) / float(self.encoder.sections)) * 360.0
         return {
             'frame': scaled_image,
@@ -81,6 +337,7 @@ class VideoProcessor(threading.Thread):
             retry_count += 1
             logger.info("Joining main thread")
             self.join(1)
+        self.stop_recording()
 
     def subscribe(self, handler, callback=lambda x: x):
         self.handlers.append((handler, callback))
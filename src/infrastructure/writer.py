@@ -5,6 +5,8 @@ import time
 logger = logging.getLogger('peachy')
 
 from infrastructure.gl_point_converter import GLConverter
+from infrastructure.metrics import metrics
+from infrastructure.tracing import tracer
 
 class Writer(object):
     def write_points(self, array):
@@ -12,21 +14,56 @@ class Writer(object):
 
 
 class PLYWriter(Writer):
+    ascii_format = 'ascii'
+    binary_format = 'binary_little_endian'
 
-    def __init__(self, point_converter, point_thinner):
+    def __init__(self, point_converter, point_thinner, file_format='ascii', normals=False, uvs=False, chunk_size=65536):
+        if file_format not in [self.ascii_format, self.binary_format]:
+            raise Exception("Format must be one of: {} was {}".format(str([self.ascii_format, self.binary_format]), file_format))
         self._point_thinning = point_thinner
         self.point_converter = point_converter
+        self.file_format = file_format
+        self.normals = normals
+        self.uvs = uvs
+        self.chunk_size = chunk_size
+
+    def _properties(self):
+        properties = [('x', 0), ('y', 1), ('z', 2)]
+        if self.normals:
+            properties += [('nx', 3), ('ny', 4), ('nz', 5)]
+        if self.uvs:
+            properties += [('s', 6), ('t', 7)]
+        return properties
+
+    def _header(self, verticies):
+        header = "ply\nformat {} 1.0\ncomment made by Peachy Scanner\ncomment Date Should Go Here\nelement vertex {}\n".format(self.file_format, str(verticies))
+        header += ''.join(["property float {}\n".format(name) for (name, column) in self._properties()])
+        return header + "end_header\n"
+
+    def _write(self, outfile, points):
+        verticies = len(points)
+        header = self._header(verticies)
+        if self.file_format == self.binary_format:
+            outfile.write(header.encode('ascii'))
+        else:
+            outfile.write(header)
+        if verticies == 0:
+            return
+
+        columns = [column for (name, column) in self._properties()]
+        line_format = ' '.join(['%.7g'] * len(columns)) + '\n'
+        for start in range(0, verticies, self.chunk_size):
+            chunk = points[start:start + self.chunk_size, columns]
+            if self.file_format == self.binary_format:
+                outfile.write(chunk.astype('<f4').tobytes())
+            else:
+                outfile.write((line_format * len(chunk)) % tuple(chunk.ravel().tolist()))
 
     def write_polar_points(self, outfile, polar_array):
         start = time.time()
-        points = self.point_converter.convert(polar_array)
-        verticies = points.shape[0]
-        header = "ply\nformat ascii 1.0\ncomment made by Peachy Scanner\ncomment Date Should Go Here\nelement vertex {}\nproperty float x\nproperty float y\nproperty float z\nend_header\n".format(str(verticies))
-
-        outfile.write(header)
-
-        for (x, y, z, a, b, c, u, v) in points:
-            outfile.write('{} {} {}\n'.format(x, y, z))
+        with metrics.timer('writing'), tracer.span('writer.write_polar_points', 'io'):
+            points = self.point_converter.convert(polar_array)
+            self._write(outfile, points)
 
         total = time.time() - start
 
@@ -34,16 +71,11 @@ class PLYWriter(Writer):
 
     def write_cartisien_points(self, outfile, points_xyz):
         start = time.time()
-        thinned_points = self._point_thinning.thin(points_xyz)
-        points = self.point_converter.convert_xyz(thinned_points)
-        verticies = points.shape[0]
-
-        header = "ply\nformat ascii 1.0\ncomment made by Peachy Scanner\ncomment Date Should Go Here\nelement vertex {}\nproperty float x\nproperty float y\nproperty float z\nend_header\n".format(str(verticies))
-
-        outfile.write(header)
-
-        for (x, y, z, a, b, c, u, v) in points:
-            outfile.write('{} {} {}\n'.format(x, y, z))
+        with metrics.timer('thinning'), tracer.span('writer.thinning', 'io'):
+            thinned_points = self._point_thinning.thin(points_xyz)
+        with metrics.timer('writing'), tracer.span('writer.write_cartisien_points', 'io'):
+            points = self.point_converter.convert_xyz(thinned_points)
+            self._write(outfile, points)
 
         total = time.time() - start
 
@@ -6,6 +6,8 @@ import time
 import argparse
 
 from api.scanner import ScannerAPI
+from infrastructure.frame_source import open_frame_source
+from infrastructure.tracing import tracer
 
 def setup_logging(args):
 
@@ -38,8 +40,12 @@ def setup_logging(args):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser("Peachy Scanner")
     parser.add_argument('-l', '--log',     dest='loglevel', action='store',      required=False, default="WARNING", help="Enter the loglevel [DEBUG|INFO|WARNING|ERROR] default: WARNING")
+    parser.add_argument('-T', '--trace',   dest='trace',    action='store',      required=False, default=None, help="Record pipeline and UI spans, written as Chrome trace JSON to this file on exit")
     parser.add_argument('-t', '--console', dest='console',  action='store_true', required=False, help="Logs to console not file")
     parser.add_argument('-m', '--module', dest='mod',  action='store', required=False, help='Activate a module (use "list" to get a list of available modules).')
+    parser.add_argument('-s', '--source', dest='source', action='store', required=False, default='camera', help='Frame source [camera|synthetic|<video file>|<image directory>] default: camera')
+    parser.add_argument('-f', '--fps',    dest='fps',    action='store', required=False, type=float, default=None, help='Frames per second to play a non camera source at, default: as fast as possible')
+    parser.add_argument('-M', '--metrics', dest='metrics', action='store', required=False, type=float, default=None, help='Log pipeline metrics every this many seconds')
     args, unknown = parser.parse_known_args()
 
     path = os.path.dirname(os.path.realpath(__file__))
@@ -55,7 +61,11 @@ if __name__ == "__main__":
         sys.argv.append("-m")
         sys.argv.append(args.mod)
 
-    scanner = ScannerAPI()
+    if args.trace:
+        tracer.enable()
+    scanner = ScannerAPI(open_frame_source(args.source, args.fps))
+    if args.metrics:
+        scanner.start_metrics_logging(args.metrics)
     scanner.start()
     try:
         from gui import PeachyScannerApp
@@ -66,4 +76,6 @@ if __name__ == "__main__":
     finally:
         print("Shutting Down Api")
         scanner.stop()
+        if args.trace:
+            tracer.write(args.trace)
         exit()
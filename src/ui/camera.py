@@ -34,6 +34,7 @@ class CameraControls(Screen):
 
     def __init__(self, camera, **kwargs):
         super(CameraControls, self).__init__(**kwargs)
+        self.camera = camera
         Config.adddefaultsection('camera')
         for setting in camera.get_settings():
             name = setting['name']
@@ -49,5 +50,33 @@ class CameraControls(Screen):
         for control in self.camera_control.children:
             settings[control.text] = control.value
         Logger.info(str(settings))
+        CaptureModeLoader.save_capture_mode(self.camera.get_capture_mode())
+
+
+class CaptureModeLoader(object):
+    section = 'peachyscanner.camera'
+
+    @staticmethod
+    def get_capture_mode():
+        section = CaptureModeLoader.section
+        Config.adddefaultsection(section)
+        width = Config.getdefault(section, 'width', '')
+        height = Config.getdefault(section, 'height', '')
+        fps = Config.getdefault(section, 'fps', '')
+        fourcc = Config.getdefault(section, 'fourcc', '')
+        return {
+            'width': int(width) if width else None,
+            'height': int(height) if height else None,
+            'fps': float(fps) if fps else None,
+            'fourcc': fourcc if fourcc else None,
+        }
+
+    @staticmethod
+    def save_capture_mode(mode):
+        section = CaptureModeLoader.section
+        Config.adddefaultsection(section)
+        for key in ['width', 'height', 'fps', 'fourcc']:
+            Config.set(section, key, '' if mode.get(key) is None else str(mode[key]))
+        Config.write()
 
 
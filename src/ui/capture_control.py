@@ -20,8 +20,9 @@ import numpy as np
 from math import floor
 
 from infrastructure.gl_point_converter import GLConverter
-from infrastructure.point_thinning import PointThinner
+from infrastructure.point_thinning import VoxelThinner
 from infrastructure.writer import PLYWriter
+from infrastructure.tracing import tracer
 
 Builder.load_file('ui/capture_control.kv')
 
@@ -128,10 +129,10 @@ class PointsCapture(Screen):
         self._popup.open()
 
     def save_points(self, path, filename):
-        with open(os.path.join(path, filename), 'w') as afile:
-            thinner = PointThinner()
+        with open(os.path.join(path, filename), 'wb') as afile:
+            thinner = VoxelThinner()
             converter = GLConverter()
-            PLYWriter(converter, thinner).write_cartisien_points(afile, self.raw_points_xyz)
+            PLYWriter(converter, thinner, PLYWriter.binary_format).write_cartisien_points(afile, self.raw_points_xyz)
         self.dismiss_popup()
 
     def _enable_all(self):
@@ -204,6 +205,7 @@ class ObjectRenderer(BoxLayout):
             self.model_texture = texture
             self.populate_fbo(self.fbo)
 
+    @tracer.traced('ObjectRenderer.update_glsl', 'ui')
     def update_glsl(self, *largs):
         # self.fbo.shader.source = resource_find('simple.glsl')
         asp = max(10, self.size[0]) / max(10, float(self.size[1]))
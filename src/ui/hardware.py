@@ -6,7 +6,6 @@ from kivy.lang import Builder
 from kivy.logger import Logger
 from kivy.clock import Clock
 
-import numpy as np
 import threading
 from infrastructure.hardware import HardwareConfiguration
 
@@ -83,33 +82,4 @@ class HardwareLoader(object):
     def get_hardware():
         section = 'peachyscanner.hardware'
         Config.adddefaultsection(section)
-        camera_focal_length_mm = float(Config.getdefault(section, 'camera_focal_length_mm', '10.0'))
-        sensor_size_x_mm = float(Config.getdefault(section, 'sensor_size_x_mm', '10.0'))
-        sensor_size_y_mm = float(Config.getdefault(section, 'sensor_size_y_mm', '10.0'))
-        focal_point_to_center = float(Config.getdefault(section, 'focal_point_to_center', '100.0'))
-        laser_intersection_degree_1 = float(Config.getdefault(section, 'laser_intersection_degree_1', '35.0'))
-        laser_intersection_degree_2 = float(Config.getdefault(section, 'laser_intersection_degree_2', '40.0'))
-        laser_intersection_degree_3 = float(Config.getdefault(section, 'laser_intersection_degree_3', '45.0'))
-        laser_intersection_degree_4 = float(Config.getdefault(section, 'laser_intersection_degree_4', '50.0'))
-        laser_intersection_degree_5 = float(Config.getdefault(section, 'laser_intersection_degree_5', '55.0'))
-        laser_intersection_distance_1 = float(Config.getdefault(section, 'laser_intersection_distance_1', '249.9'))
-        laser_intersection_distance_2 = float(Config.getdefault(section, 'laser_intersection_distance_2', '208.9'))
-        laser_intersection_distance_3 = float(Config.getdefault(section, 'laser_intersection_distance_3', '175.0'))
-        laser_intersection_distance_4 = float(Config.getdefault(section, 'laser_intersection_distance_4', '146.8'))
-        laser_intersection_distance_5 = float(Config.getdefault(section, 'laser_intersection_distance_5', '122.5'))
-
-        intersections_rad_mm = [
-            (np.deg2rad(laser_intersection_degree_1), laser_intersection_distance_1),
-            (np.deg2rad(laser_intersection_degree_2), laser_intersection_distance_2),
-            (np.deg2rad(laser_intersection_degree_3), laser_intersection_distance_3),
-            (np.deg2rad(laser_intersection_degree_4), laser_intersection_distance_4),
-            (np.deg2rad(laser_intersection_degree_5), laser_intersection_distance_5),
-        ]
-        camera_focal_length_mm = float(camera_focal_length_mm)
-        sensor_size = (float(sensor_size_x_mm), float(sensor_size_y_mm))
-        focal_point_to_center = float(focal_point_to_center)
-        return HardwareConfiguration(
-            camera_focal_length_mm,
-            sensor_size,
-            focal_point_to_center,
-            intersections_rad_mm)
\ No newline at end of file
+        return HardwareConfiguration.from_config(Config.getdefault, section)
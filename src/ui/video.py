@@ -10,9 +10,10 @@ from kivy.graphics import Color, Line
 
 import cv2
 
+from infrastructure.tracing import tracer
+
 import numpy as np
 import time
-from operator import mul
 
 Builder.load_file('ui/video.kv')
 
@@ -41,12 +42,6 @@ class ImageDisplay(BoxLayout):
 
         Clock.schedule_interval(self.update_image, 1 / 24.)
 
-    def _add_overlays_to_image(self, image, overlays):
-        img2gray = cv2.cvtColor(overlays, cv2.COLOR_BGR2GRAY)
-        ret, mask = cv2.threshold(img2gray, 10, 255, cv2.THRESH_BINARY)
-        image = cv2.bitwise_and(image, image, mask=cv2.bitwise_not(mask))
-        return cv2.add(image, overlays)
-
     def _set_texture_from_image(self, image):
         image = np.rot90(np.swapaxes(image, 0, 1))
         if image.shape[:2] != self.texture.size:
@@ -63,27 +58,21 @@ class ImageDisplay(BoxLayout):
         else:
             self.center_line.points = [0, 0, 0, 0]
 
+    @tracer.traced('ImageDisplay.update_image', 'ui')
     def update_image(self, largs):
         image_data = self.scanner.get_feed_image(self.size)
         self.last_image = image_data['frame']
         if self.show_roi:
             image = image_data['roi_frame']
         else:
-            image = image_data['frame']
-        overlays = np.zeros(image.shape, dtype=image.dtype)
+            image = image_data['frame'].copy()
         if self.show_laser_detector:
-            #This next line is the fastest way of populating an array with an array
-            try:
-                colormask = np.tile(self.laser_detector_color_bgr, reduce(mul,overlays.shape[:2])).reshape(overlays.shape)
-                overlays = cv2.bitwise_and(colormask, colormask, mask=image_data['laser_detection'])
-            except:
-                pass
+            image[image_data['laser_detection'] > 0] = self.laser_detector_color_bgr
         if self.show_encoder:
-            overlays = cv2.add(overlays, image_data['encoder'])
-            cv2.putText(overlays,"{: 5.2f} deg".format(image_data['rotation']), (0, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0,255,0) )
+            image_data['encoder'].composite(image)
+            cv2.putText(image, "{: 5.2f} deg".format(image_data['rotation']), (0, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0,255,0) )
         if self.show_encoder_history:
-            overlays = cv2.add(overlays, image_data['history'])
-        image = self._add_overlays_to_image(image, overlays)
+            image_data['history'].composite(image)
         self._set_texture_from_image(image)
 
     def on_motion(self, instance, etype, motion_event):
@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import numpy as np
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from api.batch import BatchProcessor, load_settings, is_recording
+from infrastructure.data_capture import PointCaptureXYZ
+from infrastructure.encoder import Encoder
+from infrastructure.frame_source import SyntheticSource
+from infrastructure.image_2_points import Image2Points
+from infrastructure.laser_detector import FusedLaserDetector2
+from infrastructure.roi import ROI
+from infrastructure.video_processor import VideoProcessor
+
+
+class BatchProcessorTest(unittest.TestCase):
+    sections = 12
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.filename = os.path.join(self.path, 'scan.rec')
+        self.config = os.path.join(self.path, 'config.ini')
+        with open(self.config, 'w') as afile:
+            afile.write('[peachyscanner.hardware]\ncamera_focal_length_mm = 4.0\nsensor_size_x_mm = 3.6\nsensor_size_y_mm = 2.7\nfocal_point_to_center = 300.0\n')
+            afile.write('[laserdetection]\nthreshold = 200\nlaser_color = red\n')
+        self.settings = load_settings(self.config)
+        self.roi = ROI(0.1, 0.1, 0.8, 0.8)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def record_scan(self):
+        source = SyntheticSource(shape=(60, 80, 3), fps=None)
+        source.start()
+        img2points = Image2Points(self.settings['hardware'], source.shape)
+        laser_theta = self.settings['hardware'].intersections_rad_mm[0][0]
+        video_processor = VideoProcessor(source, Encoder(point=(0.2, 0.2), sections=self.sections), self.roi, FusedLaserDetector2(200, 'red'), roi_detection=True)
+        handler = PointCaptureXYZ(self.sections, img2points, laser_theta)
+        video_processor.subscribe(handler)
+        video_processor.start_recording(self.filename, crop=True)
+        for idx in range(2 * self.sections + 4):
+            frame = source.read()
+            video_processor.process_frame(frame, idx / 30.0)
+            source.release(frame)
+        video_processor.stop_recording()
+        return handler.points_xyz
+
+    def test_load_settings_reads_scanner_settings_with_defaults(self):
+        self.assertEqual(4.0, self.settings['hardware'].focal_length_mm)
+        self.assertEqual((3.6, 2.7), self.settings['hardware'].sensor_size_xy_mm)
+        self.assertEqual(5, len(self.settings['hardware'].intersections_rad_mm))
+        self.assertAlmostEqual(np.deg2rad(35.0), self.settings['hardware'].intersections_rad_mm[0][0])
+        self.assertEqual(200, self.settings['laser_threshold'])
+        self.assertEqual([0.0, 0.0, 1.0, 1.0], self.settings['roi'])
+
+    def test_process_gives_the_points_the_live_pipeline_captured(self):
+        expected = self.record_scan()
+
+        points = BatchProcessor(self.settings, workers=1).process(self.filename)
+
+        self.assertTrue(is_recording(self.filename))
+        self.assertEqual(expected.shape, points.shape)
+        self.assertTrue(np.allclose(expected[np.lexsort(expected.T)], points[np.lexsort(points.T)]))
+
+    def test_process_gives_the_same_points_with_a_process_pool(self):
+        self.record_scan()
+
+        expected = BatchProcessor(self.settings, workers=1).process(self.filename)
+        points = BatchProcessor(self.settings, workers=2, frames_per_task=3).process(self.filename)
+
+        self.assertTrue((expected == points).all())
+
+    def test_write_ply_writes_binary_ply(self):
+        self.record_scan()
+        processor = BatchProcessor(self.settings, workers=1)
+        filename = os.path.join(self.path, 'scan.ply')
+
+        processor.write_ply(processor.process(self.filename), filename)
+
+        with open(filename, 'rb') as afile:
+            self.assertTrue(afile.read().startswith(b'ply\nformat binary_little_endian 1.0\n'))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
+    unittest.main()
@@ -11,6 +11,7 @@ from mock import patch, Mock
 from api.scanner import ScannerAPI
 from infrastructure.roi import ROI
 from infrastructure.data_capture import ImageCapture, PointCaptureXYZ
+from infrastructure.metrics import MetricsRegistry
 from helpers import TestHelpers
 
 
@@ -56,6 +57,20 @@ class ScannerAPITest(TestHelpers):
         self.assertNotEquals(api._default_roi, api.video_processor.roi)
         self.assertEquals(api.roi, api.video_processor.roi)
 
+    @patch('api.scanner.Camera')
+    @patch('api.scanner.Image2Points')
+    def test_set_region_of_interest_compiles_roi_when_configured(self, mock_Image2Points, mock_camera):
+        cam = mock_camera.return_value
+        cam.shape = [300, 100]
+        api = ScannerAPI()
+        api.configure("bla", Mock())
+        img2points = mock_Image2Points.return_value
+        img2points.compile_roi.assert_called_with(api.roi)
+
+        api.set_region_of_interest_from_rel_points(0.0, 0.0, 0.5, 0.9)
+
+        img2points.compile_roi.assert_called_with(api.roi)
+
     @patch('api.scanner.Camera')
     def test_configure_encoder_should_create_an_encoder_with_the_given_config(self, mock_camera):
         cam = mock_camera.return_value
@@ -153,6 +168,16 @@ class ScannerAPITest(TestHelpers):
         self.assertEquals(api._default_roi, api.video_processor.roi)
         self.assertEquals(api._default_laser_detector, api.video_processor.laser_detector)
 
+    @patch('api.scanner.Camera')
+    @patch('api.scanner.VideoProcessor')
+    def test_init_uses_given_frame_source_instead_of_camera(self, mock_video_processor, mock_camera):
+        frame_source = Mock()
+        api = ScannerAPI(frame_source)
+        self.assertFalse(mock_camera.called)
+        self.assertEqual(frame_source, api.camera)
+        frame_source.start.assert_called_once_with()
+        self.assertEqual(frame_source, mock_video_processor.call_args[0][0])
+
     @patch('api.scanner.Camera')
     def test_capture_image_should_create_an_image_handler_and_subscribe_it_to_video_processor(self, mock_camera):
         cam = mock_camera.return_value
@@ -309,6 +334,45 @@ class ScannerAPITest(TestHelpers):
         result = api.get_feed_image((200, 100))
         self.assertEqual('Expected Image', result)
 
+    @patch('api.scanner.Camera')
+    @patch('api.scanner.VideoProcessor')
+    def test_video_processor_is_pipelined(self, mock_video_processor, mock_camera):
+        api = ScannerAPI()
+        self.assertTrue(mock_video_processor.call_args[1]['pipelined'])
+
+    @patch('api.scanner.Camera')
+    @patch('api.scanner.VideoProcessor')
+    def test_video_processor_detects_within_region_of_interest(self, mock_video_processor, mock_camera):
+        api = ScannerAPI()
+        self.assertTrue(mock_video_processor.call_args[1]['roi_detection'])
+
+    @patch('api.scanner.Camera')
+    @patch('api.scanner.VideoProcessor')
+    def test_frame_pool_is_sized_for_the_frames_the_video_processor_holds(self, mock_video_processor, mock_camera):
+        mock_video_processor.return_value.frames_in_flight = 13
+        api = ScannerAPI()
+        mock_camera.return_value.frame_pool.ensure_size.assert_called_once_with(13)
+
+    @patch('api.scanner.Camera')
+    @patch('api.scanner.VideoProcessor')
+    def test_get_queue_depths_gets_depths_from_video_processor(self, mock_video_processor, mock_camera):
+        mock_video_processor.return_value.queue_depths = {'detection': 1, 'handler': 2, 'dropped': 3}
+        api = ScannerAPI()
+        self.assertEqual({'detection': 1, 'handler': 2, 'dropped': 3}, api.get_queue_depths())
+
+    @patch('api.scanner.Camera')
+    @patch('api.scanner.VideoProcessor')
+    def test_get_metrics_gets_metrics_from_video_processor(self, mock_video_processor, mock_camera):
+        mock_video_processor.return_value.metrics = {'missed_ticks': 2, 'dropped_frames': 3}
+        api = ScannerAPI()
+        api.metrics = MetricsRegistry()
+        api.metrics.increment('frames', 4)
+        metrics = api.get_metrics()
+        self.assertEqual(2, metrics['missed_ticks'])
+        self.assertEqual(3, metrics['dropped_frames'])
+        self.assertEqual({'frames': 4}, metrics['counters'])
+        self.assertEqual({}, metrics['latency'])
+
     @patch('api.scanner.Camera')
     @patch('api.scanner.Image2Points')
     def test_configure_configures_point_collection_and_calls_back(self, mock_Image2Points, mock_camera):
@@ -319,9 +383,41 @@ class ScannerAPITest(TestHelpers):
         api = ScannerAPI()
         api.configure("bla", callback)
 
-        mock_Image2Points.assert_called_once_with("bla", cam.shape)
+        mock_Image2Points.assert_called_once_with("bla", cam.shape, api.intersection_cache)
         callback.assert_called_with()
 
+    @patch('api.scanner.Camera')
+    @patch('api.scanner.Image2Points')
+    def test_set_capture_mode_rebuilds_point_collection_when_shape_changes(self, mock_Image2Points, mock_camera):
+        cam = mock_camera.return_value
+        cam.shape = (300, 100, 3)
+
+        def set_capture_mode(width, height, fps, fourcc):
+            cam.shape = (height, width, 3)
+            return {'width': width, 'height': height, 'fps': fps, 'fourcc': fourcc}
+        cam.set_capture_mode.side_effect = set_capture_mode
+        api = ScannerAPI()
+        api.configure("bla", Mock())
+
+        mode = api.set_capture_mode(640, 480, 30, 'MJPG')
+
+        self.assertEqual({'width': 640, 'height': 480, 'fps': 30, 'fourcc': 'MJPG'}, mode)
+        mock_Image2Points.assert_called_with("bla", (480, 640, 3), api.intersection_cache)
+        self.assertEqual(2, mock_Image2Points.call_count)
+
+    @patch('api.scanner.Camera')
+    @patch('api.scanner.Image2Points')
+    def test_set_capture_mode_keeps_point_collection_when_shape_is_unchanged(self, mock_Image2Points, mock_camera):
+        cam = mock_camera.return_value
+        cam.shape = (300, 100, 3)
+        api = ScannerAPI()
+        api.configure("bla", Mock())
+
+        api.set_capture_mode(fps=30)
+
+        cam.set_capture_mode.assert_called_once_with(None, None, 30, None)
+        self.assertEqual(1, mock_Image2Points.call_count)
+
     @patch('api.scanner.Camera')
     @patch('api.scanner.Image2Points')
     def test_get_scanner_posisitions_get_list_of_configured_laser_posisitions(self, mock_Image2Points, mock_camera):
@@ -0,0 +1,74 @@
+import sys
+import os
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.encoder import Encoder
+from timing import best_of, report
+
+FRAMES = 10000
+SHAPE_YX = (1080, 1920)
+PREVIEW_SHAPE_YX = (540, 960)
+PREVIEWS = 200
+
+
+class ListHistoryEncoder(Encoder):
+    '''Encoder keeping history in a re-sliced list as it did before the ring buffer'''
+    def __init__(self, *args, **kwargs):
+        super(ListHistoryEncoder, self).__init__(*args, **kwargs)
+        self._history = []
+
+    def _append_history(self, value):
+        self._history.append(value)
+        self._history = self._history[-self.history_length:]
+
+
+def run():
+    frames = [np.ones(SHAPE_YX + (3,), dtype='uint8') * value for value in [10, 250]]
+    results = []
+    for encoder_class in [ListHistoryEncoder, Encoder]:
+        encoder = encoder_class((0.2, 0.2), 382, 100, 20, 200)
+        seconds = best_of(lambda: [encoder.process(frames[idx % 2]) for idx in range(FRAMES)]) / FRAMES
+        results.append({
+            'name': 'encoder.process.{}'.format(encoder_class.__name__),
+            'seconds': seconds,
+            'per_frame_us': '{:.2f}'.format(seconds * 1000000.0),
+        })
+    results.extend(overlays(Encoder((0.2, 0.2), 382, 100, 20, 200), frames))
+    return results
+
+
+def full_frame_overlays(encoder, preview):
+    overlays = cv2.add(encoder.overlay_encoder(preview), encoder.overlay_history(preview))
+    gray = cv2.cvtColor(overlays, cv2.COLOR_BGR2GRAY)
+    ret, mask = cv2.threshold(gray, 10, 255, cv2.THRESH_BINARY)
+    image = cv2.bitwise_and(preview, preview, mask=cv2.bitwise_not(mask))
+    return cv2.add(image, overlays)
+
+
+def patch_overlays(encoder, preview):
+    image = preview.copy()
+    encoder.overlay_encoder_patch(image.shape).composite(image)
+    encoder.overlay_history_patch(image.shape).composite(image)
+    return image
+
+
+def overlays(encoder, frames):
+    for idx in range(encoder.history_length):
+        encoder.process(frames[idx % 2])
+    preview = np.ones(PREVIEW_SHAPE_YX + (3,), dtype='uint8') * 60
+    results = []
+    for overlay in [full_frame_overlays, patch_overlays]:
+        seconds = best_of(lambda: [overlay(encoder, preview) for idx in range(PREVIEWS)]) / PREVIEWS
+        results.append({
+            'name': 'encoder.{}.{}x{}'.format(overlay.__name__, PREVIEW_SHAPE_YX[1], PREVIEW_SHAPE_YX[0]),
+            'seconds': seconds,
+        })
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,77 @@
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.camera import Camera
+from infrastructure.encoder import Encoder
+from infrastructure.roi import ROI
+from infrastructure.video_processor import VideoProcessor
+from timing import report
+
+FRAMES = 300
+SHAPES_YX = [(480, 640), (720, 1280), (1080, 1920)]
+
+
+class FakeVideoCapture(object):
+    '''Behaves like cv2.VideoCapture.read, filling the given image in place when it fits'''
+    def __init__(self, shape_yx):
+        self.source = np.random.randint(0, 255, shape_yx + (3,)).astype('uint8')
+        self.allocations = 0
+
+    def read(self, image=None):
+        if image is None or image.shape != self.source.shape:
+            self.allocations += 1
+            image = np.empty(self.source.shape, dtype='uint8')
+        np.copyto(image, self.source)
+        return (True, image)
+
+
+class NullDetector(object):
+    def __init__(self):
+        self.detected = np.zeros((10, 10), dtype='uint8')
+
+    def detect(self, frame):
+        return self.detected
+
+
+class UnpooledCamera(Camera):
+    def read(self):
+        (retVal, image) = self._video_capture.read()
+        return image
+
+
+def capture_loop(camera_class, shape_yx):
+    camera = camera_class()
+    camera._video_capture = FakeVideoCapture(shape_yx)
+    camera.shape = shape_yx + (3,)
+    video_processor = VideoProcessor(camera, Encoder((0.2, 0.2), 382, 100, 20, 200), ROI(0.0, 0.0, 1.0, 1.0), NullDetector())
+    start = time.time()
+    for idx in range(FRAMES):
+        frame = camera.read()
+        video_processor.process_frame(frame)
+        video_processor._release(frame)
+        if idx % 10 == 0:
+            video_processor.get_bounded_image(320, 240)
+    return time.time() - start, camera._video_capture.allocations + camera.frame_pool.allocations
+
+
+def run():
+    results = []
+    for shape_yx in SHAPES_YX:
+        for (name, camera_class) in [('unpooled', UnpooledCamera), ('frame_pool', Camera)]:
+            seconds, allocations = capture_loop(camera_class, shape_yx)
+            results.append({
+                'name': 'capture_loop.{}.{}x{}'.format(name, shape_yx[1], shape_yx[0]),
+                'seconds': seconds,
+                'frames': FRAMES,
+                'frame_allocations': allocations,
+            })
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
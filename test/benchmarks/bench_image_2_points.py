@@ -0,0 +1,55 @@
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.image_2_points import Image2Points
+from infrastructure.hardware import HardwareConfiguration
+from infrastructure.roi import ROI
+from timing import best_of, report
+
+RESOLUTIONS_YX = [(480, 640), (720, 1280), (1080, 1920)]
+FRAMES = 20
+
+
+def default_hardware():
+    intersections_rad_mm = [
+        (np.deg2rad(35.0), 249.9),
+        (np.deg2rad(40.0), 208.9),
+        (np.deg2rad(45.0), 175.0),
+        (np.deg2rad(50.0), 146.8),
+        (np.deg2rad(55.0), 122.5),
+    ]
+    return HardwareConfiguration(10.0, (10.0, 7.5), 100.0, intersections_rad_mm)
+
+
+def laser_line(shape_yx):
+    image = np.zeros(shape_yx, dtype='uint8')
+    image[:, (shape_yx[1] // 2) - 20:(shape_yx[1] // 2) - 17] = 255
+    return image
+
+
+def get_points(hardware, shape):
+    img2points = Image2Points(hardware, shape)
+    image = laser_line(shape)
+    roi = ROI(0.0, 0.0, 1.0, 1.0)
+    laser_theta = hardware.intersections_rad_mm[0][0]
+    points = len(img2points.get_points(image, 0.5, roi, laser_theta))
+    seconds = best_of(lambda: [img2points.get_points(image, 0.5, roi, laser_theta) for idx in range(FRAMES)]) / FRAMES
+    return {'name': 'image_2_points.get_points.{}x{}'.format(shape[1], shape[0]), 'seconds': seconds, 'points': points}
+
+
+def run():
+    hardware = default_hardware()
+    results = []
+    for shape in RESOLUTIONS_YX:
+        seconds = best_of(lambda: Image2Points(hardware, shape))
+        results.append({'name': 'image_2_points.configure.{}x{}'.format(shape[1], shape[0]), 'seconds': seconds, 'lasers': len(hardware.intersections_rad_mm)})
+        results.append(get_points(hardware, shape))
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
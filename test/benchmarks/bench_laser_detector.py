@@ -0,0 +1,47 @@
+import sys
+import os
+import cv2
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.laser_detector import LaserDetector, LaserDetector2, FusedLaserDetector2
+from infrastructure.roi import ROI
+from timing import best_of, report
+
+SHAPES_YX = [(480, 640), (720, 1280), (1080, 1920)]
+FRAMES = 20
+ROI_THIRD = ROI(1.0 / 6.0, 1.0 / 3.0, 2.0 / 3.0, 1.0 / 3.0)
+
+
+def laser_frame(shape_yx):
+    image = cv2.imread(os.path.join(os.path.dirname(__file__), '..', 'fake_image.png'))
+    image = cv2.resize(image, (shape_yx[1], shape_yx[0]))
+    center = shape_yx[1] // 2
+    image[:, center - 20:center - 17] = (40, 60, 250)
+    return image
+
+
+def run():
+    results = []
+    for shape_yx in SHAPES_YX:
+        frame = laser_frame(shape_yx)
+        cases = [
+            ('LaserDetector', LaserDetector((0, 0, 225), (255, 255, 255)), lambda image: image),
+            ('LaserDetector2', LaserDetector2(), lambda image: image),
+            ('FusedLaserDetector2', FusedLaserDetector2(), lambda image: image),
+            ('FusedLaserDetector2.roi_left_of_center', FusedLaserDetector2(), ROI_THIRD.get_left_of_center),
+        ]
+        for (name, laser_detector, crop) in cases:
+            laser_detector.detect(crop(frame))
+            seconds = best_of(lambda: [laser_detector.detect(crop(frame)) for idx in range(FRAMES)]) / FRAMES
+            results.append({
+                'name': 'laser_detector.{}.{}x{}'.format(name, shape_yx[1], shape_yx[0]),
+                'seconds': seconds,
+                'fps': int(1.0 / seconds),
+            })
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,38 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.metrics import MetricsRegistry
+from timing import best_of, report
+
+CALLS = 100000
+# camera read, encoder, detection, handler, get_points and preview are timed once per frame plus the frame counter
+TIMED_STAGES_PER_FRAME = 6
+FRAME_SECONDS = 1.0 / 30.0
+
+
+def timers(registry):
+    for idx in range(CALLS):
+        with registry.timer('detection'):
+            pass
+
+
+def run():
+    results = []
+    for (name, enabled) in [('disabled', False), ('enabled', True)]:
+        registry = MetricsRegistry(enabled=enabled)
+        seconds = best_of(lambda: timers(registry))
+        per_frame = TIMED_STAGES_PER_FRAME * seconds / CALLS
+        results.append({
+            'name': 'metrics.timer.{}'.format(name),
+            'seconds': seconds,
+            'calls': CALLS,
+            'frame_overhead_percent': round(100.0 * per_frame / FRAME_SECONDS, 4),
+        })
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
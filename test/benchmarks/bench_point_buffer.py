@@ -0,0 +1,53 @@
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.point_buffer import PointBuffer
+from timing import report
+
+SECTIONS = 3200
+POINTS_PER_SECTION = 480
+QUARTERS = 4
+
+
+def vstack_append(points_xyz, points):
+    if points_xyz is None:
+        return points
+    return np.vstack((points_xyz, points))
+
+
+def buffer_append(point_buffer, points):
+    point_buffer.append(points)
+    return point_buffer
+
+
+def per_section_seconds(append, initial):
+    points = np.random.random((POINTS_PER_SECTION, 3))
+    store = initial
+    timings = []
+    for section in range(SECTIONS):
+        start = time.time()
+        store = append(store, points)
+        timings.append(time.time() - start)
+    quarter = SECTIONS // QUARTERS
+    return [sum(timings[idx * quarter:(idx + 1) * quarter]) / quarter for idx in range(QUARTERS)]
+
+
+def run():
+    results = []
+    for (name, append, initial) in [('vstack', vstack_append, None), ('point_buffer', buffer_append, PointBuffer())]:
+        quarters = per_section_seconds(append, initial)
+        results.append({
+            'name': 'point_accumulation.{}.sections_{}'.format(name, SECTIONS),
+            'seconds': sum(quarters) * (SECTIONS // QUARTERS),
+            'per_section_us_by_quarter': ' / '.join(['{:.1f}'.format(quarter * 1000000.0) for quarter in quarters]),
+        })
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,45 @@
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.image_2_points import Image2Points
+from infrastructure.data_capture import PointCaptureXYZ
+from infrastructure.roi import ROI
+from bench_image_2_points import default_hardware, laser_line
+from timing import report
+
+SECTIONS = [200, 800, 3200]
+SHAPE_YX = (480, 640)
+
+
+def capture(img2points, laser_theta, sections, image, roi, batch_size):
+    point_capture = PointCaptureXYZ(sections, img2points, laser_theta, batch_size=batch_size)
+    start = time.time()
+    for section in range(sections):
+        point_capture.handle(laser_detection=image, section=section, roi=roi)
+    return time.time() - start, len(point_capture.points_xyz)
+
+
+def run():
+    hardware = default_hardware()
+    img2points = Image2Points(hardware, SHAPE_YX)
+    laser_theta = hardware.intersections_rad_mm[0][0]
+    image = laser_line(SHAPE_YX)
+    roi = ROI(0.0, 0.0, 1.0, 1.0)
+    results = []
+    for sections in SECTIONS:
+        for batch_size in [1, 32]:
+            seconds, points = capture(img2points, laser_theta, sections, image, roi, batch_size)
+            results.append({
+                'name': 'point_capture.sections_{}.batch_{}'.format(sections, batch_size),
+                'seconds': seconds,
+                'points_per_second': int(points / seconds),
+            })
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,55 @@
+import sys
+import os
+import io
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.point_thinning import PointThinner, VoxelThinner
+from infrastructure.gl_point_converter import GLConverter
+from infrastructure.writer import PLYWriter
+from timing import best_of, report
+
+POINT_COUNTS = [10000, 100000, 1000000]
+ASCII_POINT_LIMIT = 100000
+
+
+class NullThinner(object):
+    def thin(self, points):
+        return points
+
+
+def scan_points(count):
+    random = np.random.RandomState(0)
+    return random.uniform(-150.0, 150.0, (count, 3))
+
+
+def write(writer, points, outfile_class):
+    writer.write_cartisien_points(outfile_class(), points)
+
+
+def run():
+    results = []
+    for count in POINT_COUNTS:
+        points = scan_points(count)
+        cases = [
+            ('point_thinner.thin', lambda: PointThinner().thin(points)),
+            ('voxel_thinner.thin', lambda: VoxelThinner(0.5).thin(points)),
+            ('gl_converter.convert_xyz', lambda: GLConverter().convert_xyz(points)),
+            ('ply_writer.binary', lambda: write(PLYWriter(GLConverter(), NullThinner(), PLYWriter.binary_format, normals=True, uvs=True), points, io.BytesIO)),
+        ]
+        if count <= ASCII_POINT_LIMIT:
+            cases.append(('ply_writer.ascii', lambda: write(PLYWriter(GLConverter(), NullThinner(), PLYWriter.ascii_format, normals=True, uvs=True), points, io.StringIO)))
+        for (name, func) in cases:
+            seconds = best_of(func)
+            results.append({
+                'name': '{}.points_{}'.format(name, count),
+                'seconds': seconds,
+                'points_per_second': int(count / seconds),
+            })
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,124 @@
+import sys
+import os
+import glob
+import json
+import time
+import platform
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+
+from timing import report
+
+BENCHMARK_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def benchmark_modules(names=None):
+    modules = sorted([os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(BENCHMARK_PATH, 'bench_*.py'))])
+    if names:
+        modules = [module for module in modules if any([name in module for name in names])]
+    return modules
+
+
+def run_benchmarks(modules, rounds=1):
+    results = {}
+    for round_idx in range(rounds):
+        for module_name in modules:
+            print("Running {} round {} of {}".format(module_name, round_idx + 1, rounds))
+            module = __import__(module_name)
+            module_results = module.run()
+            report(module_results)
+            for result in module_results:
+                result['module'] = module_name
+                if result['name'] not in results or result['seconds'] < results[result['name']]['seconds']:
+                    results[result['name']] = result
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'system': platform.system(),
+    }
+
+
+def compare(baseline, results, tolerance):
+    regressions = []
+    missing = sorted(set(baseline) - set(results))
+    for name in sorted(results):
+        if name not in baseline:
+            print("{:<60} new".format(name))
+            continue
+        ratio = results[name]['seconds'] / baseline[name]['seconds'] if baseline[name]['seconds'] else 1.0
+        status = 'REGRESSION' if ratio > 1.0 + tolerance else 'ok'
+        print("{:<60} {:10.3f} ms {:10.3f} ms {:6.2f}x {}".format(name, baseline[name]['seconds'] * 1000.0, results[name]['seconds'] * 1000.0, ratio, status))
+        if status != 'ok':
+            regressions.append((name, ratio))
+    for name in missing:
+        print("{:<60} MISSING".format(name))
+    return regressions, missing
+
+
+def load(path):
+    with open(path) as afile:
+        return json.load(afile)
+
+
+def save(path, content):
+    with open(path, 'w') as afile:
+        json.dump(content, afile, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Peachy Scanner Benchmarks")
+    parser.add_argument('names', nargs='*', help="Only run benchmark modules whose name contains one of these")
+    parser.add_argument('-o', '--output',    dest='output',    action='store',      required=False, default=os.path.join(BENCHMARK_PATH, 'results.json'), help="File to write results to default: results.json")
+    parser.add_argument('-b', '--baseline',  dest='baseline',  action='store',      required=False, default=os.path.join(BENCHMARK_PATH, 'baseline.json'), help="Baseline to compare against default: baseline.json")
+    parser.add_argument('-t', '--tolerance', dest='tolerance', action='store',      required=False, type=float, default=0.25, help="Fraction slower than the baseline that counts as a regression default: 0.25")
+    parser.add_argument('-r', '--rounds',    dest='rounds',    action='store',      required=False, type=int, default=3, help="Times to run every benchmark keeping the fastest default: 3")
+    parser.add_argument('--require-baseline', dest='require_baseline', action='store_true', required=False, help="Fail when there is no baseline to compare against")
+    parser.add_argument('-u', '--update-baseline', dest='update_baseline', action='store_true', required=False, help="Replace the baseline with these results")
+    args = parser.parse_args()
+
+    results = run_benchmarks(benchmark_modules(args.names), args.rounds)
+    content = {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'environment': environment(), 'results': results}
+    save(args.output, content)
+    print("Results written to {}".format(args.output))
+
+    if args.update_baseline:
+        if args.names and os.path.exists(args.baseline):
+            baseline = load(args.baseline)
+            baseline['results'].update(results)
+            content['results'] = baseline['results']
+        save(args.baseline, content)
+        print("Baseline written to {}".format(args.baseline))
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print("No baseline at {}, run with --update-baseline to create one".format(args.baseline))
+        sys.exit(1 if args.require_baseline else 0)
+
+    baseline = load(args.baseline)
+    if baseline.get('environment') != content['environment']:
+        print("Baseline was recorded on {} this run is on {}".format(baseline.get('environment'), content['environment']))
+    baseline_results = baseline['results']
+    if args.names:
+        modules = set([result['module'] for result in results.values()])
+        baseline_results = dict([(name, result) for (name, result) in baseline_results.items() if result.get('module') in modules or name in results])
+    regressions, missing = compare(baseline_results, results, args.tolerance)
+    if regressions:
+        print("\n{} benchmarks regressed more than {:.0f}%:".format(len(regressions), args.tolerance * 100.0))
+        for (name, ratio) in regressions:
+            print("  {} {:.2f}x slower".format(name, ratio))
+    if missing:
+        print("\n{} benchmarks in the baseline did not run, update the baseline if they were removed or renamed:".format(len(missing)))
+        for name in missing:
+            print("  {}".format(name))
+    if regressions or missing:
+        sys.exit(1)
+    print("\nNo regressions against {}".format(args.baseline))
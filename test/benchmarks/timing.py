@@ -0,0 +1,18 @@
+import time
+
+
+def best_of(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        total = time.time() - start
+        if best is None or total < best:
+            best = total
+    return best
+
+
+def report(results):
+    for result in results:
+        extras = ''.join([', {}: {}'.format(key, value) for (key, value) in sorted(result.items()) if key not in ('name', 'seconds')])
+        print("{:<60} {:10.3f} ms{}".format(result['name'], result['seconds'] * 1000.0, extras))
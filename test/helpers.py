@@ -32,6 +32,8 @@ class FakeCamera(object):
             image = cv2.imread(os.path.join(path, file_image))
             self.image = image
         self.calls = -1
+        self.retained = 0
+        self.released = 0
 
     def read(self):
         self.calls += 1
@@ -40,3 +42,9 @@ class FakeCamera(object):
         self.image[:, 0] = a
         self.image[:, 1:] = b
         return self.image
+
+    def retain(self, frame):
+        self.retained += 1
+
+    def release(self, frame):
+        self.released += 1
@@ -3,6 +3,7 @@ import sys
 import os
 import logging
 import cv2
+import numpy as np
 from mock import Mock, patch
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -57,6 +58,47 @@ class CameraTest(unittest.TestCase):
 
         self.assertEqual(expected_image, actual_image)
 
+    def test_read_should_fill_frames_from_the_frame_pool(self, mock_VideoCapture):
+        mock_video_capture = mock_VideoCapture.return_value
+        mock_video_capture.read.side_effect = lambda frame=None: (True, frame if frame is not None else np.zeros((10, 20, 3), dtype='uint8'))
+        camera = Camera(frame_pool_size=2)
+        camera.start()
+
+        frame = camera.read()
+
+        self.assertTrue(mock_video_capture.read.call_args[0][0] is frame)
+        self.assertEqual((10, 20, 3), frame.shape)
+
+    def test_released_frames_are_reused_by_read(self, mock_VideoCapture):
+        mock_video_capture = mock_VideoCapture.return_value
+        mock_video_capture.read.side_effect = lambda frame=None: (True, frame if frame is not None else np.zeros((10, 20, 3), dtype='uint8'))
+        camera = Camera(frame_pool_size=2)
+        camera.start()
+
+        frames = []
+        for idx in range(5):
+            frame = camera.read()
+            frames.append(frame)
+            camera.release(frame)
+
+        self.assertTrue(all([frame is frames[0] for frame in frames]))
+        self.assertEqual(1, camera.frame_pool.allocations)
+
+    def test_retained_frames_are_not_reused_by_read(self, mock_VideoCapture):
+        mock_video_capture = mock_VideoCapture.return_value
+        mock_video_capture.read.side_effect = lambda frame=None: (True, frame if frame is not None else np.zeros((10, 20, 3), dtype='uint8'))
+        camera = Camera(frame_pool_size=2)
+        camera.start()
+
+        first = camera.read()
+        camera.retain(first)
+        camera.release(first)
+        second = camera.read()
+        camera.release(second)
+        third = camera.read()
+
+        self.assertFalse(third is first)
+
     def test_shape_returns_frame_shape_when_camera_running(self, mock_VideoCapture):
         expected_image = Mock()
         expected_image.shape = (10, 20, 3)
@@ -149,6 +191,94 @@ class CameraTest(unittest.TestCase):
         with self.assertRaises(Exception):
             camera.set_setting('Pizza', 1.0)
 
+    def _capture_with_properties(self, mock_VideoCapture, properties):
+        mock_video_capture = mock_VideoCapture.return_value
+        mock_video_capture.get.side_effect = lambda prop: properties.get(prop, 0.0)
+
+        def set_property(prop, value):
+            properties[prop] = value
+            return True
+        mock_video_capture.set.side_effect = set_property
+        mock_video_capture.read.side_effect = lambda frame=None: (True, np.zeros((int(properties[cv2.CAP_PROP_FRAME_HEIGHT]), int(properties[cv2.CAP_PROP_FRAME_WIDTH]), 3), dtype='uint8'))
+        return mock_video_capture
+
+    def test_set_capture_mode_should_raise_exception_if_camera_not_started(self, mock_VideoCapture):
+        camera = Camera()
+        with self.assertRaises(Exception):
+            camera.set_capture_mode(640, 480)
+
+    def test_set_capture_mode_sets_fourcc_before_size_and_returns_mode_in_effect(self, mock_VideoCapture):
+        properties = {cv2.CAP_PROP_FRAME_WIDTH: 640, cv2.CAP_PROP_FRAME_HEIGHT: 480, cv2.CAP_PROP_FPS: 15.0}
+        mock_video_capture = self._capture_with_properties(mock_VideoCapture, properties)
+        camera = Camera()
+        camera.start()
+
+        mode = camera.set_capture_mode(1280, 720, 30, 'MJPG')
+
+        self.assertEqual(cv2.CAP_PROP_FOURCC, mock_video_capture.set.call_args_list[0][0][0])
+        self.assertEqual({'width': 1280, 'height': 720, 'fps': 30, 'fourcc': 'MJPG'}, mode)
+        self.assertEqual((720, 1280, 3), camera.shape)
+
+    def test_set_capture_mode_leaves_unspecified_properties_alone(self, mock_VideoCapture):
+        properties = {cv2.CAP_PROP_FRAME_WIDTH: 640, cv2.CAP_PROP_FRAME_HEIGHT: 480, cv2.CAP_PROP_FPS: 15.0}
+        mock_video_capture = self._capture_with_properties(mock_VideoCapture, properties)
+        camera = Camera()
+        camera.start()
+
+        camera.set_capture_mode(fps=30)
+
+        mock_video_capture.set.assert_called_once_with(cv2.CAP_PROP_FPS, 30)
+
+    def test_set_capture_mode_keeps_previous_shape_when_no_frame_is_read(self, mock_VideoCapture):
+        properties = {cv2.CAP_PROP_FRAME_WIDTH: 640, cv2.CAP_PROP_FRAME_HEIGHT: 480}
+        mock_video_capture = self._capture_with_properties(mock_VideoCapture, properties)
+        camera = Camera()
+        camera.start()
+        mock_video_capture.read.side_effect = lambda frame=None: (False, None)
+
+        camera.set_capture_mode(1280, 720)
+
+        self.assertEqual((480, 640, 3), camera.shape)
+        self.assertEqual(0, camera.frame_pool.in_use)
+
+    def test_set_capture_mode_rejects_bad_fourcc(self, mock_VideoCapture):
+        self._capture_with_properties(mock_VideoCapture, {cv2.CAP_PROP_FRAME_WIDTH: 640, cv2.CAP_PROP_FRAME_HEIGHT: 480})
+        camera = Camera()
+        camera.start()
+        with self.assertRaises(Exception):
+            camera.set_capture_mode(fourcc='MJPEG')
+
+    def test_start_applies_capture_mode(self, mock_VideoCapture):
+        properties = {cv2.CAP_PROP_FRAME_WIDTH: 640, cv2.CAP_PROP_FRAME_HEIGHT: 480}
+        self._capture_with_properties(mock_VideoCapture, properties)
+        camera = Camera(capture_mode={'width': 320, 'height': 240})
+
+        camera.start()
+
+        self.assertEqual((240, 320, 3), camera.shape)
+
+    @patch('infrastructure.frame_source.monotonic')
+    def test_probe_fps_reports_frames_per_second(self, mock_monotonic, mock_VideoCapture):
+        self._capture_with_properties(mock_VideoCapture, {cv2.CAP_PROP_FRAME_WIDTH: 640, cv2.CAP_PROP_FRAME_HEIGHT: 480})
+        mock_monotonic.side_effect = [10.0, 12.0]
+        camera = Camera()
+        camera.start()
+
+        self.assertAlmostEqual(5.0, camera.probe_fps(10))
+        self.assertEqual(0, camera.frame_pool.in_use)
+
+    def test_probe_modes_restores_original_mode(self, mock_VideoCapture):
+        properties = {cv2.CAP_PROP_FRAME_WIDTH: 640, cv2.CAP_PROP_FRAME_HEIGHT: 480, cv2.CAP_PROP_FPS: 15.0}
+        self._capture_with_properties(mock_VideoCapture, properties)
+        camera = Camera()
+        camera.start()
+
+        results = camera.probe_modes([{'width': 320, 'height': 240}, {'width': 1280, 'height': 720}], frames=2)
+
+        self.assertEqual(set([320, 1280]), set([result['actual']['width'] for result in results]))
+        self.assertTrue(all(['measured_fps' in result for result in results]))
+        self.assertEqual(640, camera.get_capture_mode()['width'])
+        self.assertEqual((480, 640, 3), camera.shape)
 
 if __name__ == '__main__':
     logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
@@ -217,6 +217,83 @@ class PointCaptureXYZTest(unittest.TestCase):
         self.img2point.get_points.assert_called_with(frame, expected_rad, self.roi, self.laser_theta)
 
 
+    def test_handle_calls_img2points_line_points_when_subpixel(self):
+        sections = 200
+        frame = np.ones((200, 200), dtype='uint8')
+        self.img2point.get_line_points.return_value = np.array([1.0, 1.0, 1.0])
+        point_capture = PointCaptureXYZ(sections, self.img2point, self.laser_theta, subpixel=True)
+
+        point_capture.handle(laser_detection=frame, section=0, roi=self.roi)
+
+        self.img2point.get_line_points.assert_called_with(frame, 0, self.roi, self.laser_theta)
+        self.assertFalse(self.img2point.get_points.called)
+
+    def test_handle_batches_sections_before_rotating(self):
+        sections = 4
+        frame = np.ones((200, 200), dtype='uint8')
+        self.img2point.get_masked_points.side_effect = [np.array([[1.0, 1.0, 1.0]]), np.array([[2.0, 2.0, 2.0], [3.0, 3.0, 3.0]])]
+        self.img2point.rotate_sections.side_effect = lambda points, points_section, sections: points
+        point_capture = PointCaptureXYZ(sections, self.img2point, self.laser_theta, batch_size=2)
+
+        point_capture.handle(laser_detection=frame, section=0, roi=self.roi)
+        self.assertFalse(self.img2point.rotate_sections.called)
+        point_capture.handle(laser_detection=frame, section=1, roi=self.roi)
+
+        points, points_section, rotate_sections = self.img2point.rotate_sections.call_args[0]
+        self.assertEqual([0, 1, 1], list(points_section))
+        self.assertEqual(sections, rotate_sections)
+        self.assertTrue((np.array([[1.0, 1.0, 1.0], [2.0, 2.0, 2.0], [3.0, 3.0, 3.0]]) == point_capture.points_xyz).all())
+        self.assertFalse(self.img2point.get_points.called)
+
+    def test_handle_flushes_partial_batch_when_complete(self):
+        sections = 3
+        frame = np.ones((200, 200), dtype='uint8')
+        self.img2point.get_masked_points.return_value = np.array([[1.0, 1.0, 1.0]])
+        self.img2point.rotate_sections.side_effect = lambda points, points_section, sections: points
+        point_capture = PointCaptureXYZ(sections, self.img2point, self.laser_theta, batch_size=2)
+
+        for idx in range(sections):
+            point_capture.handle(laser_detection=frame, section=idx, roi=self.roi)
+
+        self.assertTrue(point_capture.complete)
+        self.assertEqual((3, 3), point_capture.points_xyz.shape)
+
+    def test_handle_rotates_by_fractional_section_when_interpolated(self):
+        sections = 200
+        frame = np.ones((200, 200), dtype='uint8')
+        self.img2point.get_points.return_value = np.array([[1.0, 1.0, 1.0]])
+        point_capture = PointCaptureXYZ(sections, self.img2point, self.laser_theta, interpolate=True)
+
+        point_capture.handle(laser_detection=frame, section=2.5, roi=self.roi, tick=False)
+
+        self.assertTrue(point_capture.interpolated)
+        self.img2point.get_points.assert_called_with(frame, (2.5 / sections) * 2.0 * np.pi, self.roi, self.laser_theta)
+
+    def test_handle_only_counts_encoder_ticks_towards_completion(self):
+        sections = 2
+        frame = np.ones((200, 200), dtype='uint8')
+        self.img2point.get_points.return_value = np.array([[1.0, 1.0, 1.0]])
+        point_capture = PointCaptureXYZ(sections, self.img2point, self.laser_theta, interpolate=True)
+
+        for (section, tick) in [(0.0, True), (0.3, False), (0.6, False), (1.0, True)]:
+            result = point_capture.handle(laser_detection=frame, section=section, roi=self.roi, tick=tick)
+
+        self.assertFalse(result)
+        self.assertTrue(point_capture.complete)
+        self.assertEqual((4, 3), point_capture.points_xyz.shape)
+
+    def test_handle_counts_skipped_sections_towards_completion(self):
+        sections = 10
+        frame = np.ones((200, 200), dtype='uint8')
+        self.img2point.get_points.return_value = np.array([[1.0, 1.0, 1.0]])
+        point_capture = PointCaptureXYZ(sections, self.img2point, self.laser_theta)
+
+        results = [point_capture.handle(laser_detection=frame, section=section, roi=self.roi) for section in [7, 8, 1, 2, 3, 4, 5, 6]]
+
+        self.assertEqual([True] * 7 + [False], results)
+        self.assertTrue(point_capture.complete)
+        self.assertEqual((8, 3), point_capture.points_xyz.shape)
+
     def test_handle_stores_points(self):
         sections = 200
         frame = np.ones((200, 200), dtype='uint8')
@@ -69,6 +69,68 @@ class EncoderTest(unittest.TestCase):
         self.assertEqual(0, rotation)
 
 
+    def test_section_position_is_position_until_tick_interval_known(self):
+        encoder = Encoder(sections=10)
+        encoder.should_capture_frame_for_section(self.whiteimage, 1.0)
+
+        self.assertEqual(1.0, encoder.section_position(1.5))
+
+    def test_section_position_interpolates_between_ticks(self):
+        encoder = Encoder(sections=10)
+        encoder.should_capture_frame_for_section(self.whiteimage, 1.0)
+        encoder.should_capture_frame_for_section(self.blackimage, 2.0)
+
+        self.assertEqual(1.0, encoder.tick_interval)
+        self.assertAlmostEqual(2.25, encoder.section_position(2.25))
+        self.assertAlmostEqual(2.999, encoder.section_position(5.0))
+
+    def test_section_position_wraps_at_sections(self):
+        encoder = Encoder(sections=2)
+        encoder.should_capture_frame_for_section(self.whiteimage, 1.0)
+        encoder.should_capture_frame_for_section(self.blackimage, 2.0)
+
+        self.assertAlmostEqual(0.5, encoder.section_position(2.5))
+
+    def test_tick_interval_is_smoothed(self):
+        encoder = Encoder(sections=10)
+        for (image, timestamp) in [(self.whiteimage, 0.0), (self.blackimage, 1.0), (self.whiteimage, 3.0)]:
+            encoder.should_capture_frame_for_section(image, timestamp)
+
+        self.assertAlmostEqual(1.3, encoder.tick_interval)
+
+    def test_should_capture_frame_for_section_corrects_position_for_missed_ticks(self):
+        encoder = Encoder(sections=10)
+        for (image, timestamp) in [(self.whiteimage, 0.0), (self.blackimage, 1.0), (self.whiteimage, 2.0), (self.blackimage, 5.0)]:
+            result = encoder.should_capture_frame_for_section(image, timestamp)
+
+        self.assertEqual((True, 6), result)
+        self.assertEqual(2, encoder.missed_ticks)
+        self.assertEqual(1, encoder.late_frames)
+        self.assertAlmostEqual(1.0, encoder.tick_interval)
+
+    def test_should_capture_frame_for_section_does_not_count_missed_ticks_when_frames_are_frequent(self):
+        encoder = Encoder(sections=10)
+        frames = [(self.whiteimage, 0.0), (self.blackimage, 1.0)] + [(self.blackimage, 1.0 + idx * 0.5) for idx in range(1, 6)] + [(self.whiteimage, 4.0)]
+        for (image, timestamp) in frames:
+            result = encoder.should_capture_frame_for_section(image, timestamp)
+
+        self.assertEqual((True, 3), result)
+        self.assertEqual(0, encoder.missed_ticks)
+        self.assertEqual(0, encoder.late_frames)
+
+    def test_metrics_counts_frames_and_ticks(self):
+        encoder = Encoder(sections=10)
+        for (image, timestamp) in [(self.whiteimage, 0.0), (self.whiteimage, 0.5), (self.blackimage, 1.0)]:
+            encoder.should_capture_frame_for_section(image, timestamp)
+
+        self.assertEqual({'frames': 3, 'ticks': 2, 'missed_ticks': 0, 'late_frames': 0, 'tick_interval': 1.0}, encoder.metrics)
+
+    def test_should_capture_frame_for_section_uses_clock_without_timestamp(self):
+        encoder = Encoder(sections=10, clock=lambda: 42.0)
+        encoder.should_capture_frame_for_section(self.whiteimage)
+
+        self.assertEqual(42.0, encoder.tick_time)
+
     def test_thrshold_changes_threshold(self):
         blackimage = np.ones((100, 100, 3), dtype='uint8') * 100
         expected = [1, 0, 1, 0, 0, 1, 0, 1]
@@ -125,6 +187,62 @@ class EncoderTest(unittest.TestCase):
         resulting_image = encoder.overlay_encoder(self.blackimage)
         self.assertTrue((resulting_image[52][52] == [0, 255, 0]).all())
 
+    def test_encoders_do_not_share_history(self):
+        encoder1 = Encoder()
+        encoder2 = Encoder()
+
+        encoder1.process(self.whiteimage)
+
+        self.assertEqual([765], encoder1.history.tolist())
+        self.assertEqual([], encoder2.history.tolist())
+
+    def test_history_keeps_most_recent_values_oldest_first(self):
+        encoder = Encoder(history_length=3)
+        for value in [1, 2, 3, 4, 5]:
+            encoder.process(np.ones((10, 10, 3), dtype='uint8') * value)
+
+        self.assertEqual([9, 12, 15], encoder.history.tolist())
+
+    def test_history_is_a_view_of_the_ring_buffer(self):
+        encoder = Encoder(history_length=3)
+        for value in [1, 2, 3, 4]:
+            encoder.process(np.ones((10, 10, 3), dtype='uint8') * value)
+
+        self.assertTrue(encoder.history.base is encoder._history_buffer)
+
+    def test_overlay_encoder_patch_is_small_and_matches_full_overlay(self):
+        encoder = Encoder(point=[0.5, 0.5])
+        encoder.process(self.whiteimage)
+
+        patch = encoder.overlay_encoder_patch(self.blackimage.shape)
+
+        self.assertEqual((13, 13, 3), patch.shape)
+        self.assertTrue((patch.composite(np.zeros((100, 100, 3), dtype='uint8')) == encoder.overlay_encoder(self.blackimage)).all())
+        self.assertTrue((patch.image[6, 3] == [0, 255, 0]).all())
+        self.assertEqual((44, 44), (patch.x, patch.y))
+
+    def test_overlay_history_patch_covers_only_the_history_columns(self):
+        image = np.ones((255, 255, 3), dtype='uint8') * 10
+        encoder = Encoder(point=[0.5, 0.5], threshold=300, null_zone=150, history_length=10)
+        encoder.process(image)
+
+        patch = encoder.overlay_history_patch(image.shape)
+
+        self.assertEqual(255, patch.shape[0])
+        self.assertTrue(patch.shape[1] < 20)
+        self.assertTrue((patch.composite(np.zeros(image.shape, dtype='uint8')) == encoder.overlay_history(image)).all())
+
+    def test_threshold_lines_are_cached_until_threshold_changes(self):
+        encoder = Encoder(threshold=300, null_zone=150)
+        lines = encoder._threshold_lines(255)[0]
+
+        self.assertTrue(lines is encoder._threshold_lines(255)[0])
+        encoder.threshold = 200
+        self.assertFalse(lines is encoder._threshold_lines(255)[0])
+        changed = encoder._threshold_lines(255)[0]
+        encoder.null_zone = 100
+        self.assertFalse(changed is encoder._threshold_lines(255)[0])
+
     def test_overlay_history_shows_threshold_and_null_lines(self):
         image = np.ones((255, 255, 3), dtype='uint8') * 10
         encoder = Encoder(point=[0.5, 0.5], threshold=300, null_zone=150)
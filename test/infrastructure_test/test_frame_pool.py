@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import logging
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.frame_pool import FramePool
+
+
+class FramePoolTest(unittest.TestCase):
+    def test_acquire_returns_buffer_of_shape_and_type(self):
+        frame = FramePool(2).acquire((4, 5, 3))
+        self.assertEqual((4, 5, 3), frame.shape)
+        self.assertEqual(np.dtype('uint8'), frame.dtype)
+
+    def test_released_buffers_are_reused(self):
+        pool = FramePool(2)
+        frames = [pool.acquire((4, 5, 3)) for idx in range(2)]
+        for frame in frames:
+            pool.release(frame)
+
+        again = [pool.acquire((4, 5, 3)) for idx in range(2)]
+
+        self.assertTrue(again[0] is frames[0])
+        self.assertTrue(again[1] is frames[1])
+        self.assertEqual(2, pool.allocations)
+
+    def test_buffers_are_handed_out_in_ring_order(self):
+        pool = FramePool(3)
+        frames = [pool.acquire((2, 2, 3)) for idx in range(3)]
+        for frame in frames:
+            pool.release(frame)
+
+        self.assertTrue(pool.acquire((2, 2, 3)) is frames[0])
+        self.assertTrue(pool.acquire((2, 2, 3)) is frames[1])
+
+    def test_retained_buffers_are_not_reused_until_all_references_released(self):
+        pool = FramePool(1)
+        frame = pool.acquire((2, 2, 3))
+        pool.retain(frame)
+        pool.release(frame)
+
+        other = pool.acquire((2, 2, 3))
+        self.assertFalse(other is frame)
+
+        pool.release(frame)
+        self.assertTrue(pool.acquire((2, 2, 3)) is frame)
+
+    def test_acquire_allocates_untracked_frame_when_exhausted(self):
+        pool = FramePool(1)
+        pool.acquire((2, 2, 3))
+
+        extra = pool.acquire((2, 2, 3))
+        pool.release(extra)
+
+        self.assertEqual(1, len(pool))
+        self.assertEqual(1, pool.exhausted)
+        self.assertEqual(2, pool.allocations)
+        self.assertEqual(1, pool.in_use)
+
+    def test_ensure_size_grows_but_never_shrinks(self):
+        pool = FramePool(2)
+        pool.ensure_size(5)
+        pool.ensure_size(3)
+
+        frames = [pool.acquire((2, 2, 3)) for idx in range(5)]
+
+        self.assertEqual(5, pool.size)
+        self.assertEqual(5, len(pool))
+        self.assertEqual(0, pool.exhausted)
+
+    def test_stats_reports_size_use_and_exhaustion(self):
+        pool = FramePool(1)
+        pool.acquire((2, 2, 3))
+        pool.acquire((2, 2, 3))
+
+        self.assertEqual({'size': 1, 'in_use': 1, 'allocations': 2, 'exhausted': 1}, pool.stats)
+
+    def test_acquire_with_new_shape_replaces_buffers(self):
+        pool = FramePool(2)
+        frame = pool.acquire((2, 2, 3))
+        pool.release(frame)
+
+        result = pool.acquire((3, 3, 3))
+
+        self.assertEqual((3, 3, 3), result.shape)
+        self.assertEqual(1, len(pool))
+
+    def test_release_ignores_frames_not_from_pool(self):
+        pool = FramePool(1)
+        pool.release(np.zeros((2, 2, 3)))
+        self.assertEqual(0, pool.in_use)
+
+    def test_size_must_be_at_least_one(self):
+        with self.assertRaises(Exception):
+            FramePool(0)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
+    unittest.main()
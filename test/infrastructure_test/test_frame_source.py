@@ -0,0 +1,188 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import cv2
+import numpy as np
+import logging
+
+from mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.frame_source import FrameSource, VideoFileSource, ImageDirectorySource, SyntheticSource, open_frame_source
+from infrastructure.camera import Camera
+from infrastructure.encoder import Encoder
+from infrastructure.laser_detector import FusedLaserDetector2
+from infrastructure.roi import ROI
+from infrastructure.video_processor import VideoProcessor
+
+
+class ImageDirectorySourceTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        for idx in range(3):
+            cv2.imwrite(os.path.join(self.path, 'frame_{:03d}.png'.format(idx)), np.ones((6, 8, 3), dtype='uint8') * idx)
+        with open(os.path.join(self.path, 'notes.txt'), 'w') as afile:
+            afile.write('not an image')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_read_raises_exception_when_not_started(self):
+        with self.assertRaises(Exception):
+            ImageDirectorySource(self.path).read()
+
+    def test_start_raises_exception_when_directory_has_no_images(self):
+        empty = tempfile.mkdtemp()
+        try:
+            with self.assertRaises(Exception):
+                ImageDirectorySource(empty).start()
+        finally:
+            shutil.rmtree(empty)
+
+    def test_read_returns_images_in_name_order_and_loops(self):
+        source = ImageDirectorySource(self.path)
+        source.start()
+
+        values = []
+        for idx in range(5):
+            frame = source.read()
+            values.append(int(frame[0, 0, 0]))
+            source.release(frame)
+
+        self.assertEqual((6, 8, 3), source.shape)
+        self.assertEqual([0, 1, 2, 0, 1], values)
+
+    def test_read_returns_none_at_end_without_loop(self):
+        source = ImageDirectorySource(self.path, loop=False)
+        source.start()
+
+        frames = [source.read() for idx in range(4)]
+
+        self.assertTrue(frames[2] is not None)
+        self.assertEqual(None, frames[3])
+
+    def test_read_fills_frames_from_the_frame_pool(self):
+        source = ImageDirectorySource(self.path, frame_pool_size=2)
+        source.start()
+
+        for idx in range(4):
+            source.release(source.read())
+
+        self.assertEqual(1, source.frame_pool.allocations)
+
+    def test_set_capture_mode_is_ignored(self):
+        source = ImageDirectorySource(self.path, fps=10)
+        source.start()
+
+        self.assertEqual({'width': 8, 'height': 6, 'fps': 10, 'fourcc': None}, source.set_capture_mode(640, 480))
+
+    def test_video_processor_stops_when_source_has_no_more_frames(self):
+        source = ImageDirectorySource(self.path, loop=False)
+        source.start()
+        encoder = Encoder()
+        roi = ROI(0.0, 0.0, 1.0, 1.0)
+        for pipelined in [False, True]:
+            video_processor = VideoProcessor(source, encoder, roi, FusedLaserDetector2(225, 'red'), pipelined=pipelined)
+            video_processor.start()
+            video_processor.join(2)
+
+            self.assertFalse(video_processor.is_alive())
+            source.start()
+
+
+class VideoFileSourceTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.filename = os.path.join(self.path, 'video.avi')
+        writer = cv2.VideoWriter(self.filename, cv2.VideoWriter_fourcc(*'MJPG'), 10, (32, 24))
+        for idx in range(4):
+            writer.write(np.ones((24, 32, 3), dtype='uint8') * idx * 60)
+        writer.release()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_start_raises_exception_when_file_does_not_exist(self):
+        with self.assertRaises(Exception):
+            VideoFileSource(os.path.join(self.path, 'missing.avi')).start()
+
+    def test_read_returns_frames_and_loops(self):
+        source = VideoFileSource(self.filename)
+        source.start()
+
+        values = [int(source.read()[12, 16].mean()) for idx in range(6)]
+        source.stop()
+
+        self.assertEqual((24, 32, 3), source.shape)
+        self.assertEqual(values[:2], values[4:])
+        self.assertTrue(values[0] < values[1] < values[2] < values[3])
+
+    def test_read_returns_none_at_end_without_loop(self):
+        source = VideoFileSource(self.filename, loop=False)
+        source.start()
+
+        frames = [source.read() for idx in range(5)]
+        source.stop()
+
+        self.assertEqual(None, frames[4])
+
+
+class SyntheticSourceTest(unittest.TestCase):
+    def test_encoder_marker_changes_every_frames_per_tick_frames(self):
+        source = SyntheticSource(shape=(60, 80, 3), fps=None, frames_per_tick=2)
+        source.start()
+        encoder = Encoder(point=(0.2, 0.2))
+
+        ticks = [encoder.should_capture_frame_for_section(source.read(), idx)[0] for idx in range(8)]
+
+        self.assertEqual([False, False, True, False, True, False, True, False], ticks)
+
+    def test_frames_have_a_detectable_laser_left_of_center(self):
+        source = SyntheticSource(shape=(60, 80, 3), fps=None)
+        source.start()
+
+        detected = FusedLaserDetector2(225, 'red').detect(source.read())
+
+        rows, columns = np.nonzero(detected)
+        self.assertEqual(60, len(np.unique(rows)))
+        self.assertTrue((columns < 40).all())
+
+    @patch('infrastructure.frame_source.time.sleep')
+    @patch('infrastructure.frame_source.monotonic')
+    def test_read_is_paced_at_fps(self, mock_monotonic, mock_sleep):
+        mock_monotonic.side_effect = [10.0, 10.01, 10.08]
+        source = SyntheticSource(shape=(6, 8, 3), fps=10.0)
+        source.start()
+
+        for idx in range(3):
+            source.read()
+
+        self.assertEqual(2, mock_sleep.call_count)
+        self.assertAlmostEqual(0.09, mock_sleep.call_args_list[0][0][0])
+        self.assertAlmostEqual(0.12, mock_sleep.call_args_list[1][0][0])
+
+
+class OpenFrameSourceTest(unittest.TestCase):
+    def test_open_frame_source_chooses_source_from_spec(self):
+        path = tempfile.mkdtemp()
+        try:
+            self.assertTrue(isinstance(open_frame_source(None), Camera))
+            self.assertTrue(isinstance(open_frame_source('camera'), Camera))
+            self.assertTrue(isinstance(open_frame_source('synthetic'), SyntheticSource))
+            self.assertEqual(15, open_frame_source('synthetic', 15).fps)
+            self.assertTrue(isinstance(open_frame_source(path), ImageDirectorySource))
+            self.assertTrue(isinstance(open_frame_source(os.path.join(path, 'video.avi')), VideoFileSource))
+        finally:
+            shutil.rmtree(path)
+
+    def test_camera_is_a_frame_source(self):
+        self.assertTrue(isinstance(Camera(), FrameSource))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
+    unittest.main()
@@ -48,6 +48,17 @@ class HardwareConfigurationTest(unittest.TestCase):
         self.assertTrue(expected[0][0], hardware_config.laser_intersections_rad_xyz[0][0])
         self.assertTrue((expected[0][1] == hardware_config.laser_intersections_rad_xyz[0][1]).all())
 
+    def test_from_config_reads_values_with_defaults(self):
+        values = {('peachyscanner.hardware', 'camera_focal_length_mm'): '4.0', ('peachyscanner.hardware', 'laser_intersection_degree_2'): '30.0'}
+        hardware_config = HardwareConfiguration.from_config(lambda section, option, default: values.get((section, option), default))
+
+        self.assertEqual(4.0, hardware_config.focal_length_mm)
+        self.assertEqual((10.0, 10.0), hardware_config.sensor_size_xy_mm)
+        self.assertEqual(100.0, hardware_config.focal_point_to_center_mm)
+        self.assertEqual(5, len(hardware_config.intersections_rad_mm))
+        self.assertAlmostEqual(np.deg2rad(30.0), hardware_config.intersections_rad_mm[1][0])
+        self.assertEqual(208.9, hardware_config.intersections_rad_mm[1][1])
+
 if __name__ == '__main__':
     logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
     unittest.main()
@@ -11,6 +11,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
 from infrastructure.image_2_points import Image2Points
+from infrastructure.laser_line import LaserLine
 from infrastructure.hardware import HardwareConfiguration
 from infrastructure.roi import ROI
 
@@ -342,6 +343,204 @@ class PointConverterTest(unittest.TestCase):
 
         self.assert_array(expected, result)
 
+    def test_get_line_points_returns_one_point_per_row(self):
+        camera_pixels_shape_yx = (480, 640)
+        i2p = self.setup_i2p(camera_pixels_shape_yx=camera_pixels_shape_yx)
+        image = np.zeros(camera_pixels_shape_yx).astype('uint8')
+        image[:, 39:42] = 255
+        image[100, :] = 0
+
+        result = i2p.get_line_points(image, 0, ROI(0, 0, 1, 1), np.pi / 4)
+
+        self.assertEquals((479, 3), result.shape)
+
+    def test_get_line_points_uses_weighted_center_of_line(self):
+        camera_pixels_shape_yx = (4, 8)
+        i2p = self.setup_i2p(camera_pixels_shape_yx=camera_pixels_shape_yx, camera_sensor_size_mm_xy=(8, 4), focal_length_mm=3.0)
+        image = np.zeros(camera_pixels_shape_yx).astype('uint8')
+        image[1, 1:4] = [100, 200, 100]
+        image[2, 2:4] = [100, 100]
+        table = i2p._posisition_mask_yx[np.pi / 4]
+        expected = np.array([table[1, 2], (table[2, 2] + table[2, 3]) / 2.0])
+
+        result = i2p.get_line_points(image, 0, ROI(0, 0, 1, 1), np.pi / 4)
+
+        self.assert_array(expected, result)
+
+    def test_get_line_points_should_roi(self):
+        camera_pixels_shape_yx = (4, 4)
+        i2p = self.setup_i2p(camera_pixels_shape_yx=camera_pixels_shape_yx, camera_sensor_size_mm_xy=(4, 4), focal_length_mm=3.0)
+        image = np.zeros(camera_pixels_shape_yx).astype('uint8')
+        image[:, 1] = 255
+        table = i2p._posisition_mask_yx[np.pi / 4]
+
+        result = i2p.get_line_points(image, 0, ROI(.25, .25, 0.5, 0.5), np.pi / 4)
+
+        self.assert_array(table[1:3, 1], result)
+
+    def test_rotation_table_has_a_rotation_per_section(self):
+        i2p = self.setup_i2p()
+
+        result = i2p.rotation_table(200)
+
+        self.assertEqual((200, 3, 3), result.shape)
+        self.assertTrue(np.allclose(i2p._rotation_matrix(np.pi / 2.0), result[50]))
+
+    def test_rotate_sections_matches_get_points_for_each_section(self):
+        camera_pixels_shape_yx = (3, 3)
+        sections = 8
+        i2p = self.setup_i2p(camera_pixels_shape_yx=camera_pixels_shape_yx, camera_sensor_size_mm_xy=(3.0, 3.0), focal_length_mm=3.0)
+        image = np.ones(camera_pixels_shape_yx).astype('bool')
+        roi = ROI(0, 0, 1, 1)
+        masked = i2p.get_masked_points(image, roi, np.pi / 4)
+        points = np.vstack([masked, masked, masked])
+        points_section = np.repeat([0, 3, 10], len(masked))
+        expected = np.vstack([i2p.get_points(image, (section / float(sections)) * 2.0 * np.pi, roi, np.pi / 4) for section in [0, 3, 2]])
+
+        result = i2p.rotate_sections(points, points_section, sections)
+
+        self.assert_array(expected, result, atol=1e-06)
+
+    def test_compile_roi_crops_contiguous_intersections(self):
+        camera_pixels_shape_yx = (4, 4)
+        i2p = self.setup_i2p(camera_pixels_shape_yx=camera_pixels_shape_yx, camera_sensor_size_mm_xy=(4, 4), focal_length_mm=3.0)
+        roi = ROI(.25, .25, 0.5, 0.5)
+
+        compiled_roi = i2p.compile_roi(roi)
+
+        table = compiled_roi.tables[np.pi / 4]
+        self.assertTrue(table.flags['C_CONTIGUOUS'])
+        self.assertTrue((i2p._posisition_mask_yx[np.pi / 4][1:3, 1:3] == table).all())
+        self.assertTrue(compiled_roi.matches(roi.copy()))
+
+    def test_get_points_recompiles_when_roi_changes(self):
+        camera_pixels_shape_yx = (4, 4)
+        i2p = self.setup_i2p(camera_pixels_shape_yx=camera_pixels_shape_yx, camera_sensor_size_mm_xy=(4, 4), focal_length_mm=3.0)
+        image = np.ones((4, 4)).astype('bool')
+        i2p.compile_roi(ROI(.25, .25, 0.5, 0.5))
+
+        result = i2p.get_points(image, 0, ROI(0, 0, 1, 1), np.pi / 4)
+
+        self.assertEqual(16, len(result))
+
+    def test_get_points_accepts_left_of_center_crop_of_roi(self):
+        camera_pixels_shape_yx = (8, 8)
+        i2p = self.setup_i2p(camera_pixels_shape_yx=camera_pixels_shape_yx, camera_sensor_size_mm_xy=(4, 4), focal_length_mm=3.0)
+        roi = ROI(.125, .25, 0.75, 0.5)
+        image = np.zeros(camera_pixels_shape_yx, dtype='uint8')
+        image[2:6, 2] = 255
+        image[3, 3] = 255
+        expected = i2p.get_points(image, 0.3, roi, np.pi / 4)
+
+        result = i2p.get_points(roi.get_left_of_center(image).copy(), 0.3, roi, np.pi / 4)
+
+        self.assertEqual(5, len(result))
+        self.assert_array(expected, result, atol=1e-09)
+
+    def test_get_line_points_accepts_left_of_center_crop_of_roi(self):
+        camera_pixels_shape_yx = (8, 8)
+        i2p = self.setup_i2p(camera_pixels_shape_yx=camera_pixels_shape_yx, camera_sensor_size_mm_xy=(4, 4), focal_length_mm=3.0)
+        roi = ROI(.125, .25, 0.75, 0.5)
+        image = np.zeros(camera_pixels_shape_yx, dtype='uint8')
+        image[2:6, 2] = 255
+        image[3, 3] = 128
+        expected = i2p.get_line_points(image, 0.3, roi, np.pi / 4)
+
+        result = i2p.get_line_points(roi.get_left_of_center(image).copy(), 0.3, roi, np.pi / 4)
+
+        self.assert_array(expected, result, atol=1e-09)
+
+    def test_get_points_raises_for_images_larger_than_roi_which_are_not_frames(self):
+        i2p = self.setup_i2p(camera_pixels_shape_yx=(8, 8), camera_sensor_size_mm_xy=(4, 4), focal_length_mm=3.0)
+        with self.assertRaises(Exception):
+            i2p.get_points(np.ones((7, 7)), 0, ROI(.125, .25, 0.75, 0.5), np.pi / 4)
+
+    def test_get_points_accepts_laser_line(self):
+        camera_pixels_shape_yx = (8, 8)
+        i2p = self.setup_i2p(camera_pixels_shape_yx=camera_pixels_shape_yx, camera_sensor_size_mm_xy=(4, 4), focal_length_mm=3.0)
+        roi = ROI(.125, .25, 0.75, 0.5)
+        image = np.zeros(camera_pixels_shape_yx, dtype='uint8')
+        image[0:8, 2] = 255
+        expected = i2p.get_points(image, 0.3, roi, np.pi / 4)
+
+        result = i2p.get_points(LaserLine.from_mask(image), 0.3, roi, np.pi / 4)
+
+        self.assertEqual(4, len(result))
+        self.assert_array(expected, result, atol=1e-09)
+
+    def test_get_line_points_accepts_subpixel_laser_line_of_roi_crop(self):
+        camera_pixels_shape_yx = (8, 8)
+        i2p = self.setup_i2p(camera_pixels_shape_yx=camera_pixels_shape_yx, camera_sensor_size_mm_xy=(4, 4), focal_length_mm=3.0)
+        roi = ROI(.125, .25, 0.75, 0.5)
+        image = np.zeros(camera_pixels_shape_yx, dtype='uint8')
+        image[2:6, 2] = 255
+        image[3, 3] = 128
+        expected = i2p.get_line_points(image, 0.3, roi, np.pi / 4)
+
+        line = LaserLine.from_mask(roi.get_left_of_center(image), subpixel=True)
+        result = i2p.get_line_points(line, 0.3, roi, np.pi / 4)
+
+        self.assert_array(expected, result, atol=1e-09)
+
+    def test_rotate_sections_rotates_fractional_sections(self):
+        i2p = self.setup_i2p(camera_pixels_shape_yx=(4, 4), camera_sensor_size_mm_xy=(4, 4), focal_length_mm=3.0)
+        points = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [7.0, 8.0, 9.0]])
+        points_section = np.array([0.5, 0.5, 3.25])
+        sections = 8
+        expected = np.vstack([i2p._rotate_points(points[:2], (0.5 / sections) * 2.0 * np.pi), i2p._rotate_points(points[2:], (3.25 / sections) * 2.0 * np.pi)])
+
+        result = i2p.rotate_sections(points, points_section, sections)
+
+        self.assert_array(expected, result, atol=1e-09)
+
+    def reference_intersections(self, hardware, camera_pixels_shape_yx, laser_theta, laser_intersection_point):
+        i2p = Image2Points(hardware, (1, 1))
+        mm_per_pixel_yx = i2p._calculate_mm_per_pixel_yx(camera_pixels_shape_yx, hardware.sensor_size_xy_mm)
+        laser_plane_normal = i2p._get_laser_plane_normal_xyz(laser_intersection_point, laser_theta)
+        half_camera_yx = (camera_pixels_shape_yx[0] / 2.0, camera_pixels_shape_yx[1] / 2.0)
+        half_pixel_yx = (mm_per_pixel_yx[0] / 2.0, mm_per_pixel_yx[1] / 2.0)
+        final = np.zeros((camera_pixels_shape_yx[0], camera_pixels_shape_yx[1], 3), dtype='float16')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p_dot = np.dot(laser_plane_normal, laser_intersection_point)
+            for x_camera in range(camera_pixels_shape_yx[1]):
+                for y_camera in range(camera_pixels_shape_yx[0]):
+                    x_pos = ((x_camera - half_camera_yx[1]) * mm_per_pixel_yx[1]) + half_pixel_yx[1]
+                    y_pos = (((camera_pixels_shape_yx[0] - y_camera) - half_camera_yx[0]) * mm_per_pixel_yx[0]) - half_pixel_yx[0]
+                    z_pos = -hardware.focal_length_mm
+                    L2 = np.array([x_pos, y_pos, z_pos])
+                    final[y_camera, x_camera] = (p_dot / np.dot(laser_plane_normal, L2)) * L2
+        return final - hardware.center_intersection_xyz
+
+    def test_init_creates_intersections_matching_per_pixel_calculation(self):
+        camera_pixels_shape_yx = (48, 64)
+        hardware = HardwareConfiguration(
+            focal_length_mm=1.0,
+            sensor_size_xy_mm=(0.750, 0.562),
+            focal_point_to_center_mm=175.0,
+            intersections_rad_mm=[(atan(175.0 / 125.0), 125.0), (np.pi / 4, 175.0)])
+        i2p = Image2Points(hardware, camera_pixels_shape_yx)
+
+        for (theta, pos) in hardware.laser_intersections_rad_xyz:
+            expected = self.reference_intersections(hardware, camera_pixels_shape_yx, theta, pos)
+            result = i2p._posisition_mask_yx[theta]
+            self.assertEqual(expected.shape, result.shape)
+            self.assertTrue(np.allclose(expected, result, rtol=1e-03, atol=1e-02, equal_nan=True))
+
+    def test_init_handles_rays_parallel_to_the_laser_plane(self):
+        # 6 mm pixels put the rays through the last column at x = 9 mm, parallel to the 45 degree laser plane
+        camera_pixels_shape_yx = (4, 4)
+        i2p = self.setup_i2p(camera_pixels_shape_yx=camera_pixels_shape_yx, camera_sensor_size_mm_xy=(24, 24))
+        hardware = HardwareConfiguration(9, (24, 24), 9, [(np.pi / 4, 9)])
+        (theta, pos) = hardware.laser_intersections_rad_xyz[0]
+
+        result = i2p._posisition_mask_yx[np.pi / 4]
+
+        expected_parallel = np.array([[-np.inf, -np.inf, np.inf], [-np.inf, -np.inf, np.inf], [-np.inf, np.inf, np.inf], [-np.inf, np.inf, np.inf]])
+        self.assertTrue((expected_parallel == result[:, 3]).all())
+        self.assertTrue(np.isfinite(result[:, :3]).all())
+        self.assertTrue(np.allclose([[4.5, 13.5, -4.5], [4.5, 4.5, -4.5], [4.5, -4.5, -4.5], [4.5, -13.5, -4.5]], result[:, 2]))
+        np.testing.assert_array_equal(self.reference_intersections(hardware, camera_pixels_shape_yx, theta, pos), result)
+
 if __name__ == '__main__':
     logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
     unittest.main()
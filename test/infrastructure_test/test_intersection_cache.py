@@ -0,0 +1,124 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import logging
+
+from mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.intersection_cache import IntersectionCache
+from infrastructure.image_2_points import Image2Points
+from infrastructure.hardware import HardwareConfiguration
+
+
+class IntersectionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'cache')
+        self.hardware = HardwareConfiguration(9, (13.5, 13.5), 9, [(np.pi / 4, 9), (np.pi / 3, 8)])
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.path))
+
+    def test_get_returns_none_when_not_cached(self):
+        cache = IntersectionCache(self.path)
+        self.assertEqual(None, cache.get(cache.key(self.hardware, np.pi / 4, (3, 3))))
+
+    def test_put_stores_table_which_get_returns_memory_mapped(self):
+        cache = IntersectionCache(self.path)
+        table = np.random.random((3, 4, 3))
+        key = cache.key(self.hardware, np.pi / 4, (3, 4))
+
+        cache.put(key, table)
+        result = cache.get(key)
+
+        self.assertTrue(isinstance(result, np.memmap))
+        self.assertTrue((table == result).all())
+
+    def test_put_returns_table_when_cache_directory_is_unwritable(self):
+        with open(self.path, 'w') as afile:
+            afile.write('not a directory')
+        cache = IntersectionCache(os.path.join(self.path, 'cache'))
+        table = np.random.random((3, 4, 3))
+
+        result = cache.put(cache.key(self.hardware, np.pi / 4, (3, 4)), table)
+
+        self.assertTrue(result is table)
+
+    def test_put_removes_partial_file_when_write_fails(self):
+        cache = IntersectionCache(self.path)
+        table = np.random.random((3, 4, 3))
+        key = cache.key(self.hardware, np.pi / 4, (3, 4))
+        os.makedirs(self.path)
+
+        with patch('infrastructure.intersection_cache.np.save', side_effect=IOError('No space left on device')):
+            result = cache.put(key, table)
+
+        self.assertTrue(result is table)
+        self.assertEqual([], os.listdir(self.path))
+        self.assertEqual(None, cache.get(key))
+
+    def test_image_2_points_configures_when_cache_is_unwritable(self):
+        with open(self.path, 'w') as afile:
+            afile.write('not a directory')
+        expected = Image2Points(self.hardware, (3, 3))._posisition_mask_yx[np.pi / 4]
+
+        result = Image2Points(self.hardware, (3, 3), IntersectionCache(os.path.join(self.path, 'cache')))._posisition_mask_yx[np.pi / 4]
+
+        np.testing.assert_array_equal(expected, result)
+
+    def test_key_changes_with_hardware_theta_and_shape(self):
+        cache = IntersectionCache(self.path)
+        other_hardware = HardwareConfiguration(10, (13.5, 13.5), 9, [(np.pi / 4, 9), (np.pi / 3, 8)])
+        key = cache.key(self.hardware, np.pi / 4, (3, 3))
+
+        self.assertEqual(key, cache.key(self.hardware, np.pi / 4, (3, 3, 3)))
+        self.assertNotEqual(key, cache.key(other_hardware, np.pi / 4, (3, 3)))
+        self.assertNotEqual(key, cache.key(self.hardware, np.pi / 3, (3, 3)))
+        self.assertNotEqual(key, cache.key(self.hardware, np.pi / 4, (3, 4)))
+
+    def test_put_evicts_oldest_entries_when_over_size(self):
+        table = np.zeros((10, 10, 3))
+        cache = IntersectionCache(self.path, max_bytes=int(table.nbytes * 2.5))
+        keys = ['a', 'b', 'c']
+        for idx, key in enumerate(keys):
+            cache.put(key, table)
+            os.utime(os.path.join(self.path, '{}.npy'.format(key)), (time.time() + idx, time.time() + idx))
+
+        cache.put('d', table)
+
+        self.assertEqual(None, cache.get('a'))
+        self.assertEqual(None, cache.get('b'))
+        self.assertTrue(cache.get('c') is not None)
+        self.assertTrue(cache.get('d') is not None)
+
+    def test_put_evicts_expired_entries(self):
+        cache = IntersectionCache(self.path, max_age_seconds=60)
+        cache.put('old', np.zeros((2, 2, 3)))
+        old_time = time.time() - 120
+        os.utime(os.path.join(self.path, 'old.npy'), (old_time, old_time))
+
+        cache.put('new', np.zeros((2, 2, 3)))
+
+        self.assertEqual(None, cache.get('old'))
+        self.assertTrue(cache.get('new') is not None)
+
+    def test_image_2_points_uses_cached_intersections(self):
+        cache = IntersectionCache(self.path)
+        expected = Image2Points(self.hardware, (3, 3), cache)._posisition_mask_yx[np.pi / 4]
+
+        with patch.object(Image2Points, '_get_laser_intersections_mask_yx') as mock_build:
+            result = Image2Points(self.hardware, (3, 3), cache)._posisition_mask_yx[np.pi / 4]
+            self.assertFalse(mock_build.called)
+
+        self.assertTrue((expected == result).all())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
+    unittest.main()
@@ -3,11 +3,13 @@ import sys
 import os
 import numpy as np
 import logging
+import threading
+import cv2
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
-from infrastructure.laser_detector import LaserDetector, LaserDetector2
+from infrastructure.laser_detector import LaserDetector, LaserDetector2, FusedLaserDetector2
 
 
 class LaserDetectorTest(unittest.TestCase):
@@ -100,6 +102,60 @@ class LaserDetector2Test(unittest.TestCase):
         self.assertTrue((expected == result).all())
 
 
+class FusedLaserDetector2Test(unittest.TestCase):
+    def fake_image(self):
+        return cv2.imread(os.path.join(os.path.dirname(__file__), '..', 'fake_image.png'))
+
+    def test_detect_matches_laser_detector2_on_fake_image(self):
+        image = self.fake_image()
+        for threshold in [0, 50, 100, 225]:
+            expected = LaserDetector2(threshold, 'red').detect(image)
+            result = FusedLaserDetector2(threshold, 'red').detect(image)
+            self.assertEqual(expected.shape, result.shape)
+            self.assertTrue((expected == result).all(), 'Mismatch at threshold {}'.format(threshold))
+
+    def test_detect_matches_laser_detector2_with_laser_line(self):
+        image = self.fake_image()
+        image[:, 100:103] = (40, 60, 250)
+        expected = LaserDetector2().detect(image)
+
+        result = FusedLaserDetector2().detect(image)
+
+        self.assertTrue(np.count_nonzero(expected) > 0)
+        self.assertTrue((expected == result).all())
+
+    def test_detect_returns_an_empty_matrix_with_nothing_in_range(self):
+        test = np.ones((100, 100, 3), dtype='uint8') * 7
+
+        result = FusedLaserDetector2().detect(test)
+
+        self.assertEqual((100, 100), result.shape)
+        self.assertFalse(result.any())
+
+    def test_detect_reuses_scratch_buffers_but_not_the_result(self):
+        image = self.fake_image()
+        laser_detector = FusedLaserDetector2(50)
+        first = laser_detector.detect(image)
+        buffers = laser_detector._buffers(image.shape[:2])
+
+        second = laser_detector.detect(image)
+
+        self.assertTrue(buffers is laser_detector._buffers(image.shape[:2]))
+        self.assertFalse(first is second)
+        self.assertTrue((first == second).all())
+
+    def test_detect_uses_separate_scratch_buffers_per_thread(self):
+        image = self.fake_image()
+        laser_detector = FusedLaserDetector2(50)
+        laser_detector.detect(image)
+        buffers = []
+        thread = threading.Thread(target=lambda: buffers.append(laser_detector._buffers(image.shape[:2])))
+        thread.start()
+        thread.join()
+
+        self.assertFalse(buffers[0] is laser_detector._buffers(image.shape[:2]))
+
+
 if __name__ == '__main__':
     logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import logging
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.laser_line import LaserLine
+
+
+class LaserLineTest(unittest.TestCase):
+    def test_from_mask_finds_peak_column_of_each_lit_row(self):
+        mask = np.zeros((4, 6), dtype='uint8')
+        mask[0, 2] = 200
+        mask[0, 3] = 255
+        mask[2, 5] = 100
+
+        line = LaserLine.from_mask(mask)
+
+        self.assertEqual([0, 2], line.rows.tolist())
+        self.assertEqual([3, 5], line.columns.tolist())
+        self.assertEqual([255, 100], line.intensities.tolist())
+        self.assertEqual((4, 6), line.shape)
+        self.assertFalse(line.subpixel)
+
+    def test_from_mask_with_subpixel_finds_weighted_centroid_of_each_lit_row(self):
+        mask = np.zeros((3, 6), dtype='uint8')
+        mask[1, 2] = 255
+        mask[1, 3] = 255
+        mask[2, 4] = 100
+
+        line = LaserLine.from_mask(mask, subpixel=True)
+
+        self.assertEqual([1, 2], line.rows.tolist())
+        self.assertTrue(np.allclose([2.5, 4.0], line.columns))
+        self.assertEqual([255, 100], line.intensities.tolist())
+        self.assertTrue(line.subpixel)
+
+    def test_from_mask_of_empty_mask_is_empty(self):
+        line = LaserLine.from_mask(np.zeros((5, 5), dtype='uint8'))
+        self.assertEqual(0, len(line))
+
+    def test_to_mask_restores_peaks(self):
+        mask = np.zeros((4, 6), dtype='uint8')
+        mask[1, 1] = 255
+        mask[3, 4] = 128
+
+        self.assertTrue((mask == LaserLine.from_mask(mask).to_mask()).all())
+
+    def test_is_much_smaller_than_mask(self):
+        mask = np.zeros((1080, 1920), dtype='uint8')
+        mask[:, 700] = 255
+
+        line = LaserLine.from_mask(mask)
+
+        self.assertTrue(line.nbytes * 50 < mask.nbytes)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
+    unittest.main()
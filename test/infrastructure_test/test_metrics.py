@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import time
+import logging
+
+from mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.metrics import Histogram, MetricsRegistry
+
+
+class HistogramTest(unittest.TestCase):
+    def test_observe_counts_values_into_buckets(self):
+        histogram = Histogram([0.001, 0.01, 0.1])
+        for value in [0.0005, 0.001, 0.005, 0.05, 0.5]:
+            histogram.observe(value)
+
+        self.assertEqual([2, 1, 1, 1], histogram.counts)
+        self.assertEqual(5, histogram.count)
+        self.assertAlmostEqual(0.5565, histogram.total)
+        self.assertEqual(0.5, histogram.max)
+
+    def test_percentile_is_the_upper_bound_of_its_bucket(self):
+        histogram = Histogram([0.001, 0.01, 0.1])
+        for value in [0.0005] * 5 + [0.005] * 4 + [0.5]:
+            histogram.observe(value)
+
+        self.assertEqual(0.001, histogram.percentile(0.5))
+        self.assertEqual(0.01, histogram.percentile(0.9))
+        self.assertEqual(0.5, histogram.percentile(0.99))
+
+    def test_snapshot_of_empty_histogram(self):
+        snapshot = Histogram([0.001]).snapshot()
+
+        self.assertEqual(0, snapshot['count'])
+        self.assertEqual(None, snapshot['mean'])
+        self.assertEqual(None, snapshot['p50'])
+        self.assertEqual([(0.001, 0), (float('inf'), 0)], snapshot['buckets'])
+
+
+class MetricsRegistryTest(unittest.TestCase):
+    def test_increment_counts(self):
+        registry = MetricsRegistry()
+        registry.increment('frames')
+        registry.increment('frames', 2)
+
+        self.assertEqual({'frames': 3}, registry.snapshot()['counters'])
+
+    @patch('infrastructure.metrics.monotonic')
+    def test_timer_observes_elapsed_time(self, mock_monotonic):
+        mock_monotonic.side_effect = [1.0, 1.004]
+        registry = MetricsRegistry()
+
+        with registry.timer('detection'):
+            pass
+
+        latency = registry.snapshot()['latency']['detection']
+        self.assertEqual(1, latency['count'])
+        self.assertAlmostEqual(0.004, latency['max'])
+        self.assertEqual(0.005, latency['p50'])
+
+    def test_timer_observes_when_block_raises(self):
+        registry = MetricsRegistry()
+
+        with self.assertRaises(ValueError):
+            with registry.timer('detection'):
+                raise ValueError()
+
+        self.assertEqual(1, registry.snapshot()['latency']['detection']['count'])
+
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry(enabled=False)
+        registry.increment('frames')
+        with registry.timer('detection'):
+            pass
+
+        self.assertEqual({'counters': {}, 'latency': {}}, registry.snapshot())
+
+    def test_reset_clears_everything(self):
+        registry = MetricsRegistry()
+        registry.increment('frames')
+        registry.observe('detection', 0.1)
+        registry.reset()
+
+        self.assertEqual({'counters': {}, 'latency': {}}, registry.snapshot())
+
+    def test_summary_lists_counters_and_latencies(self):
+        registry = MetricsRegistry()
+        registry.increment('frames', 3)
+        registry.observe('detection', 0.002)
+
+        summary = registry.summary()
+
+        self.assertTrue('frames: 3' in summary)
+        self.assertTrue('detection: 1 calls mean 2.000 ms' in summary)
+
+    def test_start_logging_dumps_summary_periodically(self):
+        registry = MetricsRegistry()
+        registry.increment('frames')
+        with patch('infrastructure.metrics.logger') as mock_logger:
+            registry.start_logging(0.01)
+            for idx in range(100):
+                if mock_logger.info.called:
+                    break
+                time.sleep(0.01)
+            registry.stop_logging()
+
+        self.assertTrue('frames: 1' in mock_logger.info.call_args[0][0])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
+    unittest.main()
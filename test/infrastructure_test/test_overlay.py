@@ -0,0 +1,50 @@
+import unittest
+import sys
+import os
+import logging
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.overlay import OverlayPatch
+
+
+class OverlayPatchTest(unittest.TestCase):
+    def setUp(self):
+        self.patch_image = np.zeros((3, 3, 3), dtype='uint8')
+        self.patch_image[1, :] = (0, 255, 0)
+
+    def test_composite_replaces_drawn_pixels_at_position(self):
+        frame = np.ones((10, 10, 3), dtype='uint8') * 7
+
+        OverlayPatch(self.patch_image, 4, 2).composite(frame)
+
+        self.assertTrue((frame[3, 4:7] == (0, 255, 0)).all())
+        self.assertTrue((frame[2, 4:7] == 7).all())
+        self.assertEqual(3, (frame != 7).any(axis=2).sum())
+
+    def test_composite_clips_patches_hanging_off_the_frame(self):
+        frame = np.zeros((10, 10, 3), dtype='uint8')
+
+        OverlayPatch(self.patch_image, -2, 8).composite(frame)
+
+        self.assertTrue((frame[9, 0] == (0, 255, 0)).all())
+        self.assertEqual(1, frame.any(axis=2).sum())
+
+    def test_composite_ignores_patches_outside_the_frame(self):
+        frame = np.zeros((10, 10, 3), dtype='uint8')
+
+        result = OverlayPatch(self.patch_image, 20, 20).composite(frame)
+
+        self.assertTrue(result is frame)
+        self.assertFalse(frame.any())
+
+    def test_composite_does_not_change_the_patch(self):
+        OverlayPatch(self.patch_image, 0, 0).composite(np.ones((10, 10, 3), dtype='uint8'))
+        self.assertEqual(3, self.patch_image.any(axis=2).sum())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import sys
+import os
+import numpy as np
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.point_buffer import PointBuffer
+
+
+class PointBufferTest(unittest.TestCase):
+    def test_points_is_none_when_empty(self):
+        self.assertEqual(None, PointBuffer().points)
+        self.assertEqual(0, len(PointBuffer()))
+
+    def test_points_starts_with_initial_points(self):
+        initial = np.array([[1.0, 1.0, 1.0], [2.0, 2.0, 2.0]])
+
+        point_buffer = PointBuffer(initial)
+
+        self.assertTrue((initial == point_buffer.points).all())
+
+    def test_append_adds_points_in_order_past_capacity(self):
+        point_buffer = PointBuffer(capacity=2)
+        expected = np.arange(30, dtype='float64').reshape(10, 3)
+
+        for idx in range(0, 10, 2):
+            point_buffer.append(expected[idx:idx + 2])
+
+        self.assertEqual(10, len(point_buffer))
+        self.assertTrue((expected == point_buffer.points).all())
+
+    def test_points_views_are_unchanged_by_later_appends(self):
+        point_buffer = PointBuffer(np.array([[1.0, 1.0, 1.0]]), capacity=1)
+        view = point_buffer.points
+
+        point_buffer.append(np.array([[2.0, 2.0, 2.0], [3.0, 3.0, 3.0]]))
+
+        self.assertEqual((1, 3), view.shape)
+        self.assertTrue((np.array([[1.0, 1.0, 1.0]]) == view).all())
+
+    def test_points_does_not_copy(self):
+        point_buffer = PointBuffer(np.array([[1.0, 1.0, 1.0]]))
+
+        self.assertTrue(np.may_share_memory(point_buffer.points, point_buffer.points))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
+    unittest.main()
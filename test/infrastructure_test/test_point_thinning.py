@@ -8,7 +8,7 @@ import time
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
-from infrastructure.point_thinning import PointThinner
+from infrastructure.point_thinning import PointThinner, VoxelThinner
 
 class PointThinnerTest(unittest.TestCase):
     def test_thin_removes_points_within_a_specified_distance_in_single_plane_percision_0(self):
@@ -71,6 +71,76 @@ class PointThinnerTest(unittest.TestCase):
         result.sort(axis=0)
         self.assertTrue(np.array_equal(result, expected))
 
+
+class VoxelThinnerTest(unittest.TestCase):
+    def test_thin_returns_centroid_of_each_voxel(self):
+        points = np.array([[0.1, 0.1, 0.1], [0.3, 0.3, 0.3], [1.2, 0.0, 0.0], [-0.2, 0.0, 0.0]])
+        expected = np.array([[-0.2, 0.0, 0.0], [0.2, 0.2, 0.2], [1.2, 0.0, 0.0]])
+
+        result = VoxelThinner(0.5).thin(points)
+
+        result = result[np.argsort(result[:, 0])]
+        self.assertTrue(np.allclose(expected, result))
+
+    def test_thin_returns_counts_when_requested(self):
+        points = np.array([[0.1, 0.1, 0.1], [0.3, 0.3, 0.3], [1.2, 0.0, 0.0]])
+
+        result, counts = VoxelThinner(0.5).thin(points, return_counts=True)
+
+        self.assertEqual([2, 1], sorted(counts.tolist(), reverse=True))
+        self.assertEqual(3, counts.sum())
+
+    def test_thin_ignores_points_which_are_not_finite(self):
+        points = np.array([[0.1, 0.1, 0.1], [np.inf, 0.0, 0.0], [np.nan, 0.0, 0.0]])
+
+        result = VoxelThinner(0.5).thin(points)
+
+        self.assertTrue(np.allclose(np.array([[0.1, 0.1, 0.1]]), result))
+
+    def test_thin_handles_empty_points(self):
+        result = VoxelThinner(0.5).thin(np.empty((0, 3)))
+        self.assertEqual((0, 3), result.shape)
+
+    def test_thin_sparse_grouping_matches_dense_grouping(self):
+        points = np.random.random((5000, 3)) * 100.0 - 50.0
+
+        dense, dense_counts = VoxelThinner(1.0).thin(points, return_counts=True)
+        sparse, sparse_counts = VoxelThinner(1.0, max_dense_voxels=0).thin(points, return_counts=True)
+
+        self.assertTrue(np.allclose(dense, sparse))
+        self.assertTrue(np.array_equal(dense_counts, sparse_counts))
+
+    def test_add_merges_voxels_across_calls(self):
+        points = np.random.random((3000, 3)) * 20.0
+        expected, expected_counts = VoxelThinner(1.0).thin(points, return_counts=True)
+
+        thinner = VoxelThinner(1.0)
+        for section in np.array_split(points, 7):
+            thinner.add(section)
+        result, counts = thinner.thinned(return_counts=True)
+
+        self.assertTrue(np.allclose(expected, result))
+        self.assertTrue(np.array_equal(expected_counts, counts))
+
+    def test_reset_clears_added_points(self):
+        thinner = VoxelThinner(1.0)
+        thinner.add(np.ones((3, 3)))
+        thinner.reset()
+        self.assertEqual(0, len(thinner.thinned()))
+
+    def test_voxel_size_must_be_positive(self):
+        with self.assertRaises(Exception):
+            VoxelThinner(0)
+
+    def test_thin_thins_large_arrays_fast(self):
+        points = np.random.random([1000000, 3]) * 100.0
+        start = time.time()
+        VoxelThinner(0.5).thin(points)
+        end = time.time() - start
+
+        self.assertLess(end, 1)
+
+
 if __name__ == '__main__':
     logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
     unittest.main()
@@ -0,0 +1,211 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import numpy as np
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.recording import FrameRecorder, RecordingReader, RecordingSource, RecordedEncoder, describe_configuration, replay
+from infrastructure.frame_source import SyntheticSource
+from infrastructure.encoder import Encoder
+from infrastructure.laser_detector import FusedLaserDetector2
+from infrastructure.roi import ROI
+from infrastructure.video_processor import VideoProcessor
+
+
+class RecordingHandler(object):
+    def __init__(self):
+        self.calls = []
+
+    def handle(self, **kwargs):
+        self.calls.append((kwargs['section'], kwargs['tick'], kwargs['laser_detection'].copy()))
+        return True
+
+
+class FrameRecorderTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.filename = os.path.join(self.path, 'scan.rec')
+        self.roi = ROI(0.25, 0.5, 0.5, 0.25)
+        self.configuration = describe_configuration(self.roi, Encoder(sections=200), FusedLaserDetector2(225, 'red'))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def frames(self, count, shape=(8, 12, 3)):
+        return [np.random.randint(0, 256, shape).astype('uint8') for idx in range(count)]
+
+    def test_recorded_frames_and_metadata_are_read_back(self):
+        frames = self.frames(5)
+        recorder = FrameRecorder(self.filename, chunk_frames=2)
+        for idx, frame in enumerate(frames):
+            recorder.record(idx, frame, idx * 0.5, 300 + idx, idx % 2 == 1, idx // 2, self.configuration)
+        recorder.close()
+
+        reader = RecordingReader(self.filename)
+        recorded = list(reader)
+
+        self.assertEqual(3, recorder.chunks)
+        self.assertEqual([8, 12, 3], reader.header['frame_shape'])
+        self.assertEqual(5, len(recorded))
+        for idx, (metadata, frame) in enumerate(recorded):
+            self.assertTrue((frames[idx] == frame).all())
+            self.assertEqual(idx * 0.5, metadata['timestamp'])
+            self.assertEqual(300 + idx, metadata['encoder_value'])
+            self.assertEqual(idx % 2 == 1, metadata['tick'])
+            self.assertEqual(idx // 2, metadata['section'])
+            self.assertEqual([0.25, 0.5, 0.5, 0.25], metadata['config']['roi'])
+            self.assertEqual('red', metadata['config']['laser_detector']['color'])
+            self.assertEqual(200, metadata['config']['encoder']['sections'])
+
+    def test_close_while_recording_from_another_thread_leaves_a_readable_file(self):
+        frames = self.frames(4)
+        for attempt in range(20):
+            recorder = FrameRecorder(self.filename, chunk_frames=3)
+            started = threading.Event()
+
+            def capture():
+                for idx in range(1000):
+                    recorder.record(idx, frames[idx % 4], idx * 0.1, 0, False, 0, self.configuration)
+                    started.set()
+            thread = threading.Thread(target=capture)
+            thread.start()
+            started.wait()
+            recorder.close()
+            thread.join()
+
+            recorded = list(RecordingReader(self.filename))
+            self.assertEqual(recorder.frames, len(recorded))
+            for (idx, (metadata, frame)) in enumerate(recorded):
+                self.assertEqual(idx, metadata['seq'])
+                self.assertTrue((frames[idx % 4] == frame).all())
+
+    def test_record_after_close_is_ignored(self):
+        recorder = FrameRecorder(self.filename)
+        recorder.record(0, self.frames(1)[0], 0.0, 0, False, 0, self.configuration)
+        recorder.close()
+        recorder.record(1, self.frames(1)[0], 0.0, 0, False, 0, self.configuration)
+        recorder.close()
+
+        self.assertEqual(1, recorder.frames)
+        self.assertEqual(1, len(list(RecordingReader(self.filename))))
+
+    def test_crop_records_only_the_roi(self):
+        frame = self.frames(1)[0]
+        recorder = FrameRecorder(self.filename, crop=True)
+        recorder.record(0, frame, 0.0, 0, False, 0, self.configuration, self.roi)
+        recorder.close()
+
+        metadata, recorded = list(RecordingReader(self.filename))[0]
+
+        self.assertEqual([4, 3], metadata['offset'])
+        self.assertTrue((self.roi.get(frame) == recorded).all())
+
+    def test_configuration_changes_start_a_new_chunk(self):
+        recorder = FrameRecorder(self.filename)
+        other = describe_configuration(ROI(0.0, 0.0, 1.0, 1.0), Encoder(), FusedLaserDetector2(200, 'green'))
+        for (idx, configuration) in enumerate([self.configuration, self.configuration, other]):
+            recorder.record(idx, self.frames(1)[0], 0.0, 0, False, 0, configuration)
+        recorder.close()
+
+        recorded = list(RecordingReader(self.filename))
+
+        self.assertEqual(2, recorder.chunks)
+        self.assertEqual('green', recorded[2][0]['config']['laser_detector']['color'])
+
+    def test_reader_raises_exception_for_files_which_are_not_recordings(self):
+        with open(self.filename, 'wb') as afile:
+            afile.write(b'not a recording')
+        with self.assertRaises(Exception):
+            RecordingReader(self.filename)
+
+
+class RecordingReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.filename = os.path.join(self.path, 'scan.rec')
+        self.roi = ROI(0.0, 0.0, 1.0, 1.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def record(self, frames, crop=False, roi_detection=False):
+        source = SyntheticSource(shape=(60, 80, 3), fps=None)
+        source.start()
+        video_processor = VideoProcessor(source, Encoder(point=(0.2, 0.2), sections=200), self.roi, FusedLaserDetector2(225, 'red'), roi_detection=roi_detection)
+        handler = RecordingHandler()
+        video_processor.subscribe(handler)
+        video_processor.start_recording(self.filename, crop)
+        for idx in range(frames):
+            frame = source.read()
+            video_processor.process_frame(frame, idx / 30.0)
+            source.release(frame)
+        video_processor.stop_recording()
+        return handler.calls
+
+    def replay(self, roi_detection=False):
+        source = RecordingSource(self.filename)
+        source.start()
+        video_processor = VideoProcessor(source, RecordedEncoder.from_source(source), self.roi, FusedLaserDetector2(225, 'red'), roi_detection=roi_detection)
+        handler = RecordingHandler()
+        video_processor.subscribe(handler)
+        frames = replay(source, video_processor)
+        return (frames, handler.calls, video_processor.encoder)
+
+    def assertCallsEqual(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for ((section, tick, detection), (other_section, other_tick, other_detection)) in zip(expected, actual):
+            self.assertEqual(section, other_section)
+            self.assertEqual(tick, other_tick)
+            self.assertTrue((detection == other_detection).all())
+
+    def test_replay_gives_handlers_the_same_sections_and_detections(self):
+        recorded = self.record(20)
+
+        frames, replayed, encoder = self.replay()
+
+        self.assertEqual(20, frames)
+        self.assertTrue(len(recorded) > 0)
+        self.assertCallsEqual(recorded, replayed)
+
+    def test_replay_of_roi_crops_gives_the_same_detections_within_the_roi(self):
+        self.roi = ROI(0.1, 0.25, 0.8, 0.5)
+        recorded = self.record(12, crop=True, roi_detection=True)
+
+        frames, replayed, encoder = self.replay(roi_detection=True)
+
+        self.assertCallsEqual(recorded, replayed)
+
+    def test_recorded_encoder_uses_recorded_configuration_and_values(self):
+        self.record(6)
+        source = RecordingSource(self.filename)
+        source.start()
+        encoder = RecordedEncoder.from_source(source)
+
+        self.assertEqual((0.2, 0.2), encoder.relitive_point_xy)
+        self.assertEqual(200, encoder.sections)
+
+        frame = source.read()
+        encoder.should_capture_frame_for_section(frame)
+        self.assertEqual(source.frame_metadata['encoder_value'], encoder.value)
+        self.assertEqual(source.frame_metadata['timestamp'], encoder.frame_time)
+
+    def test_recording_source_returns_none_at_end(self):
+        self.record(3)
+        source = RecordingSource(self.filename)
+        source.start()
+
+        frames = [source.read() for idx in range(4)]
+
+        self.assertEqual((60, 80, 3), source.shape)
+        self.assertEqual(None, frames[3])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
+    unittest.main()
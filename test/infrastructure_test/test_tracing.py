@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import logging
+
+from mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from infrastructure.tracing import Tracer
+
+
+class TracerTest(unittest.TestCase):
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer()
+        with tracer.span('detection'):
+            pass
+
+        self.assertEqual([], tracer.spans())
+
+    @patch('infrastructure.tracing.monotonic')
+    def test_span_records_start_end_and_thread(self, mock_monotonic):
+        mock_monotonic.side_effect = [10.0, 10.5, 10.75]
+        tracer = Tracer(enabled=True)
+
+        with tracer.span('detection', 'pipeline', section=3):
+            pass
+
+        self.assertEqual([('detection', 'pipeline', 10.5, 10.75, threading.current_thread().ident, {'section': 3})], tracer.spans())
+
+    def test_span_is_recorded_when_block_raises(self):
+        tracer = Tracer(enabled=True)
+
+        with self.assertRaises(ValueError):
+            with tracer.span('detection'):
+                raise ValueError()
+
+        self.assertEqual(1, len(tracer.spans()))
+
+    def test_ring_buffer_keeps_most_recent_spans(self):
+        tracer = Tracer(capacity=3, enabled=True)
+        for idx in range(5):
+            with tracer.span('span{}'.format(idx)):
+                pass
+
+        self.assertEqual(['span2', 'span3', 'span4'], [span[0] for span in tracer.spans()])
+
+    def test_enable_can_resize_keeping_spans(self):
+        tracer = Tracer(capacity=2, enabled=True)
+        with tracer.span('first'):
+            pass
+        tracer.enable(capacity=10)
+
+        self.assertEqual(10, tracer.capacity)
+        self.assertEqual(['first'], [span[0] for span in tracer.spans()])
+
+    def test_traced_wraps_calls_in_a_span(self):
+        tracer = Tracer(enabled=True)
+
+        class Widget(object):
+            @tracer.traced('Widget.update', 'ui')
+            def update(self, value):
+                return value * 2
+
+        self.assertEqual(4, Widget().update(2))
+        self.assertEqual([('Widget.update', 'ui')], [span[:2] for span in tracer.spans()])
+
+    @patch('infrastructure.tracing.monotonic')
+    def test_chrome_trace_uses_complete_events_in_microseconds(self, mock_monotonic):
+        mock_monotonic.side_effect = [10.0, 10.5, 10.75]
+        tracer = Tracer(enabled=True)
+        with tracer.span('detection'):
+            pass
+
+        events = tracer.to_chrome_trace()['traceEvents']
+
+        self.assertEqual('M', events[0]['ph'])
+        self.assertEqual(threading.current_thread().name, events[0]['args']['name'])
+        self.assertEqual('X', events[1]['ph'])
+        self.assertEqual('detection', events[1]['name'])
+        self.assertAlmostEqual(500000.0, events[1]['ts'])
+        self.assertAlmostEqual(250000.0, events[1]['dur'])
+        self.assertEqual(events[0]['tid'], events[1]['tid'])
+
+    def test_write_writes_json(self):
+        path = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(path, 'trace.json')
+            tracer = Tracer(enabled=True)
+            with tracer.span('detection'):
+                pass
+            tracer.write(filename)
+
+            with open(filename) as afile:
+                trace = json.load(afile)
+            self.assertEqual(['thread_name', 'detection'], [event['name'] for event in trace['traceEvents']])
+        finally:
+            shutil.rmtree(path)
+
+    def test_clear_removes_spans(self):
+        tracer = Tracer(enabled=True)
+        with tracer.span('detection'):
+            pass
+        tracer.clear()
+
+        self.assertEqual([], tracer.to_chrome_trace()['traceEvents'])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
+    unittest.main()
@@ -14,6 +14,10 @@ from helpers import FakeCamera
 from infrastructure.video_processor import VideoProcessor
 from infrastructure.roi import ROI
 from infrastructure.laser_detector import LaserDetector
+from infrastructure.laser_line import LaserLine
+from infrastructure.metrics import MetricsRegistry
+from infrastructure.tracing import Tracer
+from infrastructure.frame_source import SyntheticSource
 
 class TestHandler(object):
     def __init__(self, unsubscribe_after=-1):
@@ -37,7 +41,7 @@ class VideoProcessorTest(unittest.TestCase):
     def show_it(self, image):
         cv2.imshow('frame', image)
 
-    def create_video_processor(self, roi=None):
+    def create_video_processor(self, roi=None, **kwargs):
         self.camera = FakeCamera()
         self.encoder = Mock()
         self.encoder.position = 0
@@ -51,7 +55,7 @@ class VideoProcessorTest(unittest.TestCase):
             self.roi = roi
         else:
             self.roi = ROI.set_from_abs_points((10, 50), (x_center + 1, 70), self.camera.image.shape)
-        return VideoProcessor(self.camera, self.encoder, self.roi, self.mock_laser_detector)
+        return VideoProcessor(self.camera, self.encoder, self.roi, self.mock_laser_detector, **kwargs)
 
     def test_video_processor_starts_and_stops_given_shutdown_set_to_true(self):
         video_processor = self.create_video_processor()
@@ -215,6 +219,136 @@ class VideoProcessorTest(unittest.TestCase):
         video_processor.stop()
         self.assertEquals(subscriber, callback.call_args[0][0])
 
+    def test_stages_are_timed_in_the_metrics_registry(self):
+        video_processor = self.create_video_processor()
+        video_processor.metrics_registry = MetricsRegistry()
+        video_processor.subscribe(TestHandler())
+        video_processor.start()
+        time.sleep(self.start_up_delay)
+        video_processor.stop()
+        video_processor.get_bounded_image(20, 20)
+
+        snapshot = video_processor.metrics_registry.snapshot()
+        self.assertTrue(snapshot['counters']['frames'] > 0)
+        for stage in ['camera.read', 'encoder', 'detection', 'handler.TestHandler', 'preview']:
+            self.assertTrue(snapshot['latency'][stage]['count'] > 0, stage)
+
+    def test_frames_and_handlers_are_traced_when_tracing_is_enabled(self):
+        for pipelined in [False, True]:
+            video_processor = self.create_video_processor(pipelined=pipelined)
+            video_processor.tracer = Tracer(enabled=True)
+            video_processor.subscribe(TestHandler())
+            video_processor.start()
+            time.sleep(self.start_up_delay)
+            video_processor.stop()
+            video_processor.get_bounded_image(20, 20)
+
+            names = set([span[0] for span in video_processor.tracer.spans()])
+            for name in ['video_processor.frame', 'camera.read', 'detection', 'handler.TestHandler', 'callback.TestHandler', 'video_processor.set_image', 'video_processor.get_image', 'preview']:
+                self.assertTrue(name in names, "{} pipelined={}".format(name, pipelined))
+
+    def test_stop_closes_recorder_after_capture_thread_has_stopped(self):
+        video_processor = self.create_video_processor()
+        recorder = Mock()
+        alive_at_close = []
+        recorder.close.side_effect = lambda: alive_at_close.append(video_processor.is_alive())
+        video_processor.recorder = recorder
+        video_processor.start()
+        time.sleep(self.start_up_delay)
+        video_processor.stop()
+
+        self.assertEqual([False], alive_at_close)
+
+    def test_frames_are_released_back_to_the_camera(self):
+        video_processor = self.create_video_processor()
+        video_processor.start()
+        time.sleep(self.start_up_delay)
+        video_processor.stop()
+
+        self.assertTrue(self.camera.released > 0)
+        self.assertEqual(self.camera.calls + 1, self.camera.released - self.camera.retained)
+
+    def test_get_bounded_image_holds_the_frame_while_scaling(self):
+        video_processor = self.create_video_processor()
+        video_processor.get_bounded_image(400, 200)
+        self.assertEqual(1, self.camera.retained)
+        self.assertEqual(1, self.camera.released)
+
+    def test_laser_detection_is_skipped_when_encoder_does_not_fire(self):
+        video_processor = self.create_video_processor()
+        self.encoder.should_capture_frame_for_section.return_value = (False, 0)
+        video_processor.subscribe(TestHandler())
+
+        video_processor.process_frame(self.camera.read())
+
+        self.assertFalse(self.mock_laser_detector.detect.called)
+
+    def test_laser_detection_is_skipped_when_no_handlers_subscribed(self):
+        video_processor = self.create_video_processor()
+
+        video_processor.process_frame(self.camera.read())
+
+        self.assertFalse(self.mock_laser_detector.detect.called)
+
+    def test_get_bounded_image_detects_laser_on_the_scaled_frame(self):
+        video_processor = self.create_video_processor()
+        video_processor.process_frame(self.camera.read())
+
+        image = video_processor.get_bounded_image(400, 200)
+
+        self.assertEqual(image['frame'].shape, self.mock_laser_detector.detect.call_args[0][0].shape)
+
+    def test_roi_detection_detects_only_left_of_center_of_roi(self):
+        video_processor = self.create_video_processor()
+        video_processor.roi_detection = True
+        subscriber = TestHandler()
+        video_processor.subscribe(subscriber)
+        frame = self.camera.read()
+        crop = self.roi.get_left_of_center(frame)
+        self.mock_laser_detector.detect.return_value = np.ones(crop.shape[:2], dtype='uint8')
+
+        video_processor.process_frame(frame)
+
+        self.assertEqual(crop.shape, self.mock_laser_detector.detect.call_args[0][0].shape)
+        self.assertEqual(crop.shape[:2], subscriber.calls[0]['laser_detection'].shape)
+        self.assertTrue(subscriber.calls[0]['partial_laser_detection'] is subscriber.calls[0]['laser_detection'])
+
+    def test_compact_mode_passes_laser_line_to_handlers(self):
+        video_processor = self.create_video_processor()
+        video_processor.compact = 'centroid'
+        subscriber = TestHandler()
+        video_processor.subscribe(subscriber)
+
+        video_processor.process_frame(self.camera.read())
+
+        line = subscriber.calls[0]['laser_detection']
+        self.assertTrue(isinstance(line, LaserLine))
+        self.assertTrue(line.subpixel)
+        self.assertEqual(self.detected_image.shape, line.shape)
+        self.assertEqual(self.detected_image.shape[0], len(line))
+
+    def test_unknown_compact_mode_raises(self):
+        with self.assertRaises(Exception):
+            VideoProcessor(FakeCamera(), Mock(), Mock(), Mock(), compact='sparse')
+
+    def test_interpolated_handlers_are_called_every_frame_with_section_position(self):
+        video_processor = self.create_video_processor()
+        self.encoder.should_capture_frame_for_section.side_effect = [(True, 4), (False, 4)]
+        self.encoder.section_position.return_value = 4.5
+        interpolated = TestHandler()
+        interpolated.interpolated = True
+        ticked = TestHandler()
+        video_processor.subscribe(interpolated)
+        video_processor.subscribe(ticked)
+
+        video_processor.process_frame(self.camera.read(), 10.0)
+        video_processor.process_frame(self.camera.read(), 10.5)
+
+        self.assertEqual([4.5, 4.5], [call['section'] for call in interpolated.calls])
+        self.assertEqual([4], [call['section'] for call in ticked.calls])
+        self.encoder.section_position.assert_called_with(10.5)
+        self.encoder.should_capture_frame_for_section.assert_called_with(self.camera.image, 10.5)
+
     def test_image_is_a_10x10_pixel_frame_when_called_before_started(self):
         video_processor = self.create_video_processor()
         self.assertEqual((10, 10, 3), video_processor.image['frame'].shape)
@@ -234,7 +368,7 @@ class VideoProcessorTest(unittest.TestCase):
 
     def test_get_bounded_image_gets_a_scaled_version_of_the_lastest_encoder_mask(self):
         video_processor = self.create_video_processor()
-        self.encoder.overlay_encoder.return_value = 'KAWABUNGA'
+        self.encoder.overlay_encoder_patch.return_value = 'KAWABUNGA'
         video_processor.start()
         time.sleep(self.start_up_delay)
         image = video_processor.get_bounded_image(400, 200)
@@ -244,7 +378,7 @@ class VideoProcessorTest(unittest.TestCase):
 
     def test_get_bounded_image_gets_a_scaled_version_of_the_lastest_encoder_history(self):
         video_processor = self.create_video_processor()
-        self.encoder.overlay_history.return_value = 'KAWABUNGA'
+        self.encoder.overlay_history_patch.return_value = 'KAWABUNGA'
         video_processor.start()
         time.sleep(self.start_up_delay)
         image = video_processor.get_bounded_image(400, 200)
@@ -285,6 +419,164 @@ class VideoProcessorTest(unittest.TestCase):
     def clipped_image(self):
         return self.roi.get_left_of_center(self.camera.image)
 
+
+class CopyingCamera(FakeCamera):
+    def read(self):
+        return FakeCamera.read(self).copy()
+
+
+class SequenceEncoder(object):
+    def __init__(self, pattern=[True]):
+        self.pattern = pattern
+        self.frames = 0
+        self.position = 0
+        self.sections = 200
+
+    def should_capture_frame_for_section(self, frame, timestamp=None):
+        should_capture = self.pattern[self.frames % len(self.pattern)]
+        self.frames += 1
+        if should_capture:
+            self.position += 1
+        return (should_capture, self.position)
+
+    @property
+    def metrics(self):
+        return {'frames': self.frames}
+
+
+class SlowDetector(object):
+    def __init__(self, delays=[0.0]):
+        self.delays = delays
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        time.sleep(self.delays[self.calls % len(self.delays)])
+        return np.ones((frame.shape[0], frame.shape[1]), dtype='uint8') * 255
+
+
+class PipelinedVideoProcessorTest(unittest.TestCase):
+    run_time = 0.2
+
+    def create_video_processor(self, encoder=None, detector=None, **kwargs):
+        self.camera = CopyingCamera()
+        self.encoder = encoder if encoder else SequenceEncoder()
+        self.detector = detector if detector else SlowDetector()
+        x_center = self.camera.image.shape[1] // 2
+        self.roi = ROI.set_from_abs_points((10, 50), (x_center + 1, 70), self.camera.image.shape)
+        return VideoProcessor(self.camera, self.encoder, self.roi, self.detector, pipelined=True, **kwargs)
+
+    def run_for(self, video_processor, seconds=None):
+        video_processor.start()
+        time.sleep(seconds if seconds else self.run_time)
+        video_processor.stop()
+
+    def test_pipelined_processor_starts_and_stops(self):
+        video_processor = self.create_video_processor()
+        video_processor.start()
+        time.sleep(0.01)
+        self.assertTrue(video_processor.is_alive())
+        video_processor.stop()
+        self.assertFalse(video_processor.is_alive())
+
+    def test_handlers_receive_sections_in_order_when_detection_times_vary(self):
+        video_processor = self.create_video_processor(detector=SlowDetector([0.004, 0.0, 0.001]), detection_workers=3)
+        handler = TestHandler()
+        video_processor.subscribe(handler)
+
+        self.run_for(video_processor)
+
+        sections = [call['section'] for call in handler.calls]
+        self.assertTrue(len(sections) > 2)
+        self.assertEqual(list(range(1, len(sections) + 1)), sections)
+
+    def test_handlers_receive_roi_of_frame_and_detection(self):
+        video_processor = self.create_video_processor()
+        handler = TestHandler()
+        video_processor.subscribe(handler)
+
+        self.run_for(video_processor)
+
+        x_center = self.camera.image.shape[1] // 2
+        self.assertTrue(len(handler.calls) > 0)
+        self.assertEqual((20, x_center - 10, 3), handler.calls[0]['frame'].shape)
+        self.assertTrue((handler.calls[0]['partial_laser_detection'] == 255).all())
+
+    def test_block_policy_does_not_drop_frames(self):
+        video_processor = self.create_video_processor(encoder=SequenceEncoder([True, False, False]), detector=SlowDetector([0.01]), queue_size=2)
+        handler = TestHandler()
+        video_processor.subscribe(handler)
+
+        self.run_for(video_processor)
+
+        self.assertEqual(0, video_processor.dropped_frames)
+
+    def test_drop_policy_drops_frames_not_needed_for_capture_when_queues_are_full(self):
+        video_processor = self.create_video_processor(encoder=SequenceEncoder([True, False, False]), detector=SlowDetector([0.01]), queue_size=2, drop_policy='drop')
+        handler = TestHandler()
+        video_processor.subscribe(handler)
+
+        self.run_for(video_processor)
+
+        self.assertTrue(video_processor.dropped_frames > 0)
+        self.assertEqual(list(range(1, len(handler.calls) + 1)), [call['section'] for call in handler.calls])
+        self.assertEqual(video_processor.dropped_frames, video_processor.queue_depths['dropped'])
+
+    def test_detection_only_runs_for_frames_sent_to_handlers(self):
+        video_processor = self.create_video_processor(encoder=SequenceEncoder([True, False, False, False]))
+        handler = TestHandler()
+        video_processor.subscribe(handler)
+
+        self.run_for(video_processor)
+
+        self.assertTrue(len(handler.calls) > 0)
+        self.assertTrue(self.detector.calls <= (self.encoder.frames + 3) // 4)
+
+    def test_detection_does_not_run_without_handlers(self):
+        video_processor = self.create_video_processor()
+
+        self.run_for(video_processor)
+
+        self.assertEqual(0, self.detector.calls)
+        self.assertTrue(self.encoder.frames > 0)
+
+    def test_queue_depths_reports_each_stage(self):
+        video_processor = self.create_video_processor()
+        self.assertEqual({'detection': 0, 'handler': 0, 'dropped': 0}, video_processor.queue_depths)
+
+    def test_metrics_reports_encoder_counters_drops_and_queue_depths(self):
+        video_processor = self.create_video_processor(encoder=SequenceEncoder([False]), drop_policy='drop')
+        video_processor.dropped_frames = 4
+        self.encoder.frames = 7
+
+        self.assertEqual({'frames': 7, 'dropped_frames': 4, 'queue_depths': {'detection': 0, 'handler': 0, 'dropped': 4}}, video_processor.metrics)
+
+    def test_metrics_reports_frame_pool_of_pooled_sources(self):
+        video_processor = VideoProcessor(SyntheticSource(shape=(60, 80, 3), fps=None), SequenceEncoder(), ROI(0.0, 0.0, 1.0, 1.0), SlowDetector(), pipelined=True)
+
+        self.assertEqual({'size': 8, 'in_use': 0, 'allocations': 0, 'exhausted': 0}, video_processor.metrics['frame_pool'])
+
+    def test_frames_in_flight_covers_queue_and_stages(self):
+        video_processor = self.create_video_processor(queue_size=4, detection_workers=3)
+        self.assertEqual(10, video_processor.frames_in_flight)
+
+    def test_pool_sized_to_frames_in_flight_is_not_exhausted_when_stages_back_up(self):
+        source = SyntheticSource(shape=(60, 80, 3), fps=None, frame_pool_size=1)
+        source.start()
+        video_processor = VideoProcessor(source, SequenceEncoder(), ROI(0.0, 0.0, 1.0, 1.0), SlowDetector([0.01]), pipelined=True, queue_size=4)
+        source.frame_pool.ensure_size(video_processor.frames_in_flight)
+        video_processor.subscribe(TestHandler())
+
+        self.run_for(video_processor)
+
+        self.assertTrue(source.frame_pool.allocations > 4)
+        self.assertEqual(0, source.frame_pool.exhausted)
+
+    def test_unknown_drop_policy_raises(self):
+        with self.assertRaises(Exception):
+            self.create_video_processor(drop_policy='sometimes')
+
+
 if __name__ == '__main__':
     logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level='INFO')
     unittest.main()
\ No newline at end of file
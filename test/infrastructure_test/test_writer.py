@@ -3,6 +3,7 @@ import sys
 import os
 import numpy as np
 from StringIO import StringIO
+from io import BytesIO
 import logging
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -64,6 +65,53 @@ end_header\n"""
         result = self.stringIO2float(a_file)
         self.assertEquals(result, expected_data)
 
+    def test_write_cartisien_points_writes_all_chunks(self):
+        data = np.arange(30, dtype='float64').reshape(10, 3)
+        writer = PLYWriter(GLConverter(), self.stub_point_thinner, chunk_size=3)
+
+        a_file = StringIO()
+        writer.write_cartisien_points(a_file, data)
+        result = self.stringIO2float(a_file)
+
+        self.assertEquals(data.astype('int').tolist(), result)
+
+    def test_header_includes_normals_and_uvs_when_requested(self):
+        writer = PLYWriter(GLConverter(), self.stub_point_thinner, normals=True, uvs=True)
+        a_file = StringIO()
+
+        writer.write_cartisien_points(a_file, np.array([[10.0, 10.0, 10.0]]))
+
+        header = a_file.getvalue().split('end_header\n')[0]
+        self.assertTrue("property float nx\nproperty float ny\nproperty float nz\nproperty float s\nproperty float t\n" in header)
+        self.assertEquals(8, len(a_file.getvalue().split('end_header\n')[1].split('\n')[0].split(' ')))
+
+    def test_write_cartisien_points_writes_binary_little_endian(self):
+        data = np.array([[10.0, 20.0, 30.0], [-1.5, 2.5, 3.5]])
+        writer = PLYWriter(GLConverter(), self.stub_point_thinner, PLYWriter.binary_format, chunk_size=1)
+        a_file = BytesIO()
+
+        writer.write_cartisien_points(a_file, data)
+
+        header, body = a_file.getvalue().split(b'end_header\n')
+        self.assertTrue(header.startswith(b"ply\nformat binary_little_endian 1.0\n"))
+        self.assertTrue(b"element vertex 2\n" in header)
+        self.assertTrue((data == np.frombuffer(body, dtype='<f4').reshape(2, 3)).all())
+
+    def test_write_cartisien_points_writes_binary_normals_and_uvs(self):
+        data = np.array([[10.0, 20.0, 30.0], [-1.5, 2.5, 3.5]])
+        expected = GLConverter().convert_xyz(data).astype('<f4')
+        writer = PLYWriter(GLConverter(), self.stub_point_thinner, PLYWriter.binary_format, normals=True, uvs=True)
+        a_file = BytesIO()
+
+        writer.write_cartisien_points(a_file, data)
+
+        body = a_file.getvalue().split(b'end_header\n')[1]
+        self.assertTrue((expected == np.frombuffer(body, dtype='<f4').reshape(2, 8)).all())
+
+    def test_raises_exception_for_unknown_format(self):
+        with self.assertRaises(Exception):
+            PLYWriter(GLConverter(), self.stub_point_thinner, 'pizza')
+
     def stringIO2float(self, text):
         string = text.getvalue()
         lines = string.split('\n')[9:-1]